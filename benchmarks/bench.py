@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the localStoragePro storage backends.
+
+Runs get/set/remove/get_many/get_all/clear against every backend, and the
+async wrapper, over a grid of dataset and value sizes. Every operation is
+timed call by call, and the p50/p99 latency and throughput of each cell go
+to stdout and, with --output, to a JSON file that --compare can diff against
+a run from another commit:
+
+    python benchmarks/bench.py --output before.json
+    git checkout my-branch
+    python benchmarks/bench.py --output after.json --compare before.json
+
+The default grid finishes in a few minutes; --full runs 1e2 to 1e6 keys and
+16B to 1MB values. Cells whose data would exceed --max-bytes are skipped and
+every operation stops sampling after --time-limit seconds, so slow backends
+report fewer samples instead of running for hours.
+
+Data is written under a temporary home directory that is deleted afterwards.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+SYNC_BACKENDS = ("sqlite", "json", "text", "dbm", "log")
+ASYNC_BACKENDS = ("async-sqlite",)
+BACKENDS = SYNC_BACKENDS + ASYNC_BACKENDS
+OPERATIONS = ("set", "get", "get_many", "get_all", "remove", "clear")
+
+DEFAULT_DATASET_SIZES = (100, 1000, 10000)
+DEFAULT_VALUE_SIZES = (16, 1024, 65536)
+FULL_DATASET_SIZES = (100, 1000, 10000, 100000, 1000000)
+FULL_VALUE_SIZES = (16, 1024, 65536, 1048576)
+
+GET_MANY_BATCH = 100
+PRELOAD_CHUNK = 10000
+
+
+def percentile(sorted_samples: List[int], fraction: float) -> int:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_samples) - 1, math.ceil(fraction * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+def summarize(samples_ns: List[int], items_per_call: int = 1) -> Dict[str, Any]:
+    samples = sorted(samples_ns)
+    total_ns = sum(samples) or 1
+    return {
+        "count": len(samples),
+        "p50_us": round(percentile(samples, 0.50) / 1000, 3),
+        "p99_us": round(percentile(samples, 0.99) / 1000, 3),
+        "ops_per_sec": round(len(samples) * items_per_call * 1e9 / total_ns, 1),
+    }
+
+
+def key_name(i: int) -> str:
+    return f"key_{i:08d}"
+
+
+def sample_keys(dataset_size: int, count: int) -> List[str]:
+    # Spread the sampled keys over the whole dataset
+    step = max(1, dataset_size // count)
+    return [key_name(i) for i in range(0, dataset_size, step)][:count]
+
+
+def time_calls(calls: List[Callable[[], Any]], time_limit: float) -> List[int]:
+    samples = []
+    deadline = time.perf_counter() + time_limit
+    for call in calls:
+        start = time.perf_counter_ns()
+        call()
+        samples.append(time.perf_counter_ns() - start)
+        if time.perf_counter() > deadline:
+            break
+    return samples
+
+
+async def time_async_calls(calls: List[Callable[[], Any]], time_limit: float) -> List[int]:
+    samples = []
+    deadline = time.perf_counter() + time_limit
+    for call in calls:
+        start = time.perf_counter_ns()
+        await call()
+        samples.append(time.perf_counter_ns() - start)
+        if time.perf_counter() > deadline:
+            break
+    return samples
+
+
+def plan(dataset_size: int, samples: int) -> Dict[str, Any]:
+    keys = sample_keys(dataset_size, samples)
+    return {
+        "keys": keys,
+        "batches": [keys[i:i + GET_MANY_BATCH] for i in range(0, len(keys), GET_MANY_BATCH)] or [keys],
+        "batch_size": min(GET_MANY_BATCH, len(keys)) or 1,
+        # get_all reads the whole dataset, so fewer repetitions for bigger ones
+        "get_all_repeats": max(1, min(20, 100000 // dataset_size)),
+    }
+
+
+def run_sync_cell(backend_name: str, dataset_size: int, value: str, samples: int,
+                  time_limit: float) -> Dict[str, Dict[str, Any]]:
+    from localStoragePro.storage_backends import create_storage_backend
+
+    backend = create_storage_backend(f"bench.{backend_name}", backend_name)
+    try:
+        backend.clear()
+        for start in range(0, dataset_size, PRELOAD_CHUNK):
+            backend.set_many({key_name(i): value for i in range(start, min(dataset_size, start + PRELOAD_CHUNK))})
+        work = plan(dataset_size, samples)
+        keys = work["keys"]
+        results = {
+            "set": summarize(time_calls([lambda key=key: backend.set_item(key, value) for key in keys], time_limit)),
+            "get": summarize(time_calls([lambda key=key: backend.get_item(key) for key in keys], time_limit)),
+            "get_many": summarize(time_calls([lambda batch=batch: backend.get_many(batch)
+                                              for batch in work["batches"]], time_limit), work["batch_size"]),
+            "get_all": summarize(time_calls([backend.get_all] * work["get_all_repeats"], time_limit), dataset_size),
+            "remove": summarize(time_calls([lambda key=key: backend.remove_item(key) for key in keys], time_limit)),
+            "clear": summarize(time_calls([backend.clear], time_limit)),
+        }
+    finally:
+        backend.close()
+    return results
+
+
+def run_async_cell(backend_name: str, dataset_size: int, value: str, samples: int,
+                   time_limit: float) -> Dict[str, Dict[str, Any]]:
+    from localStoragePro import AsyncLocalStoragePro
+
+    async def run() -> Dict[str, Dict[str, Any]]:
+        storage = AsyncLocalStoragePro(f"bench.{backend_name}", backend_name.split("-", 1)[1])
+        try:
+            await storage.clear()
+            for start in range(0, dataset_size, PRELOAD_CHUNK):
+                await storage.setMany({key_name(i): value
+                                       for i in range(start, min(dataset_size, start + PRELOAD_CHUNK))})
+            work = plan(dataset_size, samples)
+            keys = work["keys"]
+            return {
+                "set": summarize(await time_async_calls([lambda key=key: storage.setItem(key, value)
+                                                         for key in keys], time_limit)),
+                "get": summarize(await time_async_calls([lambda key=key: storage.getItem(key)
+                                                         for key in keys], time_limit)),
+                "get_many": summarize(await time_async_calls([lambda batch=batch: storage.getMany(batch)
+                                                              for batch in work["batches"]], time_limit),
+                                      work["batch_size"]),
+                "get_all": summarize(await time_async_calls([storage.getAll] * work["get_all_repeats"],
+                                                            time_limit), dataset_size),
+                "remove": summarize(await time_async_calls([lambda key=key: storage.removeItem(key)
+                                                            for key in keys], time_limit)),
+                "clear": summarize(await time_async_calls([storage.clear], time_limit)),
+            }
+        finally:
+            await storage.aclose()
+
+    return asyncio.run(run())
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(backends: List[str], dataset_sizes: List[int], value_sizes: List[int], samples: int,
+                   time_limit: float, max_bytes: int, log: Callable[[str], None] = print) -> Dict[str, Any]:
+    results = []
+    for backend_name in backends:
+        for dataset_size in dataset_sizes:
+            for value_size in value_sizes:
+                cell = {"backend": backend_name, "keys": dataset_size, "value_size": value_size}
+                if dataset_size * value_size > max_bytes:
+                    results.append(dict(cell, skipped=f"over --max-bytes {max_bytes}"))
+                    continue
+                runner = run_async_cell if backend_name in ASYNC_BACKENDS else run_sync_cell
+                operations = runner(backend_name, dataset_size, "x" * value_size, samples, time_limit)
+                for operation in OPERATIONS:
+                    results.append(dict(cell, operation=operation, **operations[operation]))
+                    log(format_row(results[-1]))
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "samples": samples,
+            "time_limit": time_limit,
+        },
+        "results": results,
+    }
+
+
+def result_key(result: Dict[str, Any]) -> tuple:
+    return result["backend"], result["keys"], result["value_size"], result.get("operation")
+
+
+def format_row(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    row = (f"{result['backend']:<13} {result['keys']:>8} keys {result['value_size']:>8} B  "
+           f"{result['operation']:<9} p50 {result['p50_us']:>10.1f}us  p99 {result['p99_us']:>10.1f}us  "
+           f"{result['ops_per_sec']:>12.1f} ops/s")
+    if baseline is not None and baseline.get("ops_per_sec"):
+        row += f"  {result['ops_per_sec'] / baseline['ops_per_sec']:>6.2f}x"
+    return row
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print throughput relative to a baseline run and return the cells that regressed past threshold."""
+    baseline_results = {result_key(result): result for result in baseline["results"] if "operation" in result}
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'}:")
+    regressions = []
+    for result in current["results"]:
+        if "operation" not in result or result_key(result) not in baseline_results:
+            continue
+        old = baseline_results[result_key(result)]
+        print(format_row(result, old))
+        if old["ops_per_sec"] and result["ops_per_sec"] < old["ops_per_sec"] * (1 - threshold):
+            regressions.append(format_row(result, old))
+    return regressions
+
+
+def parse_sizes(text: str) -> List[int]:
+    return [int(float(size)) for size in text.split(",") if size]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the localStoragePro storage backends.")
+    parser.add_argument("--backends", default=",".join(BACKENDS),
+                        help=f"comma separated, from {', '.join(BACKENDS)}")
+    parser.add_argument("--sizes", type=parse_sizes, help="dataset sizes in keys, e.g. 1e2,1e4")
+    parser.add_argument("--value-sizes", type=parse_sizes, help="value sizes in bytes, e.g. 16,1024")
+    parser.add_argument("--full", action="store_true", help="1e2 to 1e6 keys and 16B to 1MB values")
+    parser.add_argument("--samples", type=int, default=1000, help="timed calls per operation")
+    parser.add_argument("--time-limit", type=float, default=10.0, help="seconds of sampling per operation")
+    parser.add_argument("--max-bytes", type=int, default=256 * 1024 * 1024,
+                        help="skip cells whose keys * value size exceed this")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare throughput with")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="with --compare, fail when throughput drops by more than this fraction")
+    args = parser.parse_args(argv)
+
+    backends = [name for name in args.backends.split(",") if name]
+    unknown = set(backends) - set(BACKENDS)
+    if unknown:
+        parser.error(f"unknown backends: {', '.join(sorted(unknown))}")
+    dataset_sizes = args.sizes or (FULL_DATASET_SIZES if args.full else DEFAULT_DATASET_SIZES)
+    value_sizes = args.value_sizes or (FULL_VALUE_SIZES if args.full else DEFAULT_VALUE_SIZES)
+
+    home = tempfile.mkdtemp(prefix="localStoragePro-bench-")
+    saved_home = {name: os.environ.get(name) for name in ("HOME", "USERPROFILE")}
+    os.environ["HOME"] = os.environ["USERPROFILE"] = home
+    try:
+        report = run_benchmarks(backends, dataset_sizes, value_sizes, args.samples, args.time_limit, args.max_bytes)
+    finally:
+        for name, value in saved_home.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(home, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(report, json.load(baseline_file), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions over {args.threshold:.0%}:")
+            for row in regressions:
+                print(row)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
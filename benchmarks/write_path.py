@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Compares the SQLite write path with the SELECT + INSERT/UPDATE it replaced.
+
+Every key is inserted and then updated once, on both paths, and the cost
+per write is printed in microseconds. Both paths must leave the same final
+contents, the script exits with status 1 otherwise:
+
+    python benchmarks/write_path.py --writes 10000
+
+synchronous=OFF keeps fsync noise out of the comparison. Data is written
+under a temporary home directory that is deleted afterwards.
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from localStoragePro.sqlite_storage import SQLiteStorageBackend  # noqa: E402
+from localStoragePro.storage_backends import synchronized  # noqa: E402
+
+
+class LegacySQLiteStorageBackend(SQLiteStorageBackend):
+    """SQLite backend with the previous SELECT + INSERT/UPDATE write path."""
+
+    @synchronized
+    def set_item(self, item: str, value: Any, ttl: Optional[float] = None) -> None:
+        cursor = self.db_cursor
+        if len(cursor.execute("SELECT key FROM localStoragePro WHERE key = ?", (item,)).fetchall()) == 0:
+            cursor.execute("INSERT INTO localStoragePro (key, value) VALUES (?, ?)", (item, str(value)))
+        else:
+            cursor.execute("UPDATE localStoragePro SET value = ? WHERE key = ?", (str(value), item))
+        self.commit_write()
+
+
+def time_writes(backend_class: Type[SQLiteStorageBackend], writes: int) -> Tuple[float, Dict[str, Any]]:
+    """Return the per-write cost in microseconds and the final contents, inserting then updating every key."""
+    backend = backend_class("bench.write_path", profile={"synchronous": "OFF"})
+    backend.clear()
+    start = time.perf_counter()
+    for round_ in range(2):
+        for i in range(writes // 2):
+            backend.set_item(f"key_{i}", f"value_{round_}_{i}")
+    elapsed = (time.perf_counter() - start) / writes * 1e6
+    contents = backend.get_all()
+    backend.clear()
+    backend.close()
+    return elapsed, contents
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare the legacy and UPSERT SQLite write paths.")
+    parser.add_argument("--writes", type=int, default=10000, help="writes per path, half inserts, half updates")
+    args = parser.parse_args(argv)
+
+    home = tempfile.mkdtemp(prefix="localStoragePro-bench-")
+    saved_home = {name: os.environ.get(name) for name in ("HOME", "USERPROFILE")}
+    os.environ["HOME"] = os.environ["USERPROFILE"] = home
+    try:
+        legacy, legacy_contents = time_writes(LegacySQLiteStorageBackend, args.writes)
+        upsert, upsert_contents = time_writes(SQLiteStorageBackend, args.writes)
+    finally:
+        for name, value in saved_home.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(home, ignore_errors=True)
+
+    if legacy_contents != upsert_contents:
+        print("SQLite set_item: legacy and upsert paths left different contents!", file=sys.stderr)
+        return 1
+    print(f"SQLite set_item: legacy {legacy:.1f}us/write, upsert {upsert:.1f}us/write "
+          f"({legacy / upsert:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
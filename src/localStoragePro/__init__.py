@@ -9,20 +9,63 @@ __copyright__ = 'Copyright (C) 2021-present Suraj Mandal'
 __license__ = 'MIT License'
 __version__ = '0.3.0'
 
-from typing import Any, Dict, List, Optional
+import os
+import importlib
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple, Union
 
-from .storage_backends import (
-    BasicStorageBackend,
-    TextStorageBackend,
-    SQLiteStorageBackend,
-    JSONStorageBackend
-)
-
-# Import async API components early to avoid circular imports
-from .async_storage import AsyncLocalStoragePro, async_lsp
+if TYPE_CHECKING:
+    from .cache import CachedStorageBackend
+    from .compression import CompressedStorageBackend
+    from .expiry import ExpirySweeper
+    from .metrics import StorageMetrics
+    from .storage_backends import BasicStorageBackend
+    from .value_codecs import ValueCodec
 
 __all__ = ['localStoragePro', 'lsp', 'AsyncLocalStoragePro', 'async_lsp']
 
+# Everything else the package exports is imported on first access, so that a
+# sync script doesn't pay for asyncio, sqlite3 or json unless it uses them
+_LAZY_ATTRIBUTES = {
+    'AsyncLocalStoragePro': 'async_storage',
+    'async_lsp': 'async_storage',
+    'BasicStorageBackend': 'storage_backends',
+    'TextStorageBackend': 'storage_backends',
+    'create_storage_backend': 'storage_backends',
+    'SQLiteStorageBackend': 'sqlite_storage',
+    'SQLITE_PROFILES': 'sqlite_storage',
+    'JSONStorageBackend': 'json_storage',
+    'SharedSQLiteStorageBackend': 'shared_sqlite',
+    'SharedSQLiteDatabase': 'shared_sqlite',
+    'open_shared_database': 'shared_sqlite',
+    'DBMStorageBackend': 'dbm_storage',
+    'LogStorageBackend': 'log_storage',
+    'CachedStorageBackend': 'cache',
+    'ExpirySweeper': 'expiry',
+    'MetricsStorageBackend': 'metrics',
+    'OperationEvent': 'metrics',
+    'StorageMetrics': 'metrics',
+    'SNAPSHOT_PATH': 'snapshot',
+    'SnapshotStorageBackend': 'snapshot',
+    'write_snapshot': 'snapshot',
+    'CompressedStorageBackend': 'compression',
+    'CODECS': 'value_codecs',
+    'CodecStorageBackend': 'value_codecs',
+    'ValueCodec': 'value_codecs',
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(f'.{_LAZY_ATTRIBUTES[name]}', __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
 
 class localStoragePro:
     """
@@ -34,34 +77,121 @@ class localStoragePro:
     Args:
         app_namespace (str): A unique identifier for your application (e.g., 'com.mycompany.myapp').
                            Must not contain path separators.
-        storage_backend (str): Storage backend to use. Options: 'sqlite' (default), 'json', 'text'.
+        storage_backend (str): Storage backend to use. Options: 'sqlite' (default), 'json', 'text',
+                               'dbm' for a stdlib dbm hash file, 'log' for append-only log
+                               files, 'sqlite-shared' to keep many namespaces in one SQLite
+                               database, or 'snapshot' to read a snapshot written by
+                               ``exportSnapshot()``.
+        cache (bool | dict): Put a read-through LRU cache in front of the backend. Pass a
+                             dict to configure it, e.g. ``{'max_entries': 1024,
+                             'max_bytes': 16 * 1024 * 1024, 'ttl': 30, 'negative_cache': True}``.
+        codec (str | ValueCodec): Encode values to bytes instead of storing ``str(value)``.
+                                  Options: 'bytes', 'json', 'pickle', 'struct', or a
+                                  ``ValueCodec`` instance. Values then keep their types.
+        compression (str | dict): Compress values above a size threshold, e.g. ``'zlib'`` or
+                                  ``{'algorithm': 'lzma', 'threshold': 4096, 'level': 6}``.
+                                  Algorithms: 'zlib', 'lzma', 'bz2'.
+        metrics (bool | StorageMetrics): Record counts, bytes and latency histograms of every
+                                         backend call. Pass a ``StorageMetrics`` to share one
+                                         between stores or to register observers.
+        lazy (bool): Open the backend on first use instead of here. Invalid options then
+                     raise on that first use.
+        **backend_options: Extra options for the chosen backend, for example
+                           ``profile='throughput'`` or a dict of pragmas for 'sqlite'
+                           (see ``SQLITE_PROFILES``), or ``commit_batch_size`` /
+                           ``commit_interval_ms`` to enable SQLite group commit.
     """
     
-    def __init__(self, app_namespace: str, storage_backend: str = "sqlite") -> None:
-        self.storage_backend_instance = BasicStorageBackend(app_namespace)
-        if storage_backend == "text":
-            self.storage_backend_instance = TextStorageBackend(app_namespace)
-        elif storage_backend == "sqlite":
-            self.storage_backend_instance = SQLiteStorageBackend(app_namespace)
-        elif storage_backend == "json":
-            self.storage_backend_instance = JSONStorageBackend(app_namespace)
-        else:
-            self.storage_backend_instance = SQLiteStorageBackend(app_namespace)
+    def __init__(self, app_namespace: str, storage_backend: str = "sqlite",
+                 cache: Union[bool, Dict[str, Any], None] = None, codec: Union[str, "ValueCodec", None] = None,
+                 compression: Union[str, Dict[str, Any], None] = None,
+                 metrics: Union[bool, "StorageMetrics", None] = None, lazy: bool = False,
+                 **backend_options: Any) -> None:
+        if app_namespace.count(os.sep) > 0:
+            from .storage_backends import localStoragePyStorageException
+            raise localStoragePyStorageException('app_namespace may not contain path separators!')
+        if (codec is not None or compression) and storage_backend == "text":
+            backend_options.setdefault("binary", True)
         self.app_namespace = app_namespace
         self.storage_backend = storage_backend
+        self.backend_options = backend_options
+        self.cache_options = cache
+        self.codec = codec
+        self.compression_options = compression
+        self.metrics: Optional["StorageMetrics"] = None
+        if metrics:
+            from .metrics import StorageMetrics
+            self.metrics = metrics if isinstance(metrics, StorageMetrics) else StorageMetrics()
+        self.cache: Optional["CachedStorageBackend"] = None
+        self.compression: Optional["CompressedStorageBackend"] = None
+        self.expiry_sweeper: Optional["ExpirySweeper"] = None
+        self._storage_backend_instance: Optional[Any] = None
+        self._base_backend: Optional["BasicStorageBackend"] = None
+        self._build_lock = threading.Lock()
+        if not lazy:
+            self._build()
+
+    def _build(self) -> Any:
+        """Open the backend and stack the configured wrappers on it, once."""
+        with self._build_lock:
+            if self._storage_backend_instance is not None:
+                return self._storage_backend_instance
+            from .storage_backends import create_storage_backend
+            backend = create_storage_backend(self.app_namespace, self.storage_backend, **self.backend_options)
+            # Bottom of the wrapper stack, holding values exactly as they are stored
+            self._base_backend = backend
+            if self.metrics is not None:
+                from .metrics import MetricsStorageBackend
+                backend = MetricsStorageBackend(backend, self.metrics, self.storage_backend)
+            compression = self.compression_options
+            if compression:
+                from .compression import CompressedStorageBackend
+                compression_options = dict(compression) if isinstance(compression, dict) else {"algorithm": compression}
+                compression_options.setdefault("decode_text", self.codec is None)
+                self.compression = backend = CompressedStorageBackend(backend, **compression_options)
+            if self.cache_options:
+                from .cache import CachedStorageBackend
+                cache_options = self.cache_options if isinstance(self.cache_options, dict) else {}
+                # The cache holds encoded values, so callers never share decoded objects
+                self.cache = backend = CachedStorageBackend(backend, **cache_options)
+            if self.codec is not None:
+                from .value_codecs import CodecStorageBackend
+                backend = CodecStorageBackend(backend, self.codec)
+            self._storage_backend_instance = backend
+            return backend
+
+    @property
+    def storage_backend_instance(self) -> Any:
+        """Top of the wrapper stack, opening the backend on first use."""
+        return self._storage_backend_instance or self._build()
+
+    @property
+    def base_backend(self) -> "BasicStorageBackend":
+        """The backend itself, below every wrapper, opening it on first use."""
+        if self._base_backend is None:
+            self._build()
+        return self._base_backend
 
     def getItem(self, item: str) -> Any:
         """Retrieve a value by its key."""
         return self.storage_backend_instance.get_item(item)
 
-    def setItem(self, item: str, value: Any) -> None:
-        """Store a value with the given key."""
-        self.storage_backend_instance.set_item(item, value)
+    def setItem(self, item: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value with the given key, expiring after ttl seconds if given."""
+        self.storage_backend_instance.set_item(item, value, ttl)
 
     def removeItem(self, item: str) -> None:
         """Remove a key-value pair."""
         self.storage_backend_instance.remove_item(item)
 
+    def setMany(self, items: dict, ttl: Optional[float] = None) -> None:
+        """Store multiple key-value pairs in a single write, expiring after ttl seconds if given."""
+        self.storage_backend_instance.set_many(items, ttl)
+
+    def removeMany(self, items: list) -> None:
+        """Remove multiple keys in a single write."""
+        self.storage_backend_instance.remove_many(items)
+
     def getAll(self) -> dict:
         """Retrieve all stored key-value pairs."""
         return self.storage_backend_instance.get_all()
@@ -70,6 +200,26 @@ class localStoragePro:
         """Retrieve multiple values by their keys."""
         return self.storage_backend_instance.get_many(items)
 
+    def iterKeys(self) -> Iterator[str]:
+        """Iterate over all keys without loading the whole namespace into memory."""
+        return self.storage_backend_instance.iter_keys()
+
+    def iterItems(self) -> Iterator[Tuple[str, Any]]:
+        """Iterate over all key-value pairs without loading the whole namespace into memory."""
+        return self.storage_backend_instance.iter_items()
+
+    def page(self, after_key: Optional[str] = None, limit: int = 100) -> List[Tuple[str, Any]]:
+        """Return up to limit (key, value) pairs with keys after after_key, in key order."""
+        return self.storage_backend_instance.page(after_key, limit)
+
+    def getByPrefix(self, prefix: str) -> dict:
+        """Retrieve all key-value pairs whose keys start with prefix, in key order."""
+        return self.storage_backend_instance.get_by_prefix(prefix)
+
+    def getRange(self, start: Optional[str] = None, end: Optional[str] = None) -> dict:
+        """Retrieve all key-value pairs with start <= key < end, in key order."""
+        return self.storage_backend_instance.get_range(start, end)
+
     def removeAll(self) -> None:
         """Remove all stored key-value pairs."""
         self.storage_backend_instance.remove_all()
@@ -78,18 +228,84 @@ class localStoragePro:
         """Clear all stored data (equivalent to removeAll)."""
         self.storage_backend_instance.clear()
 
+    def purgeExpired(self, limit: Optional[int] = None) -> int:
+        """Delete up to limit expired keys (all of them by default), returning how many were deleted."""
+        return self.storage_backend_instance.purge_expired(limit)
+
+    def exportSnapshot(self, path: Optional[str] = None) -> int:
+        """Write a read-only memory-mapped snapshot, opened with storage_backend='snapshot'. Returns the key count."""
+        from .snapshot import SNAPSHOT_PATH, write_snapshot
+        if path is None:
+            path = os.path.join(self.base_backend.app_storage_path, SNAPSHOT_PATH)
+        return write_snapshot(path, self.base_backend)
+
+    def startExpirySweeper(self, interval: float = 60.0, batch_size: int = 500) -> None:
+        """Delete expired keys every interval seconds in batches of batch_size, in the background."""
+        from .expiry import ExpirySweeper
+        self.stopExpirySweeper()
+        self.expiry_sweeper = ExpirySweeper(self.storage_backend_instance.purge_expired, interval, batch_size)
+        self.expiry_sweeper.start()
+
+    def stopExpirySweeper(self) -> None:
+        """Stop the background expiry sweeper, if one is running."""
+        if self.expiry_sweeper is not None:
+            self.expiry_sweeper.stop()
+            self.expiry_sweeper = None
+
+    def flush(self) -> None:
+        """Write out anything the backend is still buffering (e.g. group commit)."""
+        if self._storage_backend_instance is not None:
+            self._storage_backend_instance.flush()
+
+    def close(self) -> None:
+        """Release the backend's open resources (e.g. the SQLite connection)."""
+        self.stopExpirySweeper()
+        if self._storage_backend_instance is not None:
+            self._storage_backend_instance.close()
+
+    def cacheStats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters of the read cache (empty without one)."""
+        if self.cache is not None:
+            return self.cache.stats()
+        return {}
+
+    def compressionStats(self) -> Dict[str, Any]:
+        """Return compression ratio and CPU time counters (empty without compression)."""
+        if self.compression is not None:
+            return self.compression.stats()
+        return {}
+
+    def metricsStats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Return per-backend, per-operation counters and latency histograms (empty without metrics)."""
+        if self.metrics is not None:
+            return self.metrics.stats()
+        return {}
+
 
 # Singleton class for synchronous API
 class LocalStorageProSingleton:
-    """Singleton-like class for localStoragePro."""
+    """
+    Singleton-like class for localStoragePro.
+
+    Keeps a registry of open stores keyed by namespace, backend and options,
+    so ``lsp('ns')`` in a request handler reuses one store instead of opening
+    the backend again. Each call returns the registered store and makes it
+    the one the singleton's own methods act on. Calling without options
+    reuses whatever store is open for the namespace and backend; calling
+    with different options closes that store and replaces it, as two stores
+    configured differently over the same files would overwrite each other.
+    ``evict()`` and ``closeAll()`` close stores explicitly.
+    """
     
     def __init__(self):
         self._instance = None
         self._namespace = None
         self._backend = None
+        self._instances: Dict[Tuple[str, str], Tuple[Tuple[Any, ...], localStoragePro]] = {}
+        self._lock = threading.Lock()
     
-    def __call__(self, app_namespace: str = None, storage_backend: str = None):
-        """Create or update the instance with the given namespace and backend."""
+    def __call__(self, app_namespace: str = None, storage_backend: str = None, **options: Any) -> localStoragePro:
+        """Return the registered store for the namespace, backend and options, opening it if needed."""
         if app_namespace is not None:
             self._namespace = app_namespace
         if storage_backend is not None:
@@ -99,24 +315,77 @@ class LocalStorageProSingleton:
             raise ValueError("No namespace provided for localStoragePro")
         
         backend = self._backend or "sqlite"
-        self._instance = localStoragePro(self._namespace, backend)
-        return self
+        self._instance = self._open(self._namespace, backend, options)
+        return self._instance
+    
+    def _open(self, app_namespace: str, storage_backend: str, options: Dict[str, Any]) -> localStoragePro:
+        from .storage_backends import options_key
+        key = options_key(options)
+        replaced = None
+        with self._lock:
+            entry = self._instances.get((app_namespace, storage_backend))
+            if entry is not None and (not options or entry[0] == key):
+                return entry[1]
+            if entry is not None:
+                replaced = entry[1]
+            # Opened on first use, so lsp('ns') alone never touches the disk
+            instance = localStoragePro(app_namespace, storage_backend, **dict({"lazy": True}, **options))
+            self._instances[(app_namespace, storage_backend)] = (key, instance)
+        if replaced is not None:
+            replaced.close()
+        return instance
+    
+    def instances(self) -> List[localStoragePro]:
+        """Return every store currently registered."""
+        with self._lock:
+            return [instance for _, instance in self._instances.values()]
+    
+    def evict(self, app_namespace: str, storage_backend: Optional[str] = None) -> int:
+        """Close and unregister the stores of a namespace (on every backend by default), returning how many."""
+        with self._lock:
+            keys = [key for key in self._instances
+                    if key[0] == app_namespace and storage_backend in (None, key[1])]
+            evicted = [self._instances.pop(key)[1] for key in keys]
+            if self._instance in evicted:
+                self._instance = None
+        for instance in evicted:
+            instance.close()
+        return len(evicted)
+    
+    def closeAll(self) -> None:
+        """Close and unregister every store."""
+        with self._lock:
+            evicted = [instance for _, instance in self._instances.values()]
+            self._instances = {}
+            self._instance = None
+        for instance in evicted:
+            instance.close()
     
     def getItem(self, item: str) -> Any:
         """Retrieve a value by its key."""
         self._ensure_initialized()
         return self._instance.getItem(item)
     
-    def setItem(self, item: str, value: Any) -> None:
-        """Store a value with the given key."""
+    def setItem(self, item: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value with the given key, expiring after ttl seconds if given."""
         self._ensure_initialized()
-        self._instance.setItem(item, value)
+        self._instance.setItem(item, value, ttl)
     
     def removeItem(self, item: str) -> None:
         """Remove a key-value pair."""
         self._ensure_initialized()
         self._instance.removeItem(item)
     
+    def setMany(self, items: dict, ttl: Optional[float] = None) -> None:
+        """Store multiple key-value pairs in a single write, expiring after ttl seconds if given."""
+        self._ensure_initialized()
+        self._instance.setMany(items, ttl)
+    
+    def removeMany(self, items: list) -> None:
+        """Remove multiple keys in a single write."""
+        self._ensure_initialized()
+        self._instance.removeMany(items)
+    
     def getAll(self) -> dict:
         """Retrieve all stored key-value pairs."""
         self._ensure_initialized()
@@ -127,6 +396,31 @@ class LocalStorageProSingleton:
         self._ensure_initialized()
         return self._instance.getMany(items)
     
+    def iterKeys(self) -> Iterator[str]:
+        """Iterate over all keys without loading the whole namespace into memory."""
+        self._ensure_initialized()
+        return self._instance.iterKeys()
+    
+    def iterItems(self) -> Iterator[Tuple[str, Any]]:
+        """Iterate over all key-value pairs without loading the whole namespace into memory."""
+        self._ensure_initialized()
+        return self._instance.iterItems()
+    
+    def page(self, after_key: Optional[str] = None, limit: int = 100) -> List[Tuple[str, Any]]:
+        """Return up to limit (key, value) pairs with keys after after_key, in key order."""
+        self._ensure_initialized()
+        return self._instance.page(after_key, limit)
+    
+    def getByPrefix(self, prefix: str) -> dict:
+        """Retrieve all key-value pairs whose keys start with prefix, in key order."""
+        self._ensure_initialized()
+        return self._instance.getByPrefix(prefix)
+    
+    def getRange(self, start: Optional[str] = None, end: Optional[str] = None) -> dict:
+        """Retrieve all key-value pairs with start <= key < end, in key order."""
+        self._ensure_initialized()
+        return self._instance.getRange(start, end)
+    
     def removeAll(self) -> None:
         """Remove all stored key-value pairs."""
         self._ensure_initialized()
@@ -137,10 +431,17 @@ class LocalStorageProSingleton:
         self._ensure_initialized()
         self._instance.clear()
     
+    def purgeExpired(self, limit: Optional[int] = None) -> int:
+        """Delete up to limit expired keys (all of them by default), returning how many were deleted."""
+        self._ensure_initialized()
+        return self._instance.purgeExpired(limit)
+    
     def _ensure_initialized(self):
-        """Ensure the instance is initialized."""
+        """Ensure the instance is initialized, reopening it after an eviction."""
         if self._instance is None:
-            raise ValueError("localStoragePro not initialized. Call lsp('namespace') first.")
+            if self._namespace is None:
+                raise ValueError("localStoragePro not initialized. Call lsp('namespace') first.")
+            self()
 
 
 # Create singleton instance for synchronous API
@@ -1,34 +1,253 @@
 """Async wrapper for localStoragePro."""
 
 import asyncio
-from typing import Any, Dict, List, Optional
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
 import sys
 import traceback
 
-from .storage_backends import BasicStorageBackend, TextStorageBackend, SQLiteStorageBackend, JSONStorageBackend
+from .expiry import ExpirySweeper
+from .metrics import StorageMetrics
+from .sqlite_storage import SQLiteStorageBackend
+from .storage_backends import BasicStorageBackend, create_storage_backend, options_key, running_event_loop
+
+# Upper bound on worker threads, and therefore on pooled SQLite connections
+DEFAULT_MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+# Operations that go through the SQLite writer thread instead of the read pool
+WRITE_OPERATIONS = frozenset([
+    "set_item", "remove_item", "set_many", "remove_many", "remove_all", "clear", "flush", "purge_expired",
+])
+
+
+class SQLiteWriter:
+    """
+    Dedicated writer thread for one SQLite backend.
+
+    Writes are queued from any thread. The writer takes everything queued so
+    far (up to ``max_batch`` writes) and applies it in one transaction, each
+    write in its own savepoint so a failing write only fails its own future.
+    Every future resolves once the transaction holding its write commits.
+    """
+
+    def __init__(self, backend: SQLiteStorageBackend, max_batch: int = 1000) -> None:
+        self.backend = backend
+        self.max_batch = max_batch
+        self.queue: "queue.SimpleQueue[Optional[Tuple[str, tuple, Future]]]" = queue.SimpleQueue()
+        self.batches = 0
+        self.writes = 0
+        self.thread = threading.Thread(target=self.run, name="localStoragePro-sqlite-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, operation: str, *args) -> Future:
+        future: Future = Future()
+        self.queue.put((operation, args, future))
+        return future
+
+    def close(self) -> None:
+        """Apply everything queued so far, then stop the writer thread."""
+        self.queue.put(None)
+        self.thread.join()
+
+    def run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = None in batch
+            self.write_batch([write for write in batch if write is not None])
+            if stopping:
+                return
+
+    def write_batch(self, batch: List[Tuple[str, tuple, Future]]) -> None:
+        outcomes = []
+        try:
+            with self.backend.transaction():
+                for operation, args, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with self.backend.transaction():
+                            outcomes.append((future, getattr(self.backend, operation)(*args), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            # Beginning or committing the transaction failed, so none of the batch was
+            # written; fail every write, including those it never got to
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.writes += len(outcomes)
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+class ReadCoalescer:
+    """
+    DataLoader-style batching of single-key reads.
+
+    ``load(key)`` calls made within one event loop tick (or within
+    ``window_ms`` of the first of them) are collected, deduplicated and
+    answered by one ``get_many`` call, whose results are fanned back out to
+    the waiting coroutines. A batch is sent early once it holds
+    ``max_batch`` keys.
+    """
+
+    def __init__(self, get_many: Callable[[List[str]], Awaitable[Dict[str, Any]]], window_ms: float = 0,
+                 max_batch: int = 500) -> None:
+        self.get_many = get_many
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self.pending: Dict[str, "asyncio.Future[Any]"] = {}
+        self.pending_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.dispatch_handle: Optional[asyncio.Handle] = None
+        # The loop only keeps weak references to tasks, hold on to running batches
+        self.tasks: Set["asyncio.Task[None]"] = set()
+        self.loads = 0
+        self.batches = 0
+
+    async def load(self, key: str) -> Any:
+        loop = asyncio.get_running_loop()
+        if self.pending and self.pending_loop is not loop:
+            # Batches never span event loops
+            self.dispatch()
+        future = self.pending.get(key)
+        if future is None:
+            future = loop.create_future()
+            self.pending[key] = future
+            self.pending_loop = loop
+            if len(self.pending) >= self.max_batch:
+                self.dispatch()
+            elif self.dispatch_handle is None:
+                if self.window_ms:
+                    self.dispatch_handle = loop.call_later(self.window_ms / 1000, self.dispatch)
+                else:
+                    self.dispatch_handle = loop.call_soon(self.dispatch)
+        self.loads += 1
+        # Shielded, so one cancelled caller doesn't cancel the others waiting on this key
+        return await asyncio.shield(future)
+
+    def dispatch(self) -> None:
+        if self.dispatch_handle is not None:
+            self.dispatch_handle.cancel()
+            self.dispatch_handle = None
+        batch, self.pending = self.pending, {}
+        if batch:
+            self.batches += 1
+            task = self.pending_loop.create_task(self.resolve(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def resolve(self, batch: Dict[str, "asyncio.Future[Any]"]) -> None:
+        try:
+            values = await self.get_many(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(values.get(key))
 
 
 class AsyncStorageBackend:
-    """Async wrapper for storage backends."""
-    
-    def __init__(self, backend: BasicStorageBackend, app_namespace: str):
+    """Async wrapper for storage backends.
+
+    Operations run on a bounded pool of worker threads owned by this wrapper.
+    SQLite reads get one long-lived connection per worker thread, created on
+    first use and closed by ``aclose()``, while all SQLite writes go through
+    one ``SQLiteWriter`` thread that commits concurrent writes together, so
+    they never compete for the database's write lock. File based backends,
+    and SQLite in group commit mode (whose open transaction must live on one
+    connection), are shared and serialized behind a lock.
+
+    With ``coalesce_reads`` on (the default), concurrent ``get_item`` calls
+    are batched into one ``get_many`` by a ``ReadCoalescer``.
+
+    Given a ``StorageMetrics``, every backend call is recorded under
+    ``backend_name`` with the latency its caller awaited, queueing included.
+    Coalesced ``get_item`` calls show up as the ``get_many`` they were
+    batched into.
+    """
+
+    def __init__(self, backend: BasicStorageBackend, app_namespace: str, max_workers: Optional[int] = None,
+                 backend_options: Optional[Dict[str, Any]] = None, coalesce_reads: bool = True,
+                 coalesce_window_ms: float = 0, metrics: Optional[StorageMetrics] = None,
+                 backend_name: Optional[str] = None):
         self.backend = backend
         self.app_namespace = app_namespace
+        self.backend_options = backend_options or {}
         self.backend_type = type(backend).__name__
+        self.pooled = self.backend_type == "SQLiteStorageBackend" and not getattr(backend, "group_commit", False)
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="localStoragePro")
+        self._thread_local = threading.local()
+        self._thread_backends: List[BasicStorageBackend] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.writer = SQLiteWriter(backend) if self.pooled else None
+        self.read_coalescer = ReadCoalescer(self._get_many, coalesce_window_ms) if coalesce_reads else None
+        self.metrics = metrics
+        self.backend_name = backend_name or self.backend_type
+    
+    async def _run(self, operation: str, *args) -> Any:
+        """Run an operation on the worker pool, or queue it for the writer thread."""
+        if self._closed:
+            raise RuntimeError("AsyncStorageBackend is closed")
+        if self.metrics is not None:
+            return await self._run_measured(operation, *args)
+        if self.writer is not None and operation in WRITE_OPERATIONS:
+            return await asyncio.wrap_future(self.writer.submit(operation, *args))
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._execute_operation, operation, *args)
+    
+    async def _run_measured(self, operation: str, *args) -> Any:
+        """Like _run, recording the call in self.metrics."""
+        written = self.writer is not None and operation in WRITE_OPERATIONS
+        start = time.perf_counter()
+        try:
+            if written:
+                result = await asyncio.wrap_future(self.writer.submit(operation, *args))
+            else:
+                # Run the operation without its fallback, so failures can be counted here
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor, self._call, operation, *args)
+        except Exception as e:
+            self.metrics.record(self.backend_name, operation, time.perf_counter() - start, error=True)
+            if written:
+                raise
+            return self._failed(operation, e)
+        self.metrics.record_call(self.backend_name, operation, time.perf_counter() - start, args, result)
+        return result
     
     async def get_item(self, item: str) -> Optional[str]:
         """Get item asynchronously."""
         try:
-            return await asyncio.to_thread(self._execute_operation, "get_item", item)
+            if self.read_coalescer is not None:
+                return await self.read_coalescer.load(item)
+            return await self._run("get_item", item)
         except Exception as e:
             print(f"Error in get_item: {e}")
             traceback.print_exc()
             return None
     
-    async def set_item(self, item: str, value: Any) -> None:
+    async def set_item(self, item: str, value: Any, ttl: Optional[float] = None) -> None:
         """Set item asynchronously."""
         try:
-            await asyncio.to_thread(self._execute_operation, "set_item", item, value)
+            await self._run("set_item", item, value, ttl)
         except Exception as e:
             print(f"Error in set_item: {e}")
             traceback.print_exc()
@@ -36,33 +255,96 @@ class AsyncStorageBackend:
     async def remove_item(self, item: str) -> None:
         """Remove item asynchronously."""
         try:
-            await asyncio.to_thread(self._execute_operation, "remove_item", item)
+            await self._run("remove_item", item)
         except Exception as e:
             print(f"Error in remove_item: {e}")
             traceback.print_exc()
     
+    async def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """Set many items asynchronously in a single write."""
+        try:
+            await self._run("set_many", items, ttl)
+        except Exception as e:
+            print(f"Error in set_many: {e}")
+            traceback.print_exc()
+    
+    async def remove_many(self, items: List[str]) -> None:
+        """Remove many items asynchronously in a single write."""
+        try:
+            await self._run("remove_many", items)
+        except Exception as e:
+            print(f"Error in remove_many: {e}")
+            traceback.print_exc()
+    
     async def get_all(self) -> Dict[str, str]:
         """Get all items asynchronously."""
         try:
-            return await asyncio.to_thread(self._execute_operation, "get_all")
+            return await self._run("get_all")
         except Exception as e:
             print(f"Error in get_all: {e}")
             traceback.print_exc()
             return {}
     
+    async def _get_many(self, items: List[str]) -> Dict[str, str]:
+        """Get many items asynchronously, letting errors propagate."""
+        return await self._run("get_many", items)
+    
     async def get_many(self, items: List[str]) -> Dict[str, str]:
         """Get many items asynchronously."""
         try:
-            return await asyncio.to_thread(self._execute_operation, "get_many", items)
+            return await self._run("get_many", items)
         except Exception as e:
             print(f"Error in get_many: {e}")
             traceback.print_exc()
             return {}
     
+    async def page(self, after_key: Optional[str] = None, limit: int = 100) -> List[Tuple[str, Any]]:
+        """Get one key-ordered page of items asynchronously."""
+        try:
+            return await self._run("page", after_key, limit)
+        except Exception as e:
+            print(f"Error in page: {e}")
+            traceback.print_exc()
+            return []
+    
+    async def get_range(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, str]:
+        """Get all items with start <= key < end asynchronously."""
+        try:
+            return await self._run("get_range", start, end)
+        except Exception as e:
+            print(f"Error in get_range: {e}")
+            traceback.print_exc()
+            return {}
+    
+    async def get_by_prefix(self, prefix: str) -> Dict[str, str]:
+        """Get all items whose keys start with prefix asynchronously."""
+        try:
+            return await self._run("get_by_prefix", prefix)
+        except Exception as e:
+            print(f"Error in get_by_prefix: {e}")
+            traceback.print_exc()
+            return {}
+    
+    async def iter_items(self, batch_size: int = 1000) -> AsyncIterator[Tuple[str, Any]]:
+        """Iterate over all items, one page per worker thread hop."""
+        after_key = None
+        while True:
+            rows = await self.page(after_key, batch_size)
+            for row in rows:
+                yield row
+            if len(rows) < batch_size:
+                return
+            after_key = rows[-1][0]
+    
+    async def iter_keys(self, batch_size: int = 1000) -> AsyncIterator[str]:
+        """Iterate over all keys, one page per worker thread hop."""
+        async for key, _ in self.iter_items(batch_size):
+            yield key
+    
     async def remove_all(self) -> None:
         """Remove all items asynchronously."""
         try:
-            await asyncio.to_thread(self._execute_operation, "remove_all")
+            await self._run("remove_all")
         except Exception as e:
             print(f"Error in remove_all: {e}")
             traceback.print_exc()
@@ -70,68 +352,108 @@ class AsyncStorageBackend:
     async def clear(self) -> None:
         """Clear storage asynchronously."""
         try:
-            await asyncio.to_thread(self._execute_operation, "clear")
+            await self._run("clear")
         except Exception as e:
             print(f"Error in clear: {e}")
             traceback.print_exc()
     
+    async def purge_expired(self, limit: Optional[int] = None) -> int:
+        """Delete up to limit expired items asynchronously."""
+        try:
+            return await self._run("purge_expired", limit)
+        except Exception as e:
+            print(f"Error in purge_expired: {e}")
+            traceback.print_exc()
+            return 0
+    
+    async def flush(self) -> None:
+        """Commit any writes still pending in group commit mode."""
+        try:
+            await self._run("flush")
+        except Exception as e:
+            print(f"Error in flush: {e}")
+            traceback.print_exc()
+    
+    async def aclose(self) -> None:
+        """Close all pooled connections and shut down the worker threads."""
+        if self._closed:
+            return
+        self._closed = True
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._shutdown)
+    
+    def _shutdown(self) -> None:
+        """Wait for in-flight operations, then close every backend."""
+        self._executor.shutdown(wait=True)
+        if self.writer is not None:
+            self.writer.close()
+        with self._lock:
+            backends, self._thread_backends = self._thread_backends, []
+        for backend in backends + [self.backend]:
+            try:
+                backend.close()
+            except Exception as e:
+                print(f"Error closing backend: {e}")
+    
+    def _get_thread_backend(self) -> BasicStorageBackend:
+        """Return this worker thread's SQLite backend, opening it on first use."""
+        backend = getattr(self._thread_local, "backend", None)
+        if backend is None:
+            backend = SQLiteStorageBackend(self.app_namespace, **self.backend_options)
+            self._thread_local.backend = backend
+            with self._lock:
+                self._thread_backends.append(backend)
+        return backend
+    
+    def _call(self, operation: str, *args) -> Any:
+        """Call operation on the backend owned by the current worker thread, letting errors propagate."""
+        # SQLite connections can't cross threads, so each worker keeps its own
+        if self.pooled:
+            return getattr(self._get_thread_backend(), operation)(*args)
+        with self._lock:
+            return getattr(self.backend, operation)(*args)
+    
     def _execute_operation(self, operation: str, *args) -> Any:
-        """Execute operation in a thread-safe manner by recreating backend if needed."""
-        try:
-            # For SQLite, we need to create a new connection in each thread
-            if self.backend_type == "SQLiteStorageBackend":
-                backend = SQLiteStorageBackend(self.app_namespace)
-            elif self.backend_type == "JSONStorageBackend":
-                backend = JSONStorageBackend(self.app_namespace)
-            elif self.backend_type == "TextStorageBackend":
-                backend = TextStorageBackend(self.app_namespace)
-            else:
-                backend = BasicStorageBackend(self.app_namespace)
-            
-            # Execute the requested operation
-            if operation == "get_item":
-                return backend.get_item(*args)
-            elif operation == "set_item":
-                return backend.set_item(*args)
-            elif operation == "remove_item":
-                return backend.remove_item(*args)
-            elif operation == "get_all":
-                return backend.get_all()
-            elif operation == "get_many":
-                return backend.get_many(*args)
-            elif operation == "remove_all":
-                return backend.remove_all()
-            elif operation == "clear":
-                return backend.clear()
-        except Exception as e:
-            print(f"Error in _execute_operation ({operation}): {e}")
-            traceback.print_exc()
-            if operation == "get_item":
-                return None
-            elif operation in ("get_all", "get_many"):
-                return {}
+        """Execute operation on the backend owned by the current worker thread."""
+        try:
+            return self._call(operation, *args)
+        except Exception as e:
+            return self._failed(operation, e)
+    
+    @staticmethod
+    def _failed(operation: str, e: Exception) -> Any:
+        """Report a failed operation and return its empty result; call from an except block."""
+        print(f"Error in _execute_operation ({operation}): {e}")
+        traceback.print_exc()
+        if operation == "get_item":
             return None
+        elif operation in ("get_all", "get_many", "get_range", "get_by_prefix"):
+            return {}
+        elif operation == "purge_expired":
+            return 0
+        return None
 
 
 class AsyncLocalStoragePro:
     """Async version of localStoragePro."""
     
-    def __init__(self, app_namespace: str, storage_backend: str = "sqlite") -> None:
+    def __init__(self, app_namespace: str, storage_backend: str = "sqlite", max_workers: Optional[int] = None,
+                 coalesce_reads: bool = True, coalesce_window_ms: float = 0,
+                 metrics: Union[bool, StorageMetrics, None] = None, **backend_options: Any) -> None:
         """Initialize AsyncLocalStoragePro with the specified namespace and backend."""
         try:
-            backend = BasicStorageBackend(app_namespace)
-            if storage_backend == "text":
-                backend = TextStorageBackend(app_namespace)
-            elif storage_backend == "sqlite":
-                backend = SQLiteStorageBackend(app_namespace)
-            elif storage_backend == "json":
-                backend = JSONStorageBackend(app_namespace)
-            else:
-                backend = SQLiteStorageBackend(app_namespace)
+            backend = create_storage_backend(app_namespace, storage_backend, **backend_options)
             
-            self.storage_backend_instance = AsyncStorageBackend(backend, app_namespace)
+            self.metrics: Optional[StorageMetrics] = None
+            if metrics:
+                self.metrics = metrics if isinstance(metrics, StorageMetrics) else StorageMetrics()
+            self.storage_backend_instance = AsyncStorageBackend(backend, app_namespace, max_workers, backend_options,
+                                                                coalesce_reads, coalesce_window_ms, self.metrics,
+                                                                storage_backend)
+            self.expiry_sweeper: Optional[ExpirySweeper] = None
             self.app_namespace = app_namespace
             self.storage_backend = storage_backend
+            self.backend_options = backend_options
         except Exception as e:
             print(f"Error in AsyncLocalStoragePro.__init__: {e}")
             traceback.print_exc()
@@ -145,10 +467,10 @@ class AsyncLocalStoragePro:
             traceback.print_exc()
             return None
     
-    async def setItem(self, item: str, value: Any) -> None:
-        """Store a value with the given key asynchronously."""
+    async def setItem(self, item: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value with the given key asynchronously, expiring after ttl seconds if given."""
         try:
-            await self.storage_backend_instance.set_item(item, value)
+            await self.storage_backend_instance.set_item(item, value, ttl)
         except Exception as e:
             print(f"Error in setItem: {e}")
             traceback.print_exc()
@@ -161,6 +483,22 @@ class AsyncLocalStoragePro:
             print(f"Error in removeItem: {e}")
             traceback.print_exc()
     
+    async def setMany(self, items: dict, ttl: Optional[float] = None) -> None:
+        """Store multiple key-value pairs asynchronously in a single write, expiring after ttl seconds if given."""
+        try:
+            await self.storage_backend_instance.set_many(items, ttl)
+        except Exception as e:
+            print(f"Error in setMany: {e}")
+            traceback.print_exc()
+    
+    async def removeMany(self, items: list) -> None:
+        """Remove multiple keys asynchronously in a single write."""
+        try:
+            await self.storage_backend_instance.remove_many(items)
+        except Exception as e:
+            print(f"Error in removeMany: {e}")
+            traceback.print_exc()
+    
     async def getAll(self) -> dict:
         """Retrieve all stored key-value pairs asynchronously."""
         try:
@@ -179,6 +517,41 @@ class AsyncLocalStoragePro:
             traceback.print_exc()
             return {}
     
+    async def page(self, after_key: Optional[str] = None, limit: int = 100) -> List[Tuple[str, Any]]:
+        """Return up to limit (key, value) pairs with keys after after_key, in key order."""
+        try:
+            return await self.storage_backend_instance.page(after_key, limit)
+        except Exception as e:
+            print(f"Error in page: {e}")
+            traceback.print_exc()
+            return []
+    
+    async def getByPrefix(self, prefix: str) -> dict:
+        """Retrieve all key-value pairs whose keys start with prefix asynchronously, in key order."""
+        try:
+            return await self.storage_backend_instance.get_by_prefix(prefix)
+        except Exception as e:
+            print(f"Error in getByPrefix: {e}")
+            traceback.print_exc()
+            return {}
+    
+    async def getRange(self, start: Optional[str] = None, end: Optional[str] = None) -> dict:
+        """Retrieve all key-value pairs with start <= key < end asynchronously, in key order."""
+        try:
+            return await self.storage_backend_instance.get_range(start, end)
+        except Exception as e:
+            print(f"Error in getRange: {e}")
+            traceback.print_exc()
+            return {}
+    
+    def iterItems(self, batch_size: int = 1000) -> AsyncIterator[Tuple[str, Any]]:
+        """Iterate over all key-value pairs asynchronously, batch_size at a time."""
+        return self.storage_backend_instance.iter_items(batch_size)
+    
+    def iterKeys(self, batch_size: int = 1000) -> AsyncIterator[str]:
+        """Iterate over all keys asynchronously, batch_size at a time."""
+        return self.storage_backend_instance.iter_keys(batch_size)
+    
     async def removeAll(self) -> None:
         """Remove all stored key-value pairs asynchronously."""
         try:
@@ -194,18 +567,79 @@ class AsyncLocalStoragePro:
         except Exception as e:
             print(f"Error in clear: {e}")
             traceback.print_exc()
+    
+    async def purgeExpired(self, limit: Optional[int] = None) -> int:
+        """Delete up to limit expired keys (all of them by default) asynchronously, returning how many were deleted."""
+        try:
+            return await self.storage_backend_instance.purge_expired(limit)
+        except Exception as e:
+            print(f"Error in purgeExpired: {e}")
+            traceback.print_exc()
+            return 0
+    
+    async def startExpirySweeper(self, interval: float = 60.0, batch_size: int = 500) -> None:
+        """Delete expired keys every interval seconds in batches of batch_size, as a task on the running loop."""
+        try:
+            await self.stopExpirySweeper()
+            self.expiry_sweeper = ExpirySweeper(self.storage_backend_instance.purge_expired, interval, batch_size)
+            self.expiry_sweeper.start()
+        except Exception as e:
+            print(f"Error in startExpirySweeper: {e}")
+            traceback.print_exc()
+    
+    async def stopExpirySweeper(self) -> None:
+        """Stop the expiry sweeper task, if one is running."""
+        if self.expiry_sweeper is not None:
+            self.expiry_sweeper.stop()
+            self.expiry_sweeper = None
+    
+    async def flush(self) -> None:
+        """Commit any writes still pending in group commit mode."""
+        try:
+            await self.storage_backend_instance.flush()
+        except Exception as e:
+            print(f"Error in flush: {e}")
+            traceback.print_exc()
+    
+    def metricsStats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Return per-backend, per-operation counters and latency histograms (empty without metrics)."""
+        if self.metrics is not None:
+            return self.metrics.stats()
+        return {}
+    
+    async def aclose(self) -> None:
+        """Close pooled connections and stop the worker threads."""
+        try:
+            await self.stopExpirySweeper()
+            await self.storage_backend_instance.aclose()
+        except Exception as e:
+            print(f"Error in aclose: {e}")
+            traceback.print_exc()
 
 
 class AsyncLocalStorageProSingleton:
-    """Singleton-like class for AsyncLocalStoragePro."""
+    """
+    Singleton-like class for AsyncLocalStoragePro.
+
+    Keeps the same registry of open stores as ``lsp``: each call returns the
+    store registered for the namespace, backend and options, reusing its
+    worker threads and pooled connections. A store replaced by one with
+    different options is closed in the background on the running loop;
+    ``evict()`` and ``closeAll()`` close stores and wait for them.
+    """
     
     def __init__(self):
         self._instance = None
         self._namespace = None
         self._backend = None
+        self._instances: Dict[Tuple[str, str], Tuple[Tuple[Any, ...], AsyncLocalStoragePro]] = {}
+        self._lock = threading.Lock()
+        # Keeps background close tasks referenced until they finish
+        self._closing: Set["asyncio.Task[None]"] = set()
     
-    def __call__(self, app_namespace: str = None, storage_backend: str = None):
-        """Create or update the instance with the given namespace and backend."""
+    def __call__(self, app_namespace: str = None, storage_backend: str = None,
+                 **options: Any) -> Optional[AsyncLocalStoragePro]:
+        """Return the registered store for the namespace, backend and options (None if it can't be opened)."""
         try:
             if app_namespace is not None:
                 self._namespace = app_namespace
@@ -216,12 +650,65 @@ class AsyncLocalStorageProSingleton:
                 raise ValueError("No namespace provided for AsyncLocalStoragePro")
             
             backend = self._backend or "sqlite"
-            self._instance = AsyncLocalStoragePro(self._namespace, backend)
-            return self
+            self._instance = self._open(self._namespace, backend, options)
+            return self._instance
         except Exception as e:
             print(f"Error in AsyncLocalStorageProSingleton.__call__: {e}")
             traceback.print_exc()
-            return self
+            return None
+    
+    def _open(self, app_namespace: str, storage_backend: str, options: Dict[str, Any]) -> AsyncLocalStoragePro:
+        key = options_key(options)
+        replaced = None
+        with self._lock:
+            entry = self._instances.get((app_namespace, storage_backend))
+            if entry is not None and (not options or entry[0] == key):
+                return entry[1]
+            if entry is not None:
+                replaced = entry[1]
+            instance = AsyncLocalStoragePro(app_namespace, storage_backend, **options)
+            self._instances[(app_namespace, storage_backend)] = (key, instance)
+        if replaced is not None:
+            self._close_later(replaced)
+        return instance
+    
+    def _close_later(self, instance: AsyncLocalStoragePro) -> None:
+        """Close a replaced store without making the synchronous caller wait."""
+        loop = running_event_loop()
+        if loop is None:
+            asyncio.run(instance.aclose())
+            return
+        task = loop.create_task(instance.aclose())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+    
+    def instances(self) -> List[AsyncLocalStoragePro]:
+        """Return every store currently registered."""
+        with self._lock:
+            return [instance for _, instance in self._instances.values()]
+    
+    async def evict(self, app_namespace: str, storage_backend: Optional[str] = None) -> int:
+        """Close and unregister the stores of a namespace (on every backend by default), returning how many."""
+        with self._lock:
+            keys = [key for key in self._instances
+                    if key[0] == app_namespace and storage_backend in (None, key[1])]
+            evicted = [self._instances.pop(key)[1] for key in keys]
+            if self._instance in evicted:
+                self._instance = None
+        for instance in evicted:
+            await instance.aclose()
+        return len(evicted)
+    
+    async def closeAll(self) -> None:
+        """Close and unregister every store, including replaced ones still closing."""
+        with self._lock:
+            evicted = [instance for _, instance in self._instances.values()]
+            self._instances = {}
+            self._instance = None
+        for instance in evicted:
+            await instance.aclose()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
     
     async def getItem(self, item: str) -> Any:
         """Retrieve a value by its key asynchronously."""
@@ -233,11 +720,11 @@ class AsyncLocalStorageProSingleton:
             traceback.print_exc()
             return None
     
-    async def setItem(self, item: str, value: Any) -> None:
-        """Store a value with the given key asynchronously."""
+    async def setItem(self, item: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value with the given key asynchronously, expiring after ttl seconds if given."""
         try:
             self._ensure_initialized()
-            await self._instance.setItem(item, value)
+            await self._instance.setItem(item, value, ttl)
         except Exception as e:
             print(f"Error in async_lsp.setItem: {e}")
             traceback.print_exc()
@@ -251,6 +738,24 @@ class AsyncLocalStorageProSingleton:
             print(f"Error in async_lsp.removeItem: {e}")
             traceback.print_exc()
     
+    async def setMany(self, items: dict, ttl: Optional[float] = None) -> None:
+        """Store multiple key-value pairs asynchronously in a single write, expiring after ttl seconds if given."""
+        try:
+            self._ensure_initialized()
+            await self._instance.setMany(items, ttl)
+        except Exception as e:
+            print(f"Error in async_lsp.setMany: {e}")
+            traceback.print_exc()
+    
+    async def removeMany(self, items: list) -> None:
+        """Remove multiple keys asynchronously in a single write."""
+        try:
+            self._ensure_initialized()
+            await self._instance.removeMany(items)
+        except Exception as e:
+            print(f"Error in async_lsp.removeMany: {e}")
+            traceback.print_exc()
+    
     async def getAll(self) -> dict:
         """Retrieve all stored key-value pairs asynchronously."""
         try:
@@ -271,6 +776,46 @@ class AsyncLocalStorageProSingleton:
             traceback.print_exc()
             return {}
     
+    async def page(self, after_key: Optional[str] = None, limit: int = 100) -> List[Tuple[str, Any]]:
+        """Return up to limit (key, value) pairs with keys after after_key, in key order."""
+        try:
+            self._ensure_initialized()
+            return await self._instance.page(after_key, limit)
+        except Exception as e:
+            print(f"Error in async_lsp.page: {e}")
+            traceback.print_exc()
+            return []
+    
+    async def getByPrefix(self, prefix: str) -> dict:
+        """Retrieve all key-value pairs whose keys start with prefix asynchronously, in key order."""
+        try:
+            self._ensure_initialized()
+            return await self._instance.getByPrefix(prefix)
+        except Exception as e:
+            print(f"Error in async_lsp.getByPrefix: {e}")
+            traceback.print_exc()
+            return {}
+    
+    async def getRange(self, start: Optional[str] = None, end: Optional[str] = None) -> dict:
+        """Retrieve all key-value pairs with start <= key < end asynchronously, in key order."""
+        try:
+            self._ensure_initialized()
+            return await self._instance.getRange(start, end)
+        except Exception as e:
+            print(f"Error in async_lsp.getRange: {e}")
+            traceback.print_exc()
+            return {}
+    
+    def iterItems(self, batch_size: int = 1000) -> AsyncIterator[Tuple[str, Any]]:
+        """Iterate over all key-value pairs asynchronously, batch_size at a time."""
+        self._ensure_initialized()
+        return self._instance.iterItems(batch_size)
+    
+    def iterKeys(self, batch_size: int = 1000) -> AsyncIterator[str]:
+        """Iterate over all keys asynchronously, batch_size at a time."""
+        self._ensure_initialized()
+        return self._instance.iterKeys(batch_size)
+    
     async def removeAll(self) -> None:
         """Remove all stored key-value pairs asynchronously."""
         try:
@@ -290,9 +835,11 @@ class AsyncLocalStorageProSingleton:
             traceback.print_exc()
     
     def _ensure_initialized(self):
-        """Ensure the instance is initialized."""
+        """Ensure the instance is initialized, reopening it after an eviction."""
         if self._instance is None:
-            raise ValueError("AsyncLocalStoragePro not initialized. Call async_lsp('namespace') first.")
+            if self._namespace is None:
+                raise ValueError("AsyncLocalStoragePro not initialized. Call async_lsp('namespace') first.")
+            self()
 
 
 # Create a singleton instance
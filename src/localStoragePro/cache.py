@@ -0,0 +1,224 @@
+"""Read-through in-process cache for storage backends."""
+
+import sys
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .storage_backends import BasicStorageBackend, StorageBackendWrapper, localStoragePyStorageException
+
+# Marks a cached "key does not exist" answer
+_MISSING = object()
+
+
+class CachedStorageBackend(StorageBackendWrapper):
+    """
+    Bounded LRU cache in front of any storage backend.
+
+    Reads are served from memory when possible and fall through to the wrapped
+    backend otherwise; missing keys are cached too unless ``negative_cache`` is
+    off. Writes go straight to the backend and drop the affected keys from the
+    cache. The cache is bounded both by entry count and by the approximate size
+    of the cached keys and values, evicting the least recently used entries,
+    and entries optionally expire ``ttl`` seconds after they were cached.
+    Values of keys stored with their own ttl never outlive that key's
+    deadline, which is looked up from the backend on each miss.
+
+    With ``coherent`` on (the default), every read first asks the backend for
+    its ``data_version()``, a cheap check that changes when another connection
+    or process writes, and drops the whole cache when it moved.
+    """
+
+    def __init__(self, backend: BasicStorageBackend, max_entries: int = 1024, max_bytes: Optional[int] = 16 * 1024 * 1024,
+                 ttl: Optional[float] = None, negative_cache: bool = True, coherent: bool = True) -> None:
+        if max_entries < 1:
+            raise localStoragePyStorageException("max_entries must be at least 1!")
+        if ttl is not None and ttl <= 0:
+            raise localStoragePyStorageException("ttl must be positive!")
+        super().__init__(backend)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.negative_cache = negative_cache
+        self.coherent = coherent
+        self.seen_data_version = backend.data_version() if coherent else None
+        # key -> (value or _MISSING, size, expires_at or None)
+        self.entries: "OrderedDict[str, Tuple[Any, int, Optional[float]]]" = OrderedDict()
+        self.current_bytes = 0
+        # Bumped by every invalidation, so a read racing a write never caches the old value
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.external_invalidations = 0
+
+    @staticmethod
+    def entry_size(key: str, value: Any) -> int:
+        if value is _MISSING or value is None:
+            return len(key)
+        if isinstance(value, (str, bytes, bytearray, memoryview)):
+            return len(key) + len(value)
+        return len(key) + sys.getsizeof(value)
+
+    def lookup(self, key: str) -> Any:
+        # Returns the cached value, _MISSING for a cached miss, or None when not cached
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, size, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.discard(key)
+            self.expirations += 1
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def store(self, key: str, value: Any, deadline: Optional[float] = None) -> None:
+        # deadline is the key's own time.time() expiry, if it was stored with a ttl
+        if value is None:
+            if not self.negative_cache:
+                return
+            value = _MISSING
+        size = self.entry_size(key, value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        self.discard(key)
+        now = time.monotonic()
+        expires_at = now + self.ttl if self.ttl is not None else None
+        if deadline is not None:
+            key_expires_at = now + (deadline - time.time())
+            expires_at = key_expires_at if expires_at is None else min(expires_at, key_expires_at)
+        self.entries[key] = (value, size, expires_at)
+        self.current_bytes += size
+        while len(self.entries) > self.max_entries or (self.max_bytes is not None and self.current_bytes > self.max_bytes):
+            _, (_, evicted_size, _) = self.entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+
+    def discard(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+    def invalidate(self, keys: Optional[List[str]] = None) -> None:
+        with self.lock:
+            self.generation += 1
+            if keys is None:
+                self.entries.clear()
+                self.current_bytes = 0
+                return
+            for key in keys:
+                self.discard(key)
+
+    def revalidate(self) -> None:
+        if not self.coherent:
+            return
+        data_version = self.backend.data_version()
+        if data_version == self.seen_data_version:
+            return
+        self.invalidate()
+        with self.lock:
+            self.seen_data_version = data_version
+            self.external_invalidations += 1
+
+    def get_item(self, item: str) -> Optional[str]:
+        self.revalidate()
+        with self.lock:
+            cached = self.lookup(item)
+            if cached is _MISSING:
+                self.negative_hits += 1
+                return None
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+            generation = self.generation
+        value = self.backend.get_item(item)
+        deadlines = self.backend.get_expiries([item]) if value is not None else {}
+        with self.lock:
+            if generation == self.generation:
+                self.store(item, value, deadlines.get(item))
+        return value
+
+    def get_many(self, items: List[str]) -> Dict[str, str]:
+        self.revalidate()
+        result = {}
+        missing = []
+        with self.lock:
+            for key in items:
+                cached = self.lookup(key)
+                if cached is _MISSING:
+                    self.negative_hits += 1
+                elif cached is not None:
+                    self.hits += 1
+                    result[key] = cached
+                else:
+                    self.misses += 1
+                    missing.append(key)
+            generation = self.generation
+        if missing:
+            fetched = self.backend.get_many(missing)
+            deadlines = self.backend.get_expiries(list(fetched)) if fetched else {}
+            with self.lock:
+                if generation == self.generation:
+                    for key in missing:
+                        self.store(key, fetched.get(key), deadlines.get(key))
+            result.update(fetched)
+        return result
+
+    def set_item(self, item: str, value: Any, ttl: Optional[float] = None) -> None:
+        try:
+            self.backend.set_item(item, value, ttl)
+        finally:
+            self.invalidate([item])
+
+    def remove_item(self, item: str) -> None:
+        try:
+            self.backend.remove_item(item)
+        finally:
+            self.invalidate([item])
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        try:
+            self.backend.set_many(items, ttl)
+        finally:
+            self.invalidate(list(items))
+
+    def remove_many(self, items: List[str]) -> None:
+        try:
+            self.backend.remove_many(items)
+        finally:
+            self.invalidate(list(items))
+
+    def remove_all(self) -> None:
+        try:
+            self.backend.remove_all()
+        finally:
+            self.invalidate()
+
+    def clear(self) -> None:
+        try:
+            self.backend.clear()
+        finally:
+            self.invalidate()
+
+    def close(self) -> None:
+        self.invalidate()
+        self.backend.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "external_invalidations": self.external_invalidations,
+                "entries": len(self.entries),
+                "bytes": self.current_bytes,
+            }
@@ -0,0 +1,134 @@
+"""Transparent per-value compression for storage backends."""
+
+import time
+import threading
+import importlib
+from typing import Any, Dict, Optional, Tuple, Union
+
+from .storage_backends import BasicStorageBackend, EncodingStorageBackendWrapper, coerce_value, localStoragePyStorageException
+
+# Compressed values start with MAGIC, then one byte naming the algorithm and
+# one byte recording whether the original value was bytes or str
+MAGIC = b"\x1bLSC"
+HEADER_SIZE = len(MAGIC) + 2
+
+_ALGORITHMS: Dict[str, Tuple[int, str]] = {
+    "none": (0, ""),
+    "zlib": (1, "zlib"),
+    "lzma": (2, "lzma"),
+    "bz2": (3, "bz2"),
+}
+_ALGORITHM_NAMES = {algorithm_id: name for name, (algorithm_id, _) in _ALGORITHMS.items()}
+_TYPE_BYTES = 0
+_TYPE_STR = 1
+
+
+def _load_module(algorithm: str) -> Any:
+    module_name = _ALGORITHMS[algorithm][1]
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        raise localStoragePyStorageException(f"Compression algorithm '{algorithm}' is not available in this Python build!")
+
+
+class CompressedStorageBackend(EncodingStorageBackendWrapper):
+    """
+    Compresses values larger than ``threshold`` bytes with zlib, lzma or bz2.
+
+    Compressed values carry a small header naming the algorithm, so stores
+    with a mix of compressed, uncompressed and differently compressed values
+    read back correctly. Values that don't shrink are stored as they are.
+    Compression counters and CPU time are reported by ``stats()``.
+    """
+
+    def __init__(self, backend: BasicStorageBackend, algorithm: str = "zlib", threshold: int = 1024,
+                 level: Optional[int] = None, decode_text: bool = True) -> None:
+        if algorithm not in _ALGORITHMS or algorithm == "none":
+            raise localStoragePyStorageException(f"Unknown compression algorithm '{algorithm}'!")
+        if threshold < 0:
+            raise localStoragePyStorageException("threshold can't be negative!")
+        super().__init__(backend)
+        self.algorithm = algorithm
+        self.algorithm_id = _ALGORITHMS[algorithm][0]
+        self.module = _load_module(algorithm)
+        self.threshold = threshold
+        self.level = level
+        # Without a codec every value started out as text, so headerless bytes are UTF-8 text
+        self.decode_text = decode_text
+        self.lock = threading.Lock()
+        self.compressed_values = 0
+        self.stored_uncompressed = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+        self.compress_seconds = 0.0
+        self.decompressed_values = 0
+        self.decompress_seconds = 0.0
+
+    def compress(self, data: bytes) -> bytes:
+        if self.level is None:
+            return self.module.compress(data)
+        if self.algorithm == "lzma":
+            return self.module.compress(data, preset=self.level)
+        return self.module.compress(data, self.level)
+
+    def encode(self, value: Any) -> Union[str, bytes]:
+        value = coerce_value(value)
+        is_str = isinstance(value, str)
+        raw = value.encode("utf-8") if is_str else value
+        value_type = _TYPE_STR if is_str else _TYPE_BYTES
+        if len(raw) >= self.threshold:
+            start = time.perf_counter()
+            compressed = self.compress(raw)
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.compress_seconds += elapsed
+                if len(compressed) + HEADER_SIZE < len(raw):
+                    self.compressed_values += 1
+                    self.bytes_before += len(raw)
+                    self.bytes_after += len(compressed) + HEADER_SIZE
+                    return MAGIC + bytes((self.algorithm_id, value_type)) + compressed
+        with self.lock:
+            self.stored_uncompressed += 1
+        if raw.startswith(MAGIC):
+            # Escape values that happen to look like a header; text too, since binary
+            # backends hand str values back as their UTF-8 bytes
+            return MAGIC + bytes((_ALGORITHMS["none"][0], value_type)) + raw
+        return value
+
+    def decode(self, value: Any) -> Any:
+        if not isinstance(value, bytes):
+            return value
+        if not value.startswith(MAGIC) or len(value) < HEADER_SIZE:
+            if self.decode_text:
+                try:
+                    return value.decode("utf-8")
+                except UnicodeDecodeError:
+                    return value
+            return value
+        algorithm_id, value_type = value[len(MAGIC)], value[len(MAGIC) + 1]
+        if algorithm_id not in _ALGORITHM_NAMES:
+            raise localStoragePyStorageException(f"Unknown compression header {algorithm_id}!")
+        payload = value[HEADER_SIZE:]
+        if algorithm_id != 0:
+            module = self.module if algorithm_id == self.algorithm_id else _load_module(_ALGORITHM_NAMES[algorithm_id])
+            start = time.perf_counter()
+            payload = module.decompress(payload)
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.decompressed_values += 1
+                self.decompress_seconds += elapsed
+        return payload.decode("utf-8") if value_type == _TYPE_STR else payload
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "algorithm": self.algorithm,
+                "compressed_values": self.compressed_values,
+                "stored_uncompressed": self.stored_uncompressed,
+                "bytes_before": self.bytes_before,
+                "bytes_after": self.bytes_after,
+                "ratio": self.bytes_after / self.bytes_before if self.bytes_before else 1.0,
+                "compress_seconds": self.compress_seconds,
+                "decompressed_values": self.decompressed_values,
+                "decompress_seconds": self.decompress_seconds,
+            }
@@ -0,0 +1,220 @@
+"""Storage backend on the standard library's dbm hash files."""
+
+import os
+import time
+import heapq
+import importlib
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .storage_backends import (
+    BasicStorageBackend,
+    ExpiryHeap,
+    SortedKeyIndex,
+    coerce_value,
+    expiry_time,
+    localStoragePyStorageException,
+    synchronized,
+)
+
+# Tried in this order when no implementation is asked for
+DBM_IMPLEMENTATIONS = ("gnu", "ndbm", "dumb")
+
+# First byte of every stored value, dbm itself only knows bytes
+_TYPE_STR = b"s"
+_TYPE_BYTES = b"b"
+
+
+def resolve_dbm_module(implementation: Optional[str] = None) -> Any:
+    """Import dbm.<implementation>, or the first available of gnu, ndbm and dumb."""
+    if implementation is not None and implementation not in DBM_IMPLEMENTATIONS:
+        raise localStoragePyStorageException(
+            f"Unknown dbm implementation '{implementation}', use one of {', '.join(DBM_IMPLEMENTATIONS)}!")
+    for name in (implementation,) if implementation is not None else DBM_IMPLEMENTATIONS:
+        try:
+            return importlib.import_module(f"dbm.{name}")
+        except ImportError:
+            continue
+    raise localStoragePyStorageException(f"dbm.{implementation} is not available in this Python build!")
+
+
+class DBMStorageBackend(BasicStorageBackend):
+    """
+    Hash file storage on ``dbm.gnu``, ``dbm.ndbm`` or, where neither was
+    compiled in, the pure Python ``dbm.dumb``.
+
+    Lookups are a single hash probe with no SQL to parse, which suits plain
+    string-to-string workloads. dbm keeps no order, so range scans use a
+    sorted index of the keys, built on first use and kept in step with this
+    instance's writes.
+
+    Values are stored with a one byte type tag so that ``str`` and ``bytes``
+    read back as written. Deadlines of keys stored with a ttl live in a second
+    dbm file next to the data and are loaded into memory on open.
+
+    ``implementation`` picks 'gnu', 'ndbm' or 'dumb' explicitly. With
+    ``sync=True`` dbm.gnu writes through to disk on every change; otherwise
+    ``flush()`` and ``close()`` sync.
+    """
+
+    def __init__(self, app_namespace: str, implementation: Optional[str] = None, sync: bool = False) -> None:
+        super().__init__(app_namespace)
+        self.dbm_module = resolve_dbm_module(implementation)
+        self.implementation = self.dbm_module.__name__.rsplit(".", 1)[-1]
+        self.sync = sync
+        self.db_path = os.path.join(self.app_storage_path, "localStorageDBM")
+        self.expiry_db_path = os.path.join(self.app_storage_path, "localStorageDBM.expiry")
+        self.lock = threading.RLock()
+        self.key_index: Optional[SortedKeyIndex] = None
+        self.expiry = ExpiryHeap()
+        self.open("c")
+
+    def open(self, flag: str) -> None:
+        # dbm.gnu takes an extra flag for synchronous writes
+        if self.implementation == "gnu" and self.sync:
+            flag += "s"
+        self.db = self.dbm_module.open(self.db_path, flag)
+        self.expiry_db = self.dbm_module.open(self.expiry_db_path, flag)
+        for key in self.expiry_db.keys():
+            self.expiry.set(key.decode("utf-8"), float(self.expiry_db[key]))
+
+    @staticmethod
+    def encode_value(value: Any) -> bytes:
+        value = coerce_value(value)
+        if isinstance(value, str):
+            return _TYPE_STR + value.encode("utf-8")
+        return _TYPE_BYTES + value
+
+    @staticmethod
+    def decode_value(raw: Optional[bytes]) -> Optional[Union[str, bytes]]:
+        if raw is None:
+            return None
+        if raw[:1] == _TYPE_STR:
+            return raw[1:].decode("utf-8")
+        return raw[1:]
+
+    def read(self, key: str, now: float) -> Optional[Union[str, bytes]]:
+        if self.expiry and self.expiry.is_expired(key, now):
+            return None
+        return self.decode_value(self.db.get(key.encode("utf-8")))
+
+    @synchronized
+    def get_item(self, item: str) -> Optional[Union[str, bytes]]:
+        return self.read(item, time.time())
+
+    @synchronized
+    def get_many(self, items: List[str]) -> Dict[str, Union[str, bytes]]:
+        now = time.time()
+        result = {}
+        for key in items:
+            value = self.read(key, now)
+            if value is not None:
+                result[key] = value
+        return result
+
+    @synchronized
+    def current_keys(self) -> List[str]:
+        return self.live_keys(key.decode("utf-8") for key in self.db.keys())
+
+    @synchronized
+    def get_all(self) -> Dict[str, Union[str, bytes]]:
+        return {key: self.decode_value(self.db[key.encode("utf-8")]) for key in self.current_keys()}
+
+    def iter_keys(self) -> Iterator[str]:
+        return iter(self.current_keys())
+
+    def iter_items(self) -> Iterator[Tuple[str, Union[str, bytes]]]:
+        for key in self.current_keys():
+            value = self.get_item(key)
+            if value is not None:
+                yield key, value
+
+    @synchronized
+    def page(self, after_key: Optional[str] = None, limit: int = 100) -> List[Tuple[str, Union[str, bytes]]]:
+        candidates = (key for key in self.current_keys() if after_key is None or key > after_key)
+        return list(self.get_many(heapq.nsmallest(limit, candidates)).items())
+
+    @synchronized
+    def get_range(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Union[str, bytes]]:
+        if self.key_index is None:
+            self.key_index = SortedKeyIndex(key.decode("utf-8") for key in self.db.keys())
+        return self.get_many(self.key_index.range(start, end))
+
+    def set_expiry(self, item: str, expires_at: Optional[float]) -> None:
+        if expires_at is not None:
+            self.expiry_db[item.encode("utf-8")] = repr(expires_at)
+        elif item in self.expiry.deadlines:
+            del self.expiry_db[item.encode("utf-8")]
+        self.expiry.set(item, expires_at)
+
+    def delete(self, key: str) -> bool:
+        try:
+            del self.db[key.encode("utf-8")]
+        except KeyError:
+            return False
+        self.set_expiry(key, None)
+        if self.key_index is not None:
+            self.key_index.discard(key)
+        return True
+
+    @synchronized
+    def purge_expired(self, limit: Optional[int] = None) -> int:
+        expired = self.expiry.pop_expired(time.time(), limit)
+        for key in expired:
+            # Already dropped from the heap, so delete the stored deadline directly
+            try:
+                del self.expiry_db[key.encode("utf-8")]
+            except KeyError:
+                pass
+            self.delete(key)
+        return len(expired)
+
+    @synchronized
+    def set_item(self, item: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.set_many({item: value}, ttl)
+
+    @synchronized
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        expires_at = expiry_time(ttl)
+        for key, value in items.items():
+            self.db[key.encode("utf-8")] = self.encode_value(value)
+            self.set_expiry(key, expires_at)
+            if self.key_index is not None:
+                self.key_index.add(key)
+
+    @synchronized
+    def remove_item(self, item: str) -> None:
+        self.delete(item)
+
+    @synchronized
+    def remove_many(self, items: List[str]) -> None:
+        for key in items:
+            self.delete(key)
+
+    def remove_all(self) -> None:
+        self.clear()
+
+    @synchronized
+    def clear(self) -> None:
+        # Reopening with "n" truncates, which beats deleting keys one by one
+        self.db.close()
+        self.expiry_db.close()
+        self.expiry.clear()
+        self.key_index = None
+        self.open("n")
+
+    @synchronized
+    def flush(self) -> None:
+        for db in (self.db, self.expiry_db):
+            if hasattr(db, "sync"):
+                db.sync()
+
+    @synchronized
+    def close(self) -> None:
+        if self.db is None:
+            return
+        self.flush()
+        self.db.close()
+        self.expiry_db.close()
+        self.db = None
+        self.expiry_db = None
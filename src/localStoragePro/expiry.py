@@ -0,0 +1,101 @@
+"""Background deletion of expired keys."""
+
+import time
+import threading
+from typing import Any, Callable, Optional
+
+from .storage_backends import localStoragePyStorageException, running_event_loop
+
+
+class ExpirySweeper:
+    """
+    Periodically deletes expired keys through a ``purge(limit)`` callable.
+
+    Every ``interval`` seconds the sweeper purges up to ``batch_size`` keys at
+    a time, yielding between batches, until a batch comes back short. Each
+    batch holds the backend's lock for one bounded delete, so foreground reads
+    and writes only ever wait for a single batch.
+
+    Started inside a running asyncio loop it runs as a task on that loop,
+    awaiting ``purge`` when it is a coroutine function and running it in the
+    loop's default executor otherwise. Started anywhere else it runs on a
+    daemon thread.
+    """
+
+    def __init__(self, purge: Callable[[int], Any], interval: float = 60.0, batch_size: int = 500) -> None:
+        if interval <= 0:
+            raise localStoragePyStorageException("interval must be positive!")
+        if batch_size < 1:
+            raise localStoragePyStorageException("batch_size must be at least 1!")
+        self.purge = purge
+        self.interval = interval
+        self.batch_size = batch_size
+        self.purged = 0
+        self.thread: Optional[threading.Thread] = None
+        self.task: Optional[Any] = None
+        self.stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return (self.thread is not None and self.thread.is_alive()) or (self.task is not None and not self.task.done())
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.stopped.clear()
+        loop = running_event_loop()
+        if loop is not None:
+            self.task = loop.create_task(self.run_async())
+        else:
+            self.thread = threading.Thread(target=self.run, name="localStoragePro-expiry-sweeper", daemon=True)
+            self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self.thread is not None:
+            if self.thread is not threading.current_thread():
+                self.thread.join()
+            self.thread = None
+
+    def sweep(self) -> int:
+        """Purge expired keys batch by batch until none are left."""
+        total = 0
+        while not self.stopped.is_set():
+            purged = self.purge(self.batch_size)
+            total += purged
+            if purged < self.batch_size:
+                break
+            # Let foreground threads at the backend between batches
+            time.sleep(0)
+        self.purged += total
+        return total
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error in expiry sweeper: {e}")
+
+    async def run_async(self) -> None:
+        import asyncio
+        loop = asyncio.get_running_loop()
+        is_async = asyncio.iscoroutinefunction(self.purge)
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                while True:
+                    if is_async:
+                        purged = await self.purge(self.batch_size)
+                    else:
+                        purged = await loop.run_in_executor(None, self.purge, self.batch_size)
+                    self.purged += purged
+                    if purged < self.batch_size:
+                        break
+                    # Let foreground work run between batches
+                    await asyncio.sleep(0)
+            except Exception as e:
+                print(f"Error in expiry sweeper: {e}")
@@ -0,0 +1,472 @@
+"""JSON file storage backend."""
+
+import os
+import json
+import time
+import heapq
+import atexit
+import base64
+import weakref
+import tempfile
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .storage_backends import (
+    BasicStorageBackend,
+    ExpiryHeap,
+    SortedKeyIndex,
+    coerce_value,
+    expiry_time,
+    localStoragePyStorageException,
+    running_event_loop,
+    synchronized,
+)
+
+def _json_default(value: Any) -> Any:
+    # JSON has no bytes type, so binary values are stored as {"b64": "..."}
+    if isinstance(value, bytes):
+        return {"b64": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _from_json_value(value: Any) -> Union[str, bytes]:
+    if isinstance(value, dict):
+        return base64.b64decode(value["b64"])
+    return value
+
+
+# JSON backends with a debounced flush still pending, written out at interpreter exit
+_dirty_json_backends: "weakref.WeakSet[JSONStorageBackend]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_dirty_json_backends() -> None:
+    for backend in list(_dirty_json_backends):
+        try:
+            backend.flush()
+        except Exception:
+            pass
+
+
+class JSONStorageBackend(BasicStorageBackend):
+    """
+    JSON file backed storage.
+
+    By default every change rewrites ``localStorageJSON.json``. With
+    ``journal=True`` changes are instead appended, one JSON object per line,
+    to ``localStorageJSON.journal`` and replayed on load. Once the journal
+    grows past ``journal_compact_ratio`` times the size of the main file (and
+    at least ``journal_compact_min_bytes``), it is folded back into the main
+    file by a background thread.
+
+    Without the journal, ``flush_delay_ms`` debounces the rewrites: changes made
+    within that window after the first unflushed one are written out together,
+    from the running asyncio loop's executor when there is one and from a timer
+    thread otherwise. ``flush()`` and ``close()`` write out pending changes
+    immediately. The main file is always replaced atomically.
+
+    Writes by other processes are noticed by ``refresh()``, which compares the
+    files' mtime, size and inode with what this instance last saw and reloads
+    only when they differ. ``auto_refresh=True`` runs it before every read.
+
+    Range and prefix scans use a sorted index of the keys, built on first use
+    and kept up to date by every write until the data is reloaded or cleared.
+
+    Keys stored with a ttl are written as ``{"value": ..., "expires_at": ...}``
+    and tracked in memory by an ``ExpiryHeap``.
+    """
+
+    def __init__(self, app_namespace: str, journal: bool = False, journal_compact_ratio: float = 1.0,
+                 journal_compact_min_bytes: int = 64 * 1024, flush_delay_ms: Optional[float] = None,
+                 auto_refresh: bool = False) -> None:
+        super().__init__(app_namespace)
+        if journal_compact_ratio <= 0:
+            raise localStoragePyStorageException("journal_compact_ratio must be positive!")
+        if flush_delay_ms is not None and flush_delay_ms <= 0:
+            raise localStoragePyStorageException("flush_delay_ms must be positive!")
+        if flush_delay_ms is not None and journal:
+            raise localStoragePyStorageException("flush_delay_ms can't be combined with journal mode!")
+        self.json_path = os.path.join(self.app_storage_path, "localStorageJSON.json")
+        self.journal_path = os.path.join(self.app_storage_path, "localStorageJSON.journal")
+        # Journal being folded into the main file by a running (or interrupted) compaction
+        self.compacting_journal_path = self.journal_path + ".compacting"
+        self.json_data: Dict[str, str] = {}
+        self.key_index: Optional[SortedKeyIndex] = None
+        self.expiry = ExpiryHeap()
+        self.journal = journal
+        self.journal_compact_ratio = journal_compact_ratio
+        self.journal_compact_min_bytes = journal_compact_min_bytes
+        self.journal_file: Optional[Any] = None
+        self.journal_size = 0
+        self.compaction_thread: Optional[threading.Thread] = None
+        # Set by the compaction thread once it has replaced the main file
+        self.compaction_finished = False
+        self.flush_delay_ms = flush_delay_ms
+        self.flush_handle: Optional[Any] = None
+        # Event loop the pending flush is scheduled on, None for a threading.Timer
+        self.flush_loop: Optional[Any] = None
+        self.dirty = False
+        self.lock = threading.RLock()
+        self.auto_refresh = auto_refresh
+        # Incremented each time refresh() finds the files changed by someone else
+        self.external_version = 0
+
+        if not os.path.isfile(self.json_path):
+            self.commit_to_disk()
+
+        # Replay journals even when journaling is off, so switching modes never loses writes
+        replayed = self.load_from_disk()
+        if self.journal:
+            self.main_file_size = os.path.getsize(self.json_path)
+            self.open_journal()
+        elif replayed:
+            self.commit_to_disk()
+            self.remove_journals()
+        self.last_signature = self.disk_signature()
+
+    def load_from_disk(self, repair: bool = True) -> bool:
+        with open(self.json_path, "r") as json_file:
+            stored = json.load(json_file)
+        self.json_data = {}
+        self.expiry.clear()
+        for key, value in stored.items():
+            if isinstance(value, dict) and "expires_at" in value:
+                self.expiry.set(key, value["expires_at"])
+                value = value["value"]
+            self.json_data[key] = _from_json_value(value)
+        self.key_index = None
+        replayed = False
+        for path in (self.compacting_journal_path, self.journal_path):
+            if os.path.isfile(path):
+                self.replay_journal(path, repair)
+                replayed = True
+        return replayed
+
+    def disk_signature(self) -> tuple:
+        signature = []
+        for path in (self.json_path, self.compacting_journal_path, self.journal_path):
+            try:
+                file_stat = os.stat(path)
+            except FileNotFoundError:
+                signature.append(None)
+            else:
+                signature.append((file_stat.st_mtime_ns, file_stat.st_size, file_stat.st_ino))
+        return tuple(signature)
+
+    @synchronized
+    def refresh(self) -> bool:
+        if self.compaction_finished:
+            # Our own compaction rewrote the files, that isn't someone else's change
+            self.compaction_finished = False
+            self.last_signature = self.disk_signature()
+            return False
+        signature = self.disk_signature()
+        if signature == self.last_signature:
+            return False
+        self.last_signature = signature
+        # Unflushed debounced changes win over the other writer, they are written out next
+        if self.dirty:
+            return False
+        # Another writer may be mid-append, so a torn journal tail must be left alone here
+        self.load_from_disk(repair=False)
+        self.external_version += 1
+        return True
+
+    def data_version(self) -> Optional[int]:
+        self.refresh()
+        return self.external_version
+
+    def snapshot(self) -> Dict[str, Any]:
+        if not self.expiry:
+            return dict(self.json_data)
+        deadlines = self.expiry.deadlines
+        return {key: {"value": value, "expires_at": deadlines[key]} if key in deadlines else value
+                for key, value in self.json_data.items()}
+
+    def commit_to_disk(self) -> None:
+        self.write_atomically(self.snapshot())
+        self.last_signature = self.disk_signature()
+
+    def write_atomically(self, data: Dict[str, Any], durable: bool = False) -> None:
+        # A crash mid-dump leaves a stray temp file instead of a truncated store
+        fd, temp_path = tempfile.mkstemp(dir=self.app_storage_path, prefix="localStorageJSON.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as json_file:
+                json.dump(data, json_file, default=_json_default)
+                if durable:
+                    json_file.flush()
+                    os.fsync(json_file.fileno())
+            os.replace(temp_path, self.json_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def replay_journal(self, path: str, repair: bool = True) -> None:
+        valid_bytes = 0
+        with open(path, "rb") as journal_file:
+            for line in journal_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn tail from a crash mid-append, everything before it is intact
+                    break
+                self.apply_journal_entry(entry)
+                valid_bytes += len(line)
+        if repair and valid_bytes < os.path.getsize(path):
+            with open(path, "r+b") as journal_file:
+                journal_file.truncate(valid_bytes)
+
+    def apply_journal_entry(self, entry: Dict[str, Any]) -> None:
+        if entry["op"] == "set":
+            self.json_data[entry["key"]] = _from_json_value(entry["value"])
+            self.expiry.set(entry["key"], entry.get("expires_at"))
+        elif entry["op"] == "del":
+            self.json_data.pop(entry["key"], None)
+            self.expiry.discard(entry["key"])
+        elif entry["op"] == "clear":
+            self.json_data = {}
+            self.expiry.clear()
+
+    def open_journal(self) -> None:
+        self.journal_file = open(self.journal_path, "a", encoding="utf-8")
+        self.journal_size = os.path.getsize(self.journal_path)
+
+    def remove_journals(self) -> None:
+        for path in (self.compacting_journal_path, self.journal_path):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def record_changes(self, entries: List[Dict[str, Any]]) -> None:
+        if self.flush_delay_ms is not None:
+            self.schedule_flush()
+            return
+        if not self.journal:
+            self.commit_to_disk()
+            return
+        lines = "".join(json.dumps(entry, default=_json_default) + "\n" for entry in entries)
+        self.journal_file.write(lines)
+        self.journal_file.flush()
+        self.journal_size += len(lines.encode("utf-8"))
+        self.last_signature = self.disk_signature()
+        if self.journal_size >= max(self.journal_compact_min_bytes, self.main_file_size * self.journal_compact_ratio):
+            self.start_compaction()
+
+    def compact(self, wait: bool = False) -> None:
+        """Fold the journal into the main file, and with wait block until that is done."""
+        with self.lock:
+            self.start_compaction()
+        if wait:
+            self.wait_for_compaction()
+
+    def start_compaction(self) -> None:
+        # Called with self.lock held, so it never waits for a running compaction
+        if not self.journal:
+            return
+        if self.compaction_thread is not None and self.compaction_thread.is_alive():
+            return
+        if os.path.isfile(self.compacting_journal_path):
+            # A previous compaction failed part way, fold everything in synchronously instead
+            self.journal_file.close()
+            self.write_compacted(self.snapshot())
+            os.remove(self.journal_path)
+            self.open_journal()
+            self.last_signature = self.disk_signature()
+            return
+        # Rotate the journal so new writes land in a fresh one while the snapshot is written
+        self.journal_file.close()
+        os.replace(self.journal_path, self.compacting_journal_path)
+        self.open_journal()
+        self.last_signature = self.disk_signature()
+        snapshot = self.snapshot()
+        self.compaction_thread = threading.Thread(target=self.write_compacted, args=(snapshot,),
+                                                  name="localStoragePro-json-compaction", daemon=True)
+        self.compaction_thread.start()
+
+    def write_compacted(self, snapshot: Dict[str, Any]) -> None:
+        # The rotated journal is deleted next, so the snapshot must be on disk first
+        self.write_atomically(snapshot, durable=True)
+        self.main_file_size = os.path.getsize(self.json_path)
+        os.remove(self.compacting_journal_path)
+        # The owner adopts the new file signature on its next refresh(); taking self.lock
+        # here would deadlock against close(), which waits for this thread
+        self.compaction_finished = True
+
+    def schedule_flush(self) -> None:
+        self.dirty = True
+        _dirty_json_backends.add(self)
+        if self.flush_handle is not None:
+            loop = self.flush_loop
+            if loop is None or (loop.is_running() and not loop.is_closed()):
+                return
+            # Its loop stopped (e.g. asyncio.run() returned) before the flush fired
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        delay = self.flush_delay_ms / 1000
+        loop = running_event_loop()
+        self.flush_loop = loop
+        if loop is not None:
+            self.flush_handle = loop.call_later(delay, loop.run_in_executor, None, self.flush)
+        else:
+            self.flush_handle = threading.Timer(delay, self.flush)
+            self.flush_handle.daemon = True
+            self.flush_handle.start()
+
+    def wait_for_compaction(self) -> None:
+        # Must not be called holding self.lock: writes keep going while the thread runs,
+        # and nothing that blocks on it may block them
+        thread = self.compaction_thread
+        if thread is None:
+            return
+        thread.join()
+        with self.lock:
+            if self.compaction_thread is thread:
+                self.compaction_thread = None
+
+    def get_item(self, item: str) -> Optional[str]:
+        if self.auto_refresh:
+            self.refresh()
+        if item in self.json_data and not (self.expiry and self.expiry.is_expired(item)):
+            return self.json_data[item]
+        return None
+
+    def get_all(self) -> Dict[str, str]:
+        if self.auto_refresh:
+            self.refresh()
+        if not self.expiry:
+            return dict(self.json_data)
+        return {key: self.json_data[key] for key in self.live_keys(self.json_data)}
+
+    def get_many(self, items: List[str]) -> Dict[str, str]:
+        if self.auto_refresh:
+            self.refresh()
+        result = {}
+        for key in self.live_keys(items):
+            if key in self.json_data:
+                result[key] = self.json_data[key]
+        return result
+
+    def iter_keys(self) -> Iterator[str]:
+        if self.auto_refresh:
+            self.refresh()
+        return iter(self.live_keys(self.json_data))
+
+    def iter_items(self) -> Iterator[Tuple[str, str]]:
+        for key in self.iter_keys():
+            value = self.json_data.get(key)
+            if value is not None:
+                yield key, value
+
+    def page(self, after_key: Optional[str] = None, limit: int = 100) -> List[Tuple[str, str]]:
+        if self.auto_refresh:
+            self.refresh()
+        candidates = (key for key in self.live_keys(self.json_data) if after_key is None or key > after_key)
+        return [(key, self.json_data[key]) for key in heapq.nsmallest(limit, candidates) if key in self.json_data]
+
+    @synchronized
+    def get_range(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, str]:
+        if self.auto_refresh:
+            self.refresh()
+        if self.key_index is None:
+            self.key_index = SortedKeyIndex(self.json_data)
+        return {key: self.json_data[key] for key in self.live_keys(self.key_index.range(start, end))}
+
+    @synchronized
+    def purge_expired(self, limit: Optional[int] = None) -> int:
+        entries = []
+        for key in self.expiry.pop_expired(time.time(), limit):
+            if self.json_data.pop(key, None) is not None:
+                if self.key_index is not None:
+                    self.key_index.discard(key)
+                entries.append({"op": "del", "key": key})
+        if entries:
+            self.record_changes(entries)
+        return len(entries)
+
+    @staticmethod
+    def set_entry(key: str, value: Union[str, bytes], expires_at: Optional[float]) -> Dict[str, Any]:
+        entry = {"op": "set", "key": key, "value": value}
+        if expires_at is not None:
+            entry["expires_at"] = expires_at
+        return entry
+
+    @synchronized
+    def set_item(self, item: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = expiry_time(ttl)
+        value = coerce_value(value)
+        self.json_data[item] = value
+        self.expiry.set(item, expires_at)
+        if self.key_index is not None:
+            self.key_index.add(item)
+        self.record_changes([self.set_entry(item, value, expires_at)])
+
+    @synchronized
+    def remove_item(self, item: str) -> None: 
+        if item in self.json_data:
+            del self.json_data[item]
+            self.expiry.discard(item)
+            if self.key_index is not None:
+                self.key_index.discard(item)
+            self.record_changes([{"op": "del", "key": item}])
+
+    @synchronized
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        if not items:
+            return
+        expires_at = expiry_time(ttl)
+        entries = []
+        for key, value in items.items():
+            value = coerce_value(value)
+            self.json_data[key] = value
+            self.expiry.set(key, expires_at)
+            if self.key_index is not None:
+                self.key_index.add(key)
+            entries.append(self.set_entry(key, value, expires_at))
+        self.record_changes(entries)
+
+    @synchronized
+    def remove_many(self, items: List[str]) -> None:
+        entries = []
+        for key in items:
+            if key in self.json_data:
+                del self.json_data[key]
+                self.expiry.discard(key)
+                if self.key_index is not None:
+                    self.key_index.discard(key)
+                entries.append({"op": "del", "key": key})
+        if entries:
+            self.record_changes(entries)
+
+    def remove_all(self) -> None:
+        self.clear()
+
+    @synchronized
+    def clear(self) -> None:
+        self.json_data = {}
+        self.key_index = None
+        self.expiry.clear()
+        if self.journal:
+            self.record_changes([{"op": "clear"}])
+        else:
+            self.record_changes([])
+
+    @synchronized
+    def flush(self) -> None:
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if self.dirty:
+            self.commit_to_disk()
+            self.dirty = False
+            _dirty_json_backends.discard(self)
+        if self.journal_file is not None:
+            self.journal_file.flush()
+
+    def close(self) -> None:
+        with self.lock:
+            self.flush()
+            if self.journal_file is not None:
+                self.journal_file.close()
+                self.journal_file = None
+        # No compaction starts without the journal file, wait for a running one outside the lock
+        self.wait_for_compaction()
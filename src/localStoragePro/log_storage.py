@@ -0,0 +1,500 @@
+"""Log-structured (Bitcask-style) storage backend."""
+
+import os
+import re
+import math
+import time
+import zlib
+import bisect
+import struct
+import threading
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from .storage_backends import (
+    BasicStorageBackend,
+    ExpiryHeap,
+    SortedKeyIndex,
+    coerce_value,
+    expiry_time,
+    localStoragePyStorageException,
+    synchronized,
+)
+
+# Record: crc32 of the rest of the record, then expires_at (NaN if none), key length,
+# value length and flags, followed by the key and the value
+RECORD_CRC = struct.Struct("<I")
+RECORD_HEADER = struct.Struct("<dIIB")
+RECORD_PREFIX_SIZE = RECORD_CRC.size + RECORD_HEADER.size
+# Hint: value offset, value length, expires_at (NaN if none), key length and flags, followed by the key
+HINT = struct.Struct("<QIdIB")
+
+FLAG_STR = 1
+FLAG_TOMBSTONE = 2
+
+DATA_FILE = re.compile(r"^localStorageLog\.(\d{10})\.data$")
+
+
+class KeyDirEntry(NamedTuple):
+    file_id: int
+    value_offset: int
+    value_length: int
+    flags: int
+    expires_at: Optional[float]
+    # Size of the whole record, which becomes dead space once the key is overwritten or removed
+    record_size: int
+
+
+def _pread(fd: int, length: int, offset: int) -> bytes:
+    if hasattr(os, "pread"):
+        return os.pread(fd, length, offset)
+    # No pread on Windows, every descriptor is only ever read by one thread at a time
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, length)
+
+
+def encode_record(key: bytes, value: bytes, flags: int, expires_at: Optional[float]) -> bytes:
+    body = RECORD_HEADER.pack(math.nan if expires_at is None else expires_at, len(key), len(value), flags)
+    body += key + value
+    return RECORD_CRC.pack(zlib.crc32(body)) + body
+
+
+def encode_hint(key: bytes, value_offset: int, value_length: int, flags: int, expires_at: Optional[float]) -> bytes:
+    return HINT.pack(value_offset, value_length, math.nan if expires_at is None else expires_at,
+                     len(key), flags) + key
+
+
+class LogStorageBackend(BasicStorageBackend):
+    """
+    Append-only data files with an in-memory key directory, after Bitcask.
+
+    Every write appends CRC-checked records to the active data file and
+    points the in-memory key directory at them, so writes are sequential and
+    a read is a dictionary lookup plus one ``pread``. Removals append
+    tombstones. Once the active file reaches ``max_file_size`` bytes it is
+    closed for good and a hint file listing its keys and offsets is written
+    next to it, so reopening reads hints instead of scanning data. Records
+    torn by a crash at the end of the active file are cut off on open.
+
+    Overwritten, removed and expired records stay on disk until ``merge()``
+    copies the live records of every closed file into fresh ones. The copy
+    runs on a background thread without the lock, so reads and writes carry
+    on meanwhile; only swapping the key directory over waits for it. With
+    ``merge_ratio`` set, a merge starts by itself once that fraction of at
+    least ``merge_min_bytes`` on disk is dead.
+
+    ``sync=True`` fsyncs after every write; otherwise ``flush()`` and
+    ``close()`` do.
+    """
+
+    def __init__(self, app_namespace: str, max_file_size: int = 64 * 1024 * 1024, sync: bool = False,
+                 merge_ratio: Optional[float] = 0.5, merge_min_bytes: int = 16 * 1024 * 1024) -> None:
+        super().__init__(app_namespace)
+        if max_file_size < 1:
+            raise localStoragePyStorageException("max_file_size must be at least 1!")
+        if merge_ratio is not None and not 0 < merge_ratio <= 1:
+            raise localStoragePyStorageException("merge_ratio must be greater than 0 and at most 1!")
+        self.max_file_size = max_file_size
+        self.sync = sync
+        self.merge_ratio = merge_ratio
+        self.merge_min_bytes = merge_min_bytes
+        self.lock = threading.RLock()
+        self.keydir: Dict[str, KeyDirEntry] = {}
+        self.key_index: Optional[SortedKeyIndex] = None
+        self.expiry = ExpiryHeap()
+        # Read-only descriptors of every data file in use, by file id
+        self.read_fds: Dict[int, int] = {}
+        self.active_id = 0
+        self.active_fd: Optional[int] = None
+        self.active_size = 0
+        # Hints of the records in the active file, written out when it is closed
+        self.active_hints: List[bytes] = []
+        # Bytes on disk, and the part of them the key directory still points at
+        self.total_bytes = 0
+        self.live_bytes = 0
+        self.merge_thread: Optional[threading.Thread] = None
+        # Bumped by clear(), so a merge started before it throws its output away
+        self.generation = 0
+        self.load()
+
+    @property
+    def dead_bytes(self) -> int:
+        return self.total_bytes - self.live_bytes
+
+    def data_path(self, file_id: int) -> str:
+        return os.path.join(self.app_storage_path, f"localStorageLog.{file_id:010d}.data")
+
+    def hint_path(self, file_id: int) -> str:
+        return os.path.join(self.app_storage_path, f"localStorageLog.{file_id:010d}.hint")
+
+    def data_file_ids(self) -> List[int]:
+        file_ids = []
+        for name in os.listdir(self.app_storage_path):
+            match = DATA_FILE.match(name)
+            if match:
+                file_ids.append(int(match.group(1)))
+        return sorted(file_ids)
+
+    def open_read_fd(self, file_id: int) -> int:
+        return os.open(self.data_path(file_id), os.O_RDONLY | getattr(os, "O_BINARY", 0))
+
+    def load(self) -> None:
+        # Replay oldest first so that later records win
+        file_ids = self.data_file_ids()
+        for file_id in file_ids[:-1]:
+            if os.path.isfile(self.hint_path(file_id)):
+                self.load_hints(file_id)
+            else:
+                self.scan_data_file(file_id)
+            self.read_fds[file_id] = self.open_read_fd(file_id)
+        if file_ids:
+            self.active_hints = self.scan_data_file(file_ids[-1], repair=True)
+            self.open_active(file_ids[-1])
+        else:
+            self.open_active(1)
+
+    def track(self, key: str, entry: Optional[KeyDirEntry]) -> None:
+        # Point key at entry, or drop it for a tombstone
+        previous = self.keydir.pop(key, None)
+        if previous is not None:
+            self.live_bytes -= previous.record_size
+        if entry is None:
+            self.expiry.discard(key)
+            if self.key_index is not None:
+                self.key_index.discard(key)
+            return
+        self.keydir[key] = entry
+        self.live_bytes += entry.record_size
+        self.expiry.set(key, entry.expires_at)
+        if self.key_index is not None and previous is None:
+            self.key_index.add(key)
+
+    def track_record(self, key: bytes, file_id: int, value_offset: int, value_length: int, flags: int,
+                     expires_at: float) -> None:
+        if flags & FLAG_TOMBSTONE:
+            self.track(key.decode("utf-8"), None)
+            return
+        record_size = RECORD_PREFIX_SIZE + len(key) + value_length
+        self.track(key.decode("utf-8"), KeyDirEntry(file_id, value_offset, value_length, flags,
+                                                    None if math.isnan(expires_at) else expires_at, record_size))
+
+    def scan_data_file(self, file_id: int, repair: bool = False) -> List[bytes]:
+        # Replays the records of a file without hints, returning hints for them
+        path = self.data_path(file_id)
+        with open(path, "rb") as data_file:
+            data = data_file.read()
+        hints = []
+        offset = 0
+        while offset + RECORD_PREFIX_SIZE <= len(data):
+            (crc,) = RECORD_CRC.unpack_from(data, offset)
+            expires_at, key_length, value_length, flags = RECORD_HEADER.unpack_from(data, offset + RECORD_CRC.size)
+            end = offset + RECORD_PREFIX_SIZE + key_length + value_length
+            if end > len(data) or zlib.crc32(data[offset + RECORD_CRC.size:end]) != crc:
+                break
+            key = data[offset + RECORD_PREFIX_SIZE:offset + RECORD_PREFIX_SIZE + key_length]
+            value_offset = offset + RECORD_PREFIX_SIZE + key_length
+            self.track_record(key, file_id, value_offset, value_length, flags, expires_at)
+            hints.append(encode_hint(key, value_offset, value_length, flags,
+                                     None if math.isnan(expires_at) else expires_at))
+            offset = end
+        if offset < len(data) and repair:
+            # A write torn by a crash, nothing after it can have been acknowledged
+            with open(path, "r+b") as data_file:
+                data_file.truncate(offset)
+            data = data[:offset]
+        # Anything after a bad record in a closed file is left alone but counted as dead
+        self.total_bytes += len(data)
+        return hints
+
+    def load_hints(self, file_id: int) -> None:
+        with open(self.hint_path(file_id), "rb") as hint_file:
+            hints = hint_file.read()
+        offset = 0
+        while offset + HINT.size <= len(hints):
+            value_offset, value_length, expires_at, key_length, flags = HINT.unpack_from(hints, offset)
+            key = hints[offset + HINT.size:offset + HINT.size + key_length]
+            self.track_record(key, file_id, value_offset, value_length, flags, expires_at)
+            offset += HINT.size + key_length
+        self.total_bytes += os.path.getsize(self.data_path(file_id))
+
+    def write_hints(self, file_id: int, hints: List[bytes]) -> None:
+        temp_path = self.hint_path(file_id) + ".tmp"
+        with open(temp_path, "wb") as hint_file:
+            hint_file.write(b"".join(hints))
+            hint_file.flush()
+            os.fsync(hint_file.fileno())
+        os.replace(temp_path, self.hint_path(file_id))
+
+    def open_active(self, file_id: int) -> None:
+        self.active_id = file_id
+        self.active_fd = os.open(self.data_path(file_id),
+                                 os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0), 0o644)
+        self.active_size = os.fstat(self.active_fd).st_size
+        if file_id not in self.read_fds:
+            self.read_fds[file_id] = self.open_read_fd(file_id)
+
+    def rotate(self, next_id: Optional[int] = None) -> None:
+        # Close the active file for good, with hints, and start the next one
+        os.fsync(self.active_fd)
+        os.close(self.active_fd)
+        self.write_hints(self.active_id, self.active_hints)
+        self.active_hints = []
+        self.open_active(self.active_id + 1 if next_id is None else next_id)
+
+    def append(self, records: List[Tuple[bytes, bytes, int, Optional[float]]]) -> None:
+        """Append (key, value, flags, expires_at) records with one write and update the key directory."""
+        chunks = []
+        offset = self.active_size
+        for key, value, flags, expires_at in records:
+            record = encode_record(key, value, flags, expires_at)
+            value_offset = offset + RECORD_PREFIX_SIZE + len(key)
+            chunks.append(record)
+            self.active_hints.append(encode_hint(key, value_offset, len(value), flags, expires_at))
+            self.track_record(key, self.active_id, value_offset, len(value), flags,
+                              math.nan if expires_at is None else expires_at)
+            offset += len(record)
+        data = b"".join(chunks)
+        written = 0
+        while written < len(data):
+            written += os.write(self.active_fd, data[written:])
+        if self.sync:
+            os.fsync(self.active_fd)
+        self.active_size = offset
+        self.total_bytes += len(data)
+        if self.active_size >= self.max_file_size:
+            self.rotate()
+        if self.should_merge():
+            self.merge()
+
+    def should_merge(self) -> bool:
+        return (self.merge_ratio is not None and self.total_bytes >= self.merge_min_bytes
+                and self.dead_bytes >= self.total_bytes * self.merge_ratio)
+
+    def merge(self, wait: bool = False) -> None:
+        """Rewrite the live records of every closed data file into fresh files and delete the old ones."""
+        with self.lock:
+            if self.merge_thread is not None and self.merge_thread.is_alive():
+                if not wait:
+                    return
+                merge_thread = self.merge_thread
+            else:
+                merge_thread = None
+        if merge_thread is not None:
+            merge_thread.join()
+        with self.lock:
+            old_ids = sorted(self.read_fds)
+            # Merged files take the ids between the old files and the next active one, so
+            # replaying after a crash part way through still sees the newest records last
+            merged_ids = [self.active_id + 1 + position for position in range(len(old_ids))]
+            self.rotate(next_id=merged_ids[-1] + 1)
+            entries = {key: entry for key, entry in self.keydir.items() if entry.file_id in old_ids}
+            fds = {file_id: self.open_read_fd(file_id) for file_id in old_ids}
+            self.merge_thread = threading.Thread(target=self.write_merged,
+                                                 args=(entries, fds, old_ids, merged_ids, self.generation),
+                                                 name="localStoragePro-log-merge", daemon=True)
+            self.merge_thread.start()
+        if wait:
+            self.merge_thread.join()
+
+    def write_merged(self, entries: Dict[str, KeyDirEntry], fds: Dict[int, int], old_ids: List[int],
+                     merged_ids: List[int], generation: int) -> None:
+        now = time.time()
+        moved: Dict[str, Tuple[KeyDirEntry, Optional[KeyDirEntry]]] = {}
+        hints: Dict[int, List[bytes]] = {file_id: [] for file_id in merged_ids}
+        position = 0
+        merged_file = open(self.data_path(merged_ids[0]), "wb")
+        try:
+            # Copy in file order, so the old files are read sequentially
+            for key, entry in sorted(entries.items(), key=lambda pair: pair[1][:2]):
+                if entry.expires_at is not None and entry.expires_at <= now:
+                    moved[key] = (entry, None)
+                    continue
+                if merged_file.tell() >= self.max_file_size and position < len(merged_ids) - 1:
+                    merged_file.flush()
+                    os.fsync(merged_file.fileno())
+                    merged_file.close()
+                    position += 1
+                    merged_file = open(self.data_path(merged_ids[position]), "wb")
+                key_bytes = key.encode("utf-8")
+                value = _pread(fds[entry.file_id], entry.value_length, entry.value_offset)
+                value_offset = merged_file.tell() + RECORD_PREFIX_SIZE + len(key_bytes)
+                merged_file.write(encode_record(key_bytes, value, entry.flags, entry.expires_at))
+                hints[merged_ids[position]].append(
+                    encode_hint(key_bytes, value_offset, entry.value_length, entry.flags, entry.expires_at))
+                moved[key] = (entry, entry._replace(file_id=merged_ids[position], value_offset=value_offset))
+            merged_file.flush()
+            os.fsync(merged_file.fileno())
+        finally:
+            merged_file.close()
+            for fd in fds.values():
+                os.close(fd)
+        merged_ids = merged_ids[:position + 1]
+        for file_id in merged_ids:
+            self.write_hints(file_id, hints[file_id])
+
+        with self.lock:
+            if generation != self.generation:
+                for file_id in merged_ids:
+                    self.remove_files(file_id)
+                return
+            for key, (old_entry, new_entry) in moved.items():
+                # Keys written since the merge started keep their newer record
+                if self.keydir.get(key) != old_entry:
+                    continue
+                self.track(key, new_entry)
+            for file_id in merged_ids:
+                self.read_fds[file_id] = self.open_read_fd(file_id)
+                self.total_bytes += os.path.getsize(self.data_path(file_id))
+            for file_id in old_ids:
+                os.close(self.read_fds.pop(file_id))
+                self.total_bytes -= os.path.getsize(self.data_path(file_id))
+                self.remove_files(file_id)
+
+    def remove_files(self, file_id: int) -> None:
+        for path in (self.data_path(file_id), self.hint_path(file_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def wait_for_merge(self) -> None:
+        merge_thread = self.merge_thread
+        if merge_thread is not None:
+            merge_thread.join()
+
+    def read_value(self, entry: KeyDirEntry) -> Union[str, bytes]:
+        value = _pread(self.read_fds[entry.file_id], entry.value_length, entry.value_offset)
+        if entry.flags & FLAG_STR:
+            return value.decode("utf-8")
+        return value
+
+    def live_entry(self, key: str, now: float) -> Optional[KeyDirEntry]:
+        entry = self.keydir.get(key)
+        if entry is None or (entry.expires_at is not None and entry.expires_at <= now):
+            return None
+        return entry
+
+    @synchronized
+    def get_item(self, item: str) -> Optional[Union[str, bytes]]:
+        entry = self.live_entry(item, time.time())
+        return self.read_value(entry) if entry is not None else None
+
+    @synchronized
+    def get_many(self, items: List[str]) -> Dict[str, Union[str, bytes]]:
+        now = time.time()
+        result = {}
+        for key in items:
+            entry = self.live_entry(key, now)
+            if entry is not None:
+                result[key] = self.read_value(entry)
+        return result
+
+    @synchronized
+    def get_all(self) -> Dict[str, Union[str, bytes]]:
+        return self.get_many(list(self.keydir))
+
+    @synchronized
+    def current_keys(self) -> List[str]:
+        return self.live_keys(self.keydir)
+
+    def iter_keys(self) -> Iterator[str]:
+        return iter(self.current_keys())
+
+    def iter_items(self) -> Iterator[Tuple[str, Union[str, bytes]]]:
+        for key in self.current_keys():
+            value = self.get_item(key)
+            if value is not None:
+                yield key, value
+
+    def sorted_keys(self) -> List[str]:
+        if self.key_index is None:
+            self.key_index = SortedKeyIndex(self.keydir)
+        return self.key_index.keys
+
+    @synchronized
+    def page(self, after_key: Optional[str] = None, limit: int = 100) -> List[Tuple[str, Union[str, bytes]]]:
+        keys = self.sorted_keys()
+        position = bisect.bisect_right(keys, after_key) if after_key is not None else 0
+        now = time.time()
+        result = []
+        while position < len(keys) and len(result) < limit:
+            entry = self.live_entry(keys[position], now)
+            if entry is not None:
+                result.append((keys[position], self.read_value(entry)))
+            position += 1
+        return result
+
+    @synchronized
+    def get_range(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Union[str, bytes]]:
+        self.sorted_keys()
+        return self.get_many(self.key_index.range(start, end))
+
+    @synchronized
+    def purge_expired(self, limit: Optional[int] = None) -> int:
+        expired = self.expiry.pop_expired(time.time(), limit)
+        if expired:
+            self.append([(key.encode("utf-8"), b"", FLAG_TOMBSTONE, None) for key in expired])
+        return len(expired)
+
+    @staticmethod
+    def value_record(item: str, value: Any, expires_at: Optional[float]) -> Tuple[bytes, bytes, int, Optional[float]]:
+        value = coerce_value(value)
+        if isinstance(value, str):
+            return item.encode("utf-8"), value.encode("utf-8"), FLAG_STR, expires_at
+        return item.encode("utf-8"), value, 0, expires_at
+
+    @synchronized
+    def set_item(self, item: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.append([self.value_record(item, value, expiry_time(ttl))])
+
+    @synchronized
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        if not items:
+            return
+        expires_at = expiry_time(ttl)
+        self.append([self.value_record(key, value, expires_at) for key, value in items.items()])
+
+    @synchronized
+    def remove_item(self, item: str) -> None:
+        self.remove_many([item])
+
+    @synchronized
+    def remove_many(self, items: List[str]) -> None:
+        tombstones = [(key.encode("utf-8"), b"", FLAG_TOMBSTONE, None) for key in dict.fromkeys(items)
+                      if key in self.keydir]
+        if tombstones:
+            self.append(tombstones)
+
+    def remove_all(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        self.wait_for_merge()
+        with self.lock:
+            self.generation += 1
+            os.close(self.active_fd)
+            for file_id, fd in list(self.read_fds.items()):
+                os.close(fd)
+                self.remove_files(file_id)
+            self.read_fds = {}
+            self.keydir = {}
+            self.key_index = None
+            self.expiry.clear()
+            self.active_hints = []
+            self.total_bytes = 0
+            self.live_bytes = 0
+            self.open_active(1)
+
+    @synchronized
+    def flush(self) -> None:
+        if self.active_fd is not None:
+            os.fsync(self.active_fd)
+
+    def close(self) -> None:
+        self.wait_for_merge()
+        with self.lock:
+            if self.active_fd is None:
+                return
+            os.fsync(self.active_fd)
+            os.close(self.active_fd)
+            self.active_fd = None
+            for fd in self.read_fds.values():
+                os.close(fd)
+            self.read_fds = {}
@@ -0,0 +1,227 @@
+"""Per-operation counters and latency histograms for storage backends."""
+
+import time
+import bisect
+import threading
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .storage_backends import BasicStorageBackend, StorageBackendWrapper
+
+# Upper bounds in seconds of the latency buckets, doubling from 1us to about 16.8s; slower
+# calls land in one more overflow bucket
+LATENCY_BUCKETS: Tuple[float, ...] = tuple(1e-6 * 2 ** i for i in range(25))
+
+# Operations whose result is the data read, and those whose arguments are the data written
+_READ_MAPPINGS = frozenset(["get_many", "get_all", "get_range", "get_by_prefix"])
+_WRITES = frozenset(["set_item", "set_many"])
+
+
+class OperationEvent(NamedTuple):
+    """One finished backend call, as passed to metrics observers."""
+    backend: str
+    operation: str
+    seconds: float
+    bytes_read: int
+    bytes_written: int
+    error: bool
+
+
+def value_size(value: Any) -> int:
+    """Approximate stored size in bytes of a key or value."""
+    if isinstance(value, str):
+        return len(value) if value.isascii() else len(value.encode("utf-8"))
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if value is None:
+        return 0
+    return len(str(value))
+
+
+def operation_bytes(operation: str, args: tuple, result: Any) -> Tuple[int, int]:
+    """Bytes of keys and values read and written by one call, as (read, written)."""
+    if operation == "get_item":
+        return value_size(result), 0
+    if operation in _READ_MAPPINGS:
+        return sum(value_size(key) + value_size(value) for key, value in (result or {}).items()), 0
+    if operation == "page":
+        return sum(value_size(key) + value_size(value) for key, value in result or ()), 0
+    if operation == "set_item":
+        return 0, value_size(args[0]) + value_size(args[1])
+    if operation == "set_many":
+        return 0, sum(value_size(key) + value_size(value) for key, value in args[0].items())
+    return 0, 0
+
+
+class LatencyHistogram:
+    """Counts of call latencies in the fixed ``LATENCY_BUCKETS``."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        # Upper bound of the bucket holding the quantile, None without samples
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for position, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return LATENCY_BUCKETS[position] if position < len(LATENCY_BUCKETS) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.50),
+            "p99": self.quantile(0.99),
+            "buckets": [(bound, count) for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), self.counts)],
+        }
+
+
+class OperationStats:
+    """Counters of one operation on one backend."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.latency = LatencyHistogram()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "latency": self.latency.snapshot(),
+        }
+
+
+class StorageMetrics:
+    """
+    Collects counts, errors, bytes and latency histograms of backend calls,
+    split by backend name and operation.
+
+    Read the totals with ``stats()``, or register observers with
+    ``add_observer()`` to be called with an ``OperationEvent`` after every
+    call, for example to forward them to your own telemetry. Observers run on
+    the thread that made the call, so keep them cheap. One instance can be
+    shared by several stores to aggregate them.
+    """
+
+    def __init__(self, observers: Optional[List[Callable[[OperationEvent], Any]]] = None) -> None:
+        self.lock = threading.Lock()
+        self.operations: Dict[Tuple[str, str], OperationStats] = {}
+        self.observers: List[Callable[[OperationEvent], Any]] = list(observers or ())
+
+    def add_observer(self, observer: Callable[[OperationEvent], Any]) -> None:
+        self.observers.append(observer)
+
+    def remove_observer(self, observer: Callable[[OperationEvent], Any]) -> None:
+        self.observers.remove(observer)
+
+    def record(self, backend: str, operation: str, seconds: float, bytes_read: int = 0, bytes_written: int = 0,
+               error: bool = False) -> None:
+        with self.lock:
+            stats = self.operations.get((backend, operation))
+            if stats is None:
+                stats = self.operations[(backend, operation)] = OperationStats()
+            stats.count += 1
+            stats.errors += error
+            stats.bytes_read += bytes_read
+            stats.bytes_written += bytes_written
+            stats.latency.observe(seconds)
+        if self.observers:
+            event = OperationEvent(backend, operation, seconds, bytes_read, bytes_written, error)
+            for observer in self.observers:
+                try:
+                    observer(event)
+                except Exception as e:
+                    print(f"Error in metrics observer: {e}")
+
+    def record_call(self, backend: str, operation: str, seconds: float, args: tuple, result: Any) -> None:
+        bytes_read, bytes_written = operation_bytes(operation, args, result)
+        self.record(backend, operation, seconds, bytes_read, bytes_written)
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Snapshot of every counter, as {backend: {operation: {...}}}."""
+        with self.lock:
+            result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            for (backend, operation), stats in self.operations.items():
+                result.setdefault(backend, {})[operation] = stats.snapshot()
+            return result
+
+    def reset(self) -> None:
+        with self.lock:
+            self.operations = {}
+
+
+class MetricsStorageBackend(StorageBackendWrapper):
+    """
+    Records every call to the wrapped backend in a ``StorageMetrics``.
+
+    Sits directly on the storage backend, below compression, the cache and
+    codecs, so it measures the storage itself and counts bytes as stored.
+    Iterators are timed while they produce items, not while the caller
+    consumes them, and recorded once they are exhausted or closed.
+    """
+
+    def __init__(self, backend: BasicStorageBackend, metrics: StorageMetrics, name: str) -> None:
+        super().__init__(backend)
+        self.metrics = metrics
+        self.name = name
+
+    def forward(self, operation: str, *args: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            result = getattr(self.backend, operation)(*args)
+        except Exception:
+            self.metrics.record(self.name, operation, time.perf_counter() - start, error=True)
+            raise
+        self.metrics.record_call(self.name, operation, time.perf_counter() - start, args, result)
+        return result
+
+    def iterate(self, operation: str, iterator: Iterator[Any]) -> Iterator[Any]:
+        elapsed = 0.0
+        bytes_read = 0
+        error = False
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    elapsed += time.perf_counter() - start
+                    return
+                except Exception:
+                    elapsed += time.perf_counter() - start
+                    error = True
+                    raise
+                elapsed += time.perf_counter() - start
+                bytes_read += value_size(item) if operation == "iter_keys" else value_size(item[0]) + value_size(item[1])
+                yield item
+        finally:
+            self.metrics.record(self.name, operation, elapsed, bytes_read, error=error)
+
+    def iter_keys(self) -> Iterator[str]:
+        return self.iterate("iter_keys", iter(self.backend.iter_keys()))
+
+    def iter_items(self) -> Iterator[Tuple[str, Any]]:
+        return self.iterate("iter_items", iter(self.backend.iter_items()))
+
+    def data_version(self) -> Optional[int]:
+        # A cheap probe the cache makes before every read, not worth a histogram
+        return self.backend.data_version()
+
+    def close(self) -> None:
+        self.backend.close()
@@ -0,0 +1,330 @@
+"""Storage backend keeping many namespaces in one shared SQLite database."""
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .sqlite_storage import apply_pragmas, nested_transaction, resolve_sqlite_profile, sql_limit, upsert_statement
+from .storage_backends import (
+    BasicStorageBackend,
+    coerce_value,
+    expiry_time,
+    localStoragePyStorageException,
+    synchronized,
+)
+
+# Used when no database path is given, next to the per-namespace directories
+SHARED_DATABASE_PATH = os.path.join("~", ".config", "localStoragePro", "localStorageSQLiteShared.db")
+
+# Databases by absolute path, so every namespace on one file shares its connection
+_databases: Dict[str, "SharedSQLiteDatabase"] = {}
+_databases_lock = threading.Lock()
+
+
+def open_shared_database(path: Optional[str] = None, profile: Union[str, Dict[str, Any], None] = None,
+                         cached_statements: int = 128) -> "SharedSQLiteDatabase":
+    """Return the process-wide SharedSQLiteDatabase for path, creating it on first use."""
+    path = os.path.abspath(os.path.expanduser(path or SHARED_DATABASE_PATH))
+    with _databases_lock:
+        database = _databases.get(path)
+        if database is None:
+            database = _databases[path] = SharedSQLiteDatabase(path, profile, cached_statements)
+        elif profile is not None and resolve_sqlite_profile(profile) != database.pragmas:
+            raise localStoragePyStorageException(f"Shared database '{path}' is already open with another profile!")
+        return database
+
+
+class SharedSQLiteDatabase:
+    """
+    One SQLite file holding any number of namespaces in a single table keyed
+    by (namespace, key), served by one connection.
+
+    The connection opens when the first namespace attaches and closes when
+    the last one is closed. Every use of it is serialized on ``lock``, which
+    its namespaces share as their own; SQLite allows one writer per file in
+    any case, and one connection means one page cache and one file handle
+    however many namespaces there are.
+
+    ``transaction()`` groups writes to any of its namespaces into one
+    transaction that commits when the block exits and rolls back if it
+    raises; nested blocks become savepoints.
+    """
+
+    SQL_SET_ITEM = upsert_statement(("namespace", "key", "value", "expires_at"), ("namespace", "key"))
+    # Rows of a namespace are clustered on the primary key, so every read is a range of it
+    SQL_CREATE_TABLE = ("CREATE TABLE IF NOT EXISTS localStoragePro (namespace TEXT NOT NULL, key TEXT NOT NULL, "
+                        "value BLOB, expires_at REAL, PRIMARY KEY (namespace, key)) WITHOUT ROWID")
+    SQL_CREATE_EXPIRY_INDEX = ("CREATE INDEX IF NOT EXISTS localStoragePro_expires_at "
+                               "ON localStoragePro (namespace, expires_at) WHERE expires_at IS NOT NULL")
+    SQL_NAMESPACES = "SELECT DISTINCT namespace FROM localStoragePro ORDER BY namespace"
+
+    def __init__(self, path: str, profile: Union[str, Dict[str, Any], None] = None,
+                 cached_statements: int = 128) -> None:
+        self.path = path
+        self.pragmas = resolve_sqlite_profile(profile)
+        self.cached_statements = cached_statements
+        self.lock = threading.RLock()
+        self.db_connection: Optional[sqlite3.Connection] = None
+        self.db_cursor: Optional[sqlite3.Cursor] = None
+        self.references = 0
+        # Open transaction() blocks, commits are left to the outermost one
+        self.transaction_depth = 0
+        # Writes per namespace on this connection, which PRAGMA data_version doesn't count
+        self.write_counts: Dict[str, int] = {}
+
+    def connect(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.db_connection = sqlite3.connect(self.path, check_same_thread=False,
+                                             cached_statements=self.cached_statements)
+        self.db_cursor = self.db_connection.cursor()
+        apply_pragmas(self.db_cursor, self.pragmas)
+        self.db_cursor.execute(self.SQL_CREATE_TABLE)
+        self.db_cursor.execute(self.SQL_CREATE_EXPIRY_INDEX)
+        self.db_connection.commit()
+
+    def attach(self) -> None:
+        with self.lock:
+            if self.db_connection is None:
+                self.connect()
+            self.references += 1
+
+    def detach(self) -> None:
+        with self.lock:
+            self.references -= 1
+            if self.references <= 0:
+                self.close()
+
+    def ensure_open(self) -> None:
+        if self.db_connection is None:
+            raise localStoragePyStorageException(f"No namespace of shared database '{self.path}' is open!")
+
+    def commit_write(self, namespace: str) -> None:
+        self.write_counts[namespace] = self.write_counts.get(namespace, 0) + 1
+        if not self.transaction_depth:
+            self.db_connection.commit()
+
+    def execute_batch(self, namespace: str, query: str, rows: List[tuple]) -> None:
+        try:
+            self.db_cursor.executemany(query, rows)
+        except Exception:
+            # Outside transaction() the batch is its own transaction, keep it all-or-nothing
+            if not self.transaction_depth:
+                self.db_connection.rollback()
+            raise
+        self.commit_write(namespace)
+
+    def transaction(self) -> Any:
+        return nested_transaction(self, self.end_implicit_transaction)
+
+    def end_implicit_transaction(self) -> None:
+        self.ensure_open()
+        if self.db_connection.in_transaction:
+            self.db_connection.commit()
+
+    def namespaces(self) -> List[str]:
+        """Namespaces with at least one stored key."""
+        with self.lock:
+            self.ensure_open()
+            return [namespace for (namespace,) in self.db_cursor.execute(self.SQL_NAMESPACES).fetchall()]
+
+    def close(self) -> None:
+        with self.lock:
+            if self.db_connection is None:
+                return
+            if self.db_connection.in_transaction:
+                self.db_connection.commit()
+            self.db_cursor.close()
+            self.db_connection.close()
+            self.db_connection = None
+            self.db_cursor = None
+            self.references = 0
+
+
+class SharedSQLiteStorageBackend(BasicStorageBackend):
+    """
+    A namespace stored in a ``SharedSQLiteDatabase`` rather than in its own
+    directory and database file.
+
+    ``database`` is a database path, or a ``SharedSQLiteDatabase`` from
+    ``open_shared_database()``; without it every namespace goes into
+    ``SHARED_DATABASE_PATH``. Namespaces opened on the same path share the
+    database, its connection and its lock. ``profile`` takes effect when
+    the connection is opened by the first of them.
+
+    Every write commits on its own, unless it runs inside
+    ``transaction()``, which is the database's and so can span namespaces.
+    """
+
+    LIVE = "(expires_at IS NULL OR expires_at > ?)"
+    SQL_GET_ITEM = f"SELECT value FROM localStoragePro WHERE namespace = ? AND key = ? AND {LIVE}"
+    SQL_GET_ALL = f"SELECT key, value FROM localStoragePro WHERE namespace = ? AND {LIVE}"
+    SQL_REMOVE_ITEM = "DELETE FROM localStoragePro WHERE namespace = ? AND key = ?"
+    SQL_REMOVE_ALL = "DELETE FROM localStoragePro WHERE namespace = ?"
+    SQL_FIRST_PAGE = f"SELECT key, value FROM localStoragePro WHERE namespace = ? AND {LIVE} ORDER BY key LIMIT ?"
+    SQL_NEXT_PAGE = (f"SELECT key, value FROM localStoragePro WHERE namespace = ? AND key > ? AND {LIVE} "
+                     "ORDER BY key LIMIT ?")
+    SQL_FIRST_KEYS = f"SELECT key FROM localStoragePro WHERE namespace = ? AND {LIVE} ORDER BY key LIMIT ?"
+    SQL_NEXT_KEYS = f"SELECT key FROM localStoragePro WHERE namespace = ? AND key > ? AND {LIVE} ORDER BY key LIMIT ?"
+    SQL_GET_RANGE = (f"SELECT key, value FROM localStoragePro WHERE namespace = ? AND key >= ? AND key < ? "
+                     f"AND {LIVE} ORDER BY key")
+    SQL_GET_FROM = f"SELECT key, value FROM localStoragePro WHERE namespace = ? AND key >= ? AND {LIVE} ORDER BY key"
+    SQL_PURGE_EXPIRED = ("DELETE FROM localStoragePro WHERE namespace = ? AND key IN "
+                         "(SELECT key FROM localStoragePro WHERE namespace = ? AND expires_at <= ? "
+                         "ORDER BY expires_at LIMIT ?)")
+
+    def __init__(self, app_namespace: str, database: Union[str, SharedSQLiteDatabase, None] = None,
+                 profile: Union[str, Dict[str, Any], None] = None, cached_statements: int = 128) -> None:
+        # No directory per namespace, which is the point of sharing the database
+        if app_namespace.count(os.sep) > 0:
+            raise localStoragePyStorageException('app_namespace may not contain path separators!')
+        self.app_storage_path = os.path.join(os.path.expanduser("~"), ".config", "localStoragePro", app_namespace)
+        self.app_namespace = app_namespace
+        if not isinstance(database, SharedSQLiteDatabase):
+            database = open_shared_database(database, profile, cached_statements)
+        self.database = database
+        self.lock = database.lock
+        # Writes made through this instance, see data_version()
+        self.writes = 0
+        self.closed = False
+        database.attach()
+
+    @property
+    def db_cursor(self) -> sqlite3.Cursor:
+        return self.database.db_cursor
+
+    def transaction(self) -> Any:
+        return self.database.transaction()
+
+    def commit_write(self) -> None:
+        self.writes += 1
+        self.database.commit_write(self.app_namespace)
+
+    @synchronized
+    def flush(self) -> None:
+        # Writes commit on their own, or when the enclosing transaction() exits
+        pass
+
+    @synchronized
+    def data_version(self) -> Optional[int]:
+        # PRAGMA data_version only moves for other connections, so also count writes to
+        # this namespace made through the shared connection by other instances
+        version = self.db_cursor.execute("PRAGMA data_version").fetchone()[0]
+        return version + self.database.write_counts.get(self.app_namespace, 0) - self.writes
+
+    @synchronized
+    def get_item(self, item: str) -> Optional[Union[str, bytes]]:
+        fetched_value = self.db_cursor.execute(self.SQL_GET_ITEM, (self.app_namespace, item, time.time())).fetchone()
+        return fetched_value[0] if fetched_value is not None else None
+
+    @synchronized
+    def get_all(self) -> Dict[str, Union[str, bytes]]:
+        return dict(self.db_cursor.execute(self.SQL_GET_ALL, (self.app_namespace, time.time())).fetchall())
+
+    @synchronized
+    def get_many(self, items: List[str]) -> Dict[str, Union[str, bytes]]:
+        if not items:
+            return {}
+        placeholders = ", ".join(["?" for _ in items])
+        query = (f"SELECT key, value FROM localStoragePro WHERE namespace = ? AND key IN ({placeholders}) "
+                 f"AND {self.LIVE}")
+        return dict(self.db_cursor.execute(query, [self.app_namespace, *items, time.time()]).fetchall())
+
+    @synchronized
+    def page(self, after_key: Optional[str] = None, limit: int = 100) -> List[Tuple[str, Union[str, bytes]]]:
+        if after_key is None:
+            return self.db_cursor.execute(self.SQL_FIRST_PAGE, (self.app_namespace, time.time(), limit)).fetchall()
+        return self.db_cursor.execute(self.SQL_NEXT_PAGE,
+                                      (self.app_namespace, after_key, time.time(), limit)).fetchall()
+
+    @synchronized
+    def get_range(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Union[str, bytes]]:
+        if end is None:
+            rows = self.db_cursor.execute(self.SQL_GET_FROM, (self.app_namespace, start or "", time.time()))
+        else:
+            rows = self.db_cursor.execute(self.SQL_GET_RANGE, (self.app_namespace, start or "", end, time.time()))
+        return dict(rows.fetchall())
+
+    @synchronized
+    def get_expiries(self, items: List[str]) -> Dict[str, float]:
+        if not items:
+            return {}
+        placeholders = ", ".join(["?" for _ in items])
+        query = (f"SELECT key, expires_at FROM localStoragePro WHERE namespace = ? AND key IN ({placeholders}) "
+                 "AND expires_at IS NOT NULL")
+        return dict(self.db_cursor.execute(query, [self.app_namespace, *items]).fetchall())
+
+    @synchronized
+    def purge_expired(self, limit: Optional[int] = None) -> int:
+        self.db_cursor.execute(self.SQL_PURGE_EXPIRED, (self.app_namespace, self.app_namespace, time.time(),
+                                                        sql_limit(limit)))
+        purged = self.db_cursor.rowcount
+        if purged:
+            self.commit_write()
+        return purged
+
+    def iter_items(self, batch_size: int = 1000) -> Iterator[Tuple[str, Union[str, bytes]]]:
+        # Pages are fetched one at a time, so the shared lock is never held between yields
+        after_key = None
+        while True:
+            rows = self.page(after_key, batch_size)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after_key = rows[-1][0]
+
+    def iter_keys(self, batch_size: int = 1000) -> Iterator[str]:
+        after_key = None
+        while True:
+            with self.lock:
+                if after_key is None:
+                    rows = self.db_cursor.execute(self.SQL_FIRST_KEYS, (self.app_namespace, time.time(), batch_size))
+                else:
+                    rows = self.db_cursor.execute(self.SQL_NEXT_KEYS,
+                                                  (self.app_namespace, after_key, time.time(), batch_size))
+                keys = [key for (key,) in rows.fetchall()]
+            yield from keys
+            if len(keys) < batch_size:
+                return
+            after_key = keys[-1]
+
+    @synchronized
+    def set_item(self, item: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.db_cursor.execute(self.database.SQL_SET_ITEM,
+                               (self.app_namespace, item, coerce_value(value), expiry_time(ttl)))
+        self.commit_write()
+
+    @synchronized
+    def remove_item(self, item: str) -> None:
+        self.db_cursor.execute(self.SQL_REMOVE_ITEM, (self.app_namespace, item))
+        self.commit_write()
+
+    @synchronized
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        expires_at = expiry_time(ttl)
+        rows = [(self.app_namespace, key, coerce_value(value), expires_at) for key, value in items.items()]
+        self.database.execute_batch(self.app_namespace, self.database.SQL_SET_ITEM, rows)
+        self.writes += 1
+
+    @synchronized
+    def remove_many(self, items: List[str]) -> None:
+        self.database.execute_batch(self.app_namespace, self.SQL_REMOVE_ITEM,
+                                    [(self.app_namespace, key) for key in items])
+        self.writes += 1
+
+    @synchronized
+    def remove_all(self) -> None:
+        self.db_cursor.execute(self.SQL_REMOVE_ALL, (self.app_namespace,))
+        self.commit_write()
+
+    def clear(self) -> None:
+        # The table is shared, so unlike SQLiteStorageBackend this can't drop it
+        self.remove_all()
+
+    @synchronized
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.database.detach()
@@ -0,0 +1,233 @@
+"""Read-only, memory-mapped snapshots of a namespace for fast cold starts."""
+
+import os
+import mmap
+import math
+import time
+import struct
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .storage_backends import BasicStorageBackend, coerce_value, localStoragePyStorageException
+
+# Kept in a dot directory, which the text backend never lists as keys
+SNAPSHOT_PATH = os.path.join(".snapshot", "localStorageSnapshot.lsps")
+
+# Header: magic, format version, entry count, then the offsets of the three regions
+MAGIC = b"LSPSNAP\x00"
+VERSION = 1
+HEADER = struct.Struct("<8sIQQQQ")
+# Entry: key offset, value offset, value length, expires_at (NaN if none), key length, value type
+ENTRY = struct.Struct("<QQQdIB3x")
+_TYPE_BYTES = 0
+_TYPE_STR = 1
+
+
+def write_snapshot(path: str, backend: BasicStorageBackend) -> int:
+    """
+    Write every live key of backend to a snapshot file at path, atomically.
+
+    Values are written exactly as the backend stores them, so a snapshot of a
+    store that uses a codec or compression is read back with the same options.
+    Returns the number of keys written.
+    """
+    items = sorted((key.encode("utf-8"), coerce_value(value)) for key, value in backend.iter_items())
+    expiries = backend.get_expiries([key.decode("utf-8") for key, _ in items]) if items else {}
+    index_offset = HEADER.size
+    keys_offset = index_offset + ENTRY.size * len(items)
+    entries = []
+    keys = []
+    values = []
+    key_position = 0
+    value_position = 0
+    for key, value in items:
+        is_str = isinstance(value, str)
+        raw = value.encode("utf-8") if is_str else value
+        expires_at = expiries.get(key.decode("utf-8"), math.nan)
+        entries.append(ENTRY.pack(key_position, value_position, len(raw), expires_at, len(key),
+                                  _TYPE_STR if is_str else _TYPE_BYTES))
+        keys.append(key)
+        values.append(raw)
+        key_position += len(key)
+        value_position += len(raw)
+    values_offset = keys_offset + key_position
+    header = HEADER.pack(MAGIC, VERSION, len(items), index_offset, keys_offset, values_offset)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix="localStorageSnapshot.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as snapshot_file:
+            snapshot_file.write(header)
+            snapshot_file.write(b"".join(entries))
+            snapshot_file.write(b"".join(keys))
+            snapshot_file.write(b"".join(values))
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return len(items)
+
+
+class SnapshotStorageBackend(BasicStorageBackend):
+    """
+    Read-only backend over a snapshot file written by ``write_snapshot()``.
+
+    The file is memory-mapped and never parsed up front: opening costs the
+    same for ten keys or ten million, and each lookup is a binary search over
+    the fixed-size entry table that touches only the pages it needs.
+
+    With ``zero_copy=True`` bytes values are returned as ``memoryview``
+    slices of the mapping instead of copies. Such views must be released
+    before ``close()`` can unmap the file, and they aren't understood by
+    codecs or compression, so use it with plain bytes values.
+    """
+
+    def __init__(self, app_namespace: str, path: Optional[str] = None, zero_copy: bool = False) -> None:
+        super().__init__(app_namespace)
+        self.path = path or os.path.join(self.app_storage_path, SNAPSHOT_PATH)
+        self.zero_copy = zero_copy
+        try:
+            with open(self.path, "rb") as snapshot_file:
+                self.map = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            raise localStoragePyStorageException(f"No snapshot at '{self.path}', write one with exportSnapshot() first!")
+        except ValueError:
+            raise localStoragePyStorageException(f"Snapshot '{self.path}' is empty!")
+        self.view = memoryview(self.map)
+        if len(self.map) < HEADER.size:
+            raise localStoragePyStorageException(f"Snapshot '{self.path}' is truncated!")
+        magic, version, self.count, self.index_offset, self.keys_offset, self.values_offset = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            raise localStoragePyStorageException(f"'{self.path}' is not a localStoragePro snapshot!")
+
+    def raise_read_only(self) -> None:
+        raise localStoragePyStorageException("Snapshots are read-only!")
+
+    def entry(self, position: int) -> Tuple[int, int, int, float, int, int]:
+        return ENTRY.unpack_from(self.map, self.index_offset + position * ENTRY.size)
+
+    def key_at(self, position: int) -> bytes:
+        key_offset, _, _, _, key_length, _ = self.entry(position)
+        start = self.keys_offset + key_offset
+        return self.map[start:start + key_length]
+
+    def bisect(self, key: bytes) -> int:
+        # Position of the first entry whose key is >= key
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find(self, item: str) -> Optional[int]:
+        key = item.encode("utf-8")
+        position = self.bisect(key)
+        if position < self.count and self.key_at(position) == key:
+            return position
+        return None
+
+    def read(self, position: int, now: float) -> Optional[Tuple[str, Union[str, bytes, memoryview]]]:
+        # Returns (key, value), or None if the key has expired since the snapshot was taken
+        key_offset, value_offset, value_length, expires_at, key_length, value_type = self.entry(position)
+        if not math.isnan(expires_at) and expires_at <= now:
+            return None
+        key_start = self.keys_offset + key_offset
+        key = str(self.view[key_start:key_start + key_length], "utf-8")
+        value_start = self.values_offset + value_offset
+        value = self.view[value_start:value_start + value_length]
+        if value_type == _TYPE_STR:
+            return key, str(value, "utf-8")
+        return key, value if self.zero_copy else value.tobytes()
+
+    def read_range(self, low: int, high: int) -> Iterator[Tuple[str, Any]]:
+        now = time.time()
+        for position in range(low, high):
+            pair = self.read(position, now)
+            if pair is not None:
+                yield pair
+
+    def get_item(self, item: str) -> Any:
+        position = self.find(item)
+        if position is None:
+            return None
+        pair = self.read(position, time.time())
+        return pair[1] if pair is not None else None
+
+    def get_all(self) -> Dict[str, Any]:
+        return dict(self.read_range(0, self.count))
+
+    def get_many(self, items: List[str]) -> Dict[str, Any]:
+        result = {}
+        for key in items:
+            value = self.get_item(key)
+            if value is not None:
+                result[key] = value
+        return result
+
+    def iter_keys(self) -> Iterator[str]:
+        for key, _ in self.read_range(0, self.count):
+            yield key
+
+    def iter_items(self) -> Iterator[Tuple[str, Any]]:
+        return self.read_range(0, self.count)
+
+    def page(self, after_key: Optional[str] = None, limit: int = 100) -> List[Tuple[str, Any]]:
+        low = 0
+        if after_key is not None:
+            low = self.bisect(after_key.encode("utf-8"))
+            if low < self.count and self.key_at(low) == after_key.encode("utf-8"):
+                low += 1
+        result = []
+        for pair in self.read_range(low, self.count):
+            result.append(pair)
+            if len(result) >= limit:
+                break
+        return result
+
+    def get_range(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+        low = self.bisect(start.encode("utf-8")) if start is not None else 0
+        high = self.bisect(end.encode("utf-8")) if end is not None else self.count
+        return dict(self.read_range(low, high))
+
+    def get_expiries(self, items: List[str]) -> Dict[str, float]:
+        result = {}
+        for key in items:
+            position = self.find(key)
+            if position is not None:
+                expires_at = self.entry(position)[3]
+                if not math.isnan(expires_at):
+                    result[key] = expires_at
+        return result
+
+    def set_item(self, item: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.raise_read_only()
+
+    def remove_item(self, item: str) -> None:
+        self.raise_read_only()
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        self.raise_read_only()
+
+    def remove_many(self, items: List[str]) -> None:
+        self.raise_read_only()
+
+    def remove_all(self) -> None:
+        self.raise_read_only()
+
+    def clear(self) -> None:
+        self.raise_read_only()
+
+    def close(self) -> None:
+        self.view.release()
+        try:
+            self.map.close()
+        except BufferError:
+            # zero_copy views are still alive, the mapping goes away with the last of them
+            pass
@@ -0,0 +1,434 @@
+"""SQLite storage backend."""
+
+import os
+import time
+import sqlite3
+import contextlib
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .storage_backends import (
+    BasicStorageBackend,
+    coerce_value,
+    expiry_time,
+    localStoragePyStorageException,
+    synchronized,
+)
+
+# Connection-level tuning for SQLiteStorageBackend. "throughput" trades a
+# little durability (a power loss may drop the last commits, never corrupt
+# the file) for concurrent readers and cheap commits; "durable" keeps WAL's
+# reader/writer concurrency but fsyncs on every commit.
+SQLITE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {},
+    "throughput": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+    },
+    "durable": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+    },
+}
+
+# Pragmas are applied in this order; busy_timeout goes first so that
+# switching journal_mode waits for other connections instead of failing.
+_SQLITE_PRAGMA_CHOICES: Dict[str, Optional[tuple]] = {
+    "busy_timeout": None,
+    "journal_mode": ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"),
+    "synchronous": ("OFF", "NORMAL", "FULL", "EXTRA"),
+    "mmap_size": None,
+    "cache_size": None,
+    "temp_store": ("DEFAULT", "FILE", "MEMORY"),
+}
+
+
+def resolve_sqlite_profile(profile: Union[str, Dict[str, Any], None]) -> Dict[str, Any]:
+    """Turn a profile name or pragma dict into a validated pragma dict."""
+    if profile is None:
+        return {}
+    if isinstance(profile, str):
+        if profile not in SQLITE_PROFILES:
+            raise localStoragePyStorageException(f"Unknown SQLite profile '{profile}'!")
+        profile = SQLITE_PROFILES[profile]
+    pragmas = {}
+    for name, value in profile.items():
+        if name not in _SQLITE_PRAGMA_CHOICES:
+            raise localStoragePyStorageException(f"Unsupported SQLite pragma '{name}'!")
+        choices = _SQLITE_PRAGMA_CHOICES[name]
+        if choices is None:
+            if isinstance(value, bool) or not isinstance(value, int):
+                raise localStoragePyStorageException(f"SQLite pragma '{name}' must be an integer!")
+        else:
+            value = str(value).upper()
+            if value not in choices:
+                raise localStoragePyStorageException(f"SQLite pragma '{name}' must be one of {', '.join(choices)}!")
+        pragmas[name] = value
+    return {name: pragmas[name] for name in _SQLITE_PRAGMA_CHOICES if name in pragmas}
+
+
+def upsert_statement(columns: Sequence[str], key_columns: Sequence[str]) -> str:
+    """INSERT into localStoragePro that overwrites the row with the same key_columns."""
+    placeholders = ", ".join("?" for _ in columns)
+    insert = f"INTO localStoragePro ({', '.join(columns)}) VALUES ({placeholders})"
+    # UPSERT needs SQLite 3.24+, older libraries replace the row instead
+    if sqlite3.sqlite_version_info < (3, 24, 0):
+        return f"INSERT OR REPLACE {insert}"
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column not in key_columns)
+    return f"INSERT {insert} ON CONFLICT({', '.join(key_columns)}) DO UPDATE SET {updates}"
+
+
+def sql_limit(limit: Optional[int]) -> int:
+    """Bind value for a LIMIT ? placeholder, where None means every row."""
+    # LIMIT -1 means no limit in SQLite
+    return -1 if limit is None else limit
+
+
+def apply_pragmas(cursor: sqlite3.Cursor, pragmas: Dict[str, Any]) -> None:
+    """Run pragmas returned by resolve_sqlite_profile on a connection."""
+    # Values were validated by resolve_sqlite_profile, pragmas can't be bound as parameters
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name} = {value}").fetchall()
+
+
+@contextlib.contextmanager
+def nested_transaction(owner: Any, before_begin: Callable[[], None]) -> Iterator[None]:
+    """
+    Transaction on ``owner``'s connection that commits when the block exits
+    and rolls back if it raises; nested blocks become savepoints.
+
+    ``owner`` provides ``lock``, ``db_connection``, ``db_cursor`` and an
+    integer ``transaction_depth``, which writes check to leave commits to the
+    outermost block. ``before_begin`` runs under the lock before the
+    outermost BEGIN, to settle anything already pending on the connection.
+    """
+    with owner.lock:
+        depth = owner.transaction_depth
+        if depth == 0:
+            before_begin()
+            owner.db_cursor.execute("BEGIN IMMEDIATE")
+        else:
+            owner.db_cursor.execute(f"SAVEPOINT localStoragePro_{depth}")
+        owner.transaction_depth += 1
+        try:
+            yield
+        except BaseException:
+            owner.transaction_depth -= 1
+            if depth == 0:
+                owner.db_connection.rollback()
+            else:
+                owner.db_cursor.execute(f"ROLLBACK TO localStoragePro_{depth}")
+                owner.db_cursor.execute(f"RELEASE localStoragePro_{depth}")
+            raise
+        owner.transaction_depth -= 1
+        if depth == 0:
+            try:
+                owner.db_connection.commit()
+            except Exception:
+                owner.db_connection.rollback()
+                raise
+        else:
+            owner.db_cursor.execute(f"RELEASE localStoragePro_{depth}")
+
+
+class SQLiteStorageBackend(BasicStorageBackend):
+    """
+    SQLite backed storage.
+
+    By default every write is committed on its own. Passing ``commit_batch_size``
+    and/or ``commit_interval_ms`` enables group commit: writes accumulate in an
+    open transaction that is committed once that many writes are pending or that
+    many milliseconds have passed since the first of them, whichever comes
+    first. Reads on the same instance see pending writes; other connections only
+    see them after ``flush()``.
+
+    Every operation uses one fixed SQL string, so the connection's statement
+    cache (``cached_statements`` entries) prepares each of them only once.
+
+    ``transaction()`` groups writes into one transaction that commits when
+    the block exits and rolls back if it raises; nested blocks become
+    savepoints, so an inner failure only undoes that block's writes.
+
+    Keys stored with a ttl get an ``expires_at`` deadline, covered by a
+    partial index over just those rows. Reads skip expired rows and
+    ``purge_expired()`` deletes them in batches through that index.
+    """
+
+    # Reads bind the current time.time() as their last parameter
+    LIVE = "(expires_at IS NULL OR expires_at > ?)"
+    SQL_GET_ITEM = f"SELECT value FROM localStoragePro WHERE key = ? AND {LIVE}"
+    SQL_GET_ALL = f"SELECT key, value FROM localStoragePro WHERE {LIVE}"
+    SQL_SET_ITEM = upsert_statement(("key", "value", "expires_at"), ("key",))
+    SQL_REMOVE_ITEM = "DELETE FROM localStoragePro WHERE key = ?"
+    SQL_REMOVE_ALL = "DELETE FROM localStoragePro"
+    SQL_FIRST_PAGE = f"SELECT key, value FROM localStoragePro WHERE {LIVE} ORDER BY key LIMIT ?"
+    SQL_NEXT_PAGE = f"SELECT key, value FROM localStoragePro WHERE key > ? AND {LIVE} ORDER BY key LIMIT ?"
+    SQL_FIRST_KEYS = f"SELECT key FROM localStoragePro WHERE {LIVE} ORDER BY key LIMIT ?"
+    SQL_NEXT_KEYS = f"SELECT key FROM localStoragePro WHERE key > ? AND {LIVE} ORDER BY key LIMIT ?"
+    # Range scans over the primary key index; prefixes become ranges, since LIKE can't use it
+    SQL_GET_RANGE = f"SELECT key, value FROM localStoragePro WHERE key >= ? AND key < ? AND {LIVE} ORDER BY key"
+    SQL_GET_FROM = f"SELECT key, value FROM localStoragePro WHERE key >= ? AND {LIVE} ORDER BY key"
+    SQL_PURGE_EXPIRED = ("DELETE FROM localStoragePro WHERE key IN "
+                         "(SELECT key FROM localStoragePro WHERE expires_at <= ? ORDER BY expires_at LIMIT ?)")
+    SQL_CREATE_TABLE = "CREATE TABLE {table} (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)"
+    SQL_CREATE_EXPIRY_INDEX = ("CREATE INDEX IF NOT EXISTS localStoragePro_expires_at "
+                               "ON localStoragePro (expires_at) WHERE expires_at IS NOT NULL")
+
+    def __init__(self, app_namespace: str, profile: Union[str, Dict[str, Any], None] = None,
+                 commit_batch_size: Optional[int] = None, commit_interval_ms: Optional[float] = None,
+                 cached_statements: int = 128) -> None:
+        super().__init__(app_namespace)
+        if commit_batch_size is not None and commit_batch_size < 1:
+            raise localStoragePyStorageException("commit_batch_size must be at least 1!")
+        if commit_interval_ms is not None and commit_interval_ms <= 0:
+            raise localStoragePyStorageException("commit_interval_ms must be positive!")
+        self.pragmas = resolve_sqlite_profile(profile)
+        self.commit_batch_size = commit_batch_size
+        self.commit_interval_ms = commit_interval_ms
+        self.group_commit = commit_batch_size is not None or commit_interval_ms is not None
+        self.pending_writes = 0
+        # Open transaction() blocks, commits are left to the outermost one
+        self.transaction_depth = 0
+        self.lock = threading.RLock()
+        self.flush_timer: Optional[threading.Timer] = None
+        self.db_path = os.path.join(self.app_storage_path, "localStorageSQLite.db")
+        # The flush timer and the expiry sweeper use the connection from their own
+        # threads; every use of it is serialized on self.lock
+        self.db_connection = sqlite3.connect(self.db_path, check_same_thread=False,
+                                             cached_statements=cached_statements)
+        self.db_cursor = self.db_connection.cursor()
+        self.apply_pragmas()
+
+        empty = self.db_cursor.execute("SELECT name FROM sqlite_master").fetchall()
+        if empty == []:
+            self.create_default_tables()
+        else:
+            self.migrate_value_column()
+            self.migrate_expiry_column()
+
+    def apply_pragmas(self) -> None:
+        apply_pragmas(self.db_cursor, self.pragmas)
+
+    def create_default_tables(self) -> None:
+        # BLOB affinity keeps bytes as bytes and text as text
+        self.db_cursor.execute(self.SQL_CREATE_TABLE.format(table="localStoragePro"))
+        self.db_cursor.execute(self.SQL_CREATE_EXPIRY_INDEX)
+        if not self.transaction_depth:
+            self.db_connection.commit()
+
+    def column_type(self, column_name: str = "value") -> Optional[str]:
+        for column in self.db_cursor.execute("PRAGMA table_info(localStoragePro)").fetchall():
+            if column[1] == column_name:
+                return column[2].upper()
+        return None
+
+    def migrate_value_column(self) -> None:
+        # Databases created before codec support declared the value column TEXT
+        if self.column_type() != "TEXT":
+            return
+        self.db_connection.commit()
+        self.db_cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the write lock
+            if self.column_type() == "TEXT":
+                self.db_cursor.execute(self.SQL_CREATE_TABLE.format(table="localStoragePro_migrating"))
+                self.db_cursor.execute("INSERT INTO localStoragePro_migrating (key, value) SELECT key, value FROM localStoragePro")
+                self.db_cursor.execute("DROP TABLE localStoragePro")
+                self.db_cursor.execute("ALTER TABLE localStoragePro_migrating RENAME TO localStoragePro")
+                self.db_cursor.execute(self.SQL_CREATE_EXPIRY_INDEX)
+            self.db_connection.commit()
+        except Exception:
+            self.db_connection.rollback()
+            raise
+
+    def migrate_expiry_column(self) -> None:
+        # Databases created before ttl support have no expires_at column
+        if self.column_type("expires_at") is not None:
+            return
+        self.db_connection.commit()
+        self.db_cursor.execute("BEGIN IMMEDIATE")
+        try:
+            if self.column_type("expires_at") is None:
+                self.db_cursor.execute("ALTER TABLE localStoragePro ADD COLUMN expires_at REAL")
+                self.db_cursor.execute(self.SQL_CREATE_EXPIRY_INDEX)
+            self.db_connection.commit()
+        except Exception:
+            self.db_connection.rollback()
+            raise
+
+    def commit_write(self, count: int = 1) -> None:
+        if self.transaction_depth:
+            return
+        if not self.group_commit:
+            self.db_connection.commit()
+            return
+        self.pending_writes += count
+        if self.commit_batch_size is not None and self.pending_writes >= self.commit_batch_size:
+            self.flush()
+        elif self.commit_interval_ms is not None and self.flush_timer is None:
+            self.flush_timer = threading.Timer(self.commit_interval_ms / 1000, self.flush)
+            self.flush_timer.daemon = True
+            self.flush_timer.start()
+
+    def execute_batch(self, query: str, rows: List[tuple]) -> None:
+        try:
+            self.db_cursor.executemany(query, rows)
+        except Exception:
+            # Outside group commit the batch is its own transaction, keep it all-or-nothing
+            if not self.group_commit and not self.transaction_depth:
+                self.db_connection.rollback()
+            raise
+        self.commit_write(len(rows))
+
+    def transaction(self) -> Any:
+        # Writes still pending from group commit go out in their own transaction
+        return nested_transaction(self, self.flush)
+
+    @synchronized
+    def flush(self) -> None:
+        if self.transaction_depth:
+            # The enclosing transaction() commits everything when it exits
+            return
+        if self.flush_timer is not None:
+            self.flush_timer.cancel()
+            self.flush_timer = None
+        if self.db_connection.in_transaction:
+            self.db_connection.commit()
+        self.pending_writes = 0
+
+    @synchronized
+    def data_version(self) -> Optional[int]:
+        # Only bumped by commits from other connections, our own writes don't count
+        return self.db_cursor.execute("PRAGMA data_version").fetchone()[0]
+
+    @synchronized
+    def get_item(self, item: str) -> Optional[str]:
+        fetched_value = self.db_cursor.execute(self.SQL_GET_ITEM, (item, time.time())).fetchone()
+        if type(fetched_value) is tuple:
+            return fetched_value[0]
+        else:
+            return None
+
+    @synchronized
+    def get_all(self) -> Dict[str, str]:
+        result = {}
+        fetched_values = self.db_cursor.execute(self.SQL_GET_ALL, (time.time(),)).fetchall()
+        for key, value in fetched_values:
+            result[key] = value
+        return result
+
+    @synchronized
+    def get_many(self, items: List[str]) -> Dict[str, str]:
+        result = {}
+        placeholders = ", ".join(["?" for _ in items])
+        if not items:
+            return result
+        query = f"SELECT key, value FROM localStoragePro WHERE key IN ({placeholders}) AND {self.LIVE}"
+        fetched_values = self.db_cursor.execute(query, [*items, time.time()]).fetchall()
+        for key, value in fetched_values:
+            result[key] = value
+        return result
+
+    @synchronized
+    def page(self, after_key: Optional[str] = None, limit: int = 100) -> List[Tuple[str, str]]:
+        # Keyset pagination, each page is one range scan of the primary key index
+        if after_key is None:
+            cursor = self.db_connection.execute(self.SQL_FIRST_PAGE, (time.time(), limit))
+        else:
+            cursor = self.db_connection.execute(self.SQL_NEXT_PAGE, (after_key, time.time(), limit))
+        try:
+            return cursor.fetchmany(limit)
+        finally:
+            cursor.close()
+
+    @synchronized
+    def get_range(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, str]:
+        if end is None:
+            fetched_values = self.db_cursor.execute(self.SQL_GET_FROM, (start or "", time.time())).fetchall()
+        else:
+            fetched_values = self.db_cursor.execute(self.SQL_GET_RANGE, (start or "", end, time.time())).fetchall()
+        return dict(fetched_values)
+
+    @synchronized
+    def get_expiries(self, items: List[str]) -> Dict[str, float]:
+        if not items:
+            return {}
+        placeholders = ", ".join(["?" for _ in items])
+        query = f"SELECT key, expires_at FROM localStoragePro WHERE key IN ({placeholders}) AND expires_at IS NOT NULL"
+        return dict(self.db_cursor.execute(query, items).fetchall())
+
+    @synchronized
+    def purge_expired(self, limit: Optional[int] = None) -> int:
+        self.db_cursor.execute(self.SQL_PURGE_EXPIRED, (time.time(), sql_limit(limit)))
+        purged = self.db_cursor.rowcount
+        if purged:
+            self.commit_write(purged)
+        return purged
+
+    def iter_items(self, batch_size: int = 1000) -> Iterator[Tuple[str, str]]:
+        # Pages are fetched one at a time, so no read transaction stays open between yields
+        after_key = None
+        while True:
+            rows = self.page(after_key, batch_size)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after_key = rows[-1][0]
+
+    def iter_keys(self, batch_size: int = 1000) -> Iterator[str]:
+        after_key = None
+        while True:
+            with self.lock:
+                if after_key is None:
+                    cursor = self.db_connection.execute(self.SQL_FIRST_KEYS, (time.time(), batch_size))
+                else:
+                    cursor = self.db_connection.execute(self.SQL_NEXT_KEYS, (after_key, time.time(), batch_size))
+                keys = [key for (key,) in cursor.fetchmany(batch_size)]
+                cursor.close()
+            yield from keys
+            if len(keys) < batch_size:
+                return
+            after_key = keys[-1]
+
+    @synchronized
+    def set_item(self, item: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.db_cursor.execute(self.SQL_SET_ITEM, (item, coerce_value(value), expiry_time(ttl)))
+        self.commit_write()
+
+    @synchronized
+    def remove_item(self, item: str) -> None:
+        self.db_cursor.execute(self.SQL_REMOVE_ITEM, (item,))
+        self.commit_write()
+
+    @synchronized
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        expires_at = expiry_time(ttl)
+        rows = [(key, coerce_value(value), expires_at) for key, value in items.items()]
+        self.execute_batch(self.SQL_SET_ITEM, rows)
+
+    @synchronized
+    def remove_many(self, items: List[str]) -> None:
+        self.execute_batch(self.SQL_REMOVE_ITEM, [(key,) for key in items])
+
+    @synchronized
+    def remove_all(self) -> None:
+        self.db_cursor.execute(self.SQL_REMOVE_ALL)
+        self.commit_write()
+
+    @synchronized
+    def clear(self) -> None:
+        self.db_cursor.execute("DROP TABLE localStoragePro")
+        self.create_default_tables()
+        self.flush()
+
+    @synchronized
+    def close(self) -> None:
+        self.flush()
+        self.db_cursor.close()
+        self.db_connection.close()
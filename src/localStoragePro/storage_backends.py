@@ -1,22 +1,157 @@
 import os
-import json
+import sys
+import time
 import stat
-import pathlib
 import shutil
-import sqlite3
-from typing import Any, Optional, Dict, List
+import heapq
+import bisect
+import hashlib
+import functools
+import importlib
+import threading
+import urllib.parse
+from typing import Any, Callable, Optional, Dict, Iterable, Iterator, List, Tuple, Union
+
+# Backends living in their own modules, imported on first use so that e.g. a
+# text-only script never loads sqlite3 or json. Still importable from here.
+_LAZY_ATTRIBUTES = {
+    "SQLiteStorageBackend": "sqlite_storage",
+    "SQLITE_PROFILES": "sqlite_storage",
+    "resolve_sqlite_profile": "sqlite_storage",
+    "JSONStorageBackend": "json_storage",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(f".{_LAZY_ATTRIBUTES[name]}", __package__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class localStoragePyStorageException(Exception):
     pass
 
 
+def coerce_value(value: Any) -> Union[str, bytes]:
+    """Values are stored as text, except bytes-like values (e.g. from a codec)."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value)
+    return str(value)
+
+
+def prefix_end(prefix: str) -> Optional[str]:
+    """Smallest key greater than every key starting with prefix, or None if there is none."""
+    while prefix:
+        code_point = ord(prefix[-1]) + 1
+        if 0xD800 <= code_point <= 0xDFFF:
+            # Surrogates can't be encoded for SQLite, skip straight past them
+            code_point = 0xE000
+        if code_point <= sys.maxunicode:
+            return prefix[:-1] + chr(code_point)
+        prefix = prefix[:-1]
+    return None
+
+
+class SortedKeyIndex:
+    """Sorted list of keys for range scans, updated in place as keys come and go."""
+
+    def __init__(self, keys: Any = ()) -> None:
+        self.keys: List[str] = sorted(keys)
+
+    def add(self, key: str) -> None:
+        position = bisect.bisect_left(self.keys, key)
+        if position == len(self.keys) or self.keys[position] != key:
+            self.keys.insert(position, key)
+
+    def discard(self, key: str) -> None:
+        position = bisect.bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            del self.keys[position]
+
+    def range(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        low = bisect.bisect_left(self.keys, start) if start is not None else 0
+        high = bisect.bisect_left(self.keys, end) if end is not None else len(self.keys)
+        return self.keys[low:high]
+
+
+def synchronized(method: Callable) -> Callable:
+    """Serialize a backend method on the instance's ``lock``."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def expiry_time(ttl: Optional[float]) -> Optional[float]:
+    """Turn a time to live in seconds into an absolute time.time() deadline."""
+    if ttl is None:
+        return None
+    if ttl <= 0:
+        raise localStoragePyStorageException("ttl must be positive!")
+    return time.time() + ttl
+
+
+class ExpiryHeap:
+    """
+    Expiry deadlines of keys, with a min-heap to find the next ones to expire.
+
+    Overwritten and removed keys leave stale heap entries behind, they are
+    skipped when popped instead of being searched for.
+    """
+
+    def __init__(self) -> None:
+        self.deadlines: Dict[str, float] = {}
+        self.heap: List[Tuple[float, str]] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.deadlines)
+
+    def set(self, key: str, expires_at: Optional[float]) -> None:
+        if expires_at is None:
+            self.deadlines.pop(key, None)
+            return
+        self.deadlines[key] = expires_at
+        heapq.heappush(self.heap, (expires_at, key))
+
+    def discard(self, key: str) -> None:
+        self.deadlines.pop(key, None)
+
+    def clear(self) -> None:
+        self.deadlines = {}
+        self.heap = []
+
+    def is_expired(self, key: str, now: Optional[float] = None) -> bool:
+        expires_at = self.deadlines.get(key)
+        return expires_at is not None and expires_at <= (time.time() if now is None else now)
+
+    def live(self, keys: Iterable[str], now: Optional[float] = None) -> List[str]:
+        if not self.deadlines:
+            return list(keys)
+        now = time.time() if now is None else now
+        return [key for key in keys if not self.is_expired(key, now)]
+
+    def deadlines_of(self, keys: Iterable[str]) -> Dict[str, float]:
+        return {key: self.deadlines[key] for key in keys if key in self.deadlines}
+
+    def pop_expired(self, now: float, limit: Optional[int] = None) -> List[str]:
+        expired = []
+        while self.heap and self.heap[0][0] <= now and (limit is None or len(expired) < limit):
+            expires_at, key = heapq.heappop(self.heap)
+            if self.deadlines.get(key) == expires_at:
+                del self.deadlines[key]
+                expired.append(key)
+        return expired
+
+
 class BasicStorageBackend:
+    # Backends that track key deadlines in memory set this to their ExpiryHeap
+    expiry: Optional[ExpiryHeap] = None
+
     def __init__(self, app_namespace: str) -> None:
-        # self.base_storage_path = os.path.join(pathlib.Path.home() , ".config", "LocalStoragePro")
         if app_namespace.count(os.sep) > 0:
             raise localStoragePyStorageException('app_namespace may not contain path separators!')
-        self.app_storage_path = os.path.join(pathlib.Path.home() , ".config", "localStoragePro", app_namespace)
+        self.app_storage_path = os.path.join(os.path.expanduser("~"), ".config", "localStoragePro", app_namespace)
         if not os.path.isdir(self.app_storage_path):
             os.makedirs(os.path.join(self.app_storage_path))
 
@@ -27,12 +162,18 @@ class BasicStorageBackend:
         self.raise_dummy_exception()
         return None
 
-    def set_item(self, item: str, value: Any) -> None:
+    def set_item(self, item: str, value: Any, ttl: Optional[float] = None) -> None:
         self.raise_dummy_exception()
 
     def remove_item(self, item: str) -> None:
         self.raise_dummy_exception()
 
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        self.raise_dummy_exception()
+
+    def remove_many(self, items: List[str]) -> None:
+        self.raise_dummy_exception()
+
     def get_all(self) -> Dict[str, str]:
         self.raise_dummy_exception()
         return {}
@@ -44,38 +185,310 @@ class BasicStorageBackend:
     def remove_all(self) -> None:
         self.raise_dummy_exception()
 
+    def iter_keys(self) -> Iterator[str]:
+        self.raise_dummy_exception()
+        return iter(())
+
+    def iter_items(self) -> Iterator[Tuple[str, str]]:
+        self.raise_dummy_exception()
+        return iter(())
+
+    def page(self, after_key: Optional[str] = None, limit: int = 100) -> List[Tuple[str, str]]:
+        self.raise_dummy_exception()
+        return []
+
+    def get_range(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, str]:
+        self.raise_dummy_exception()
+        return {}
+
+    def get_by_prefix(self, prefix: str) -> Dict[str, str]:
+        return self.get_range(prefix, prefix_end(prefix))
+
+    def live_keys(self, keys: Iterable[str]) -> List[str]:
+        # A list copy without the expired keys, so callers can iterate it while writes happen
+        return self.expiry.live(keys) if self.expiry is not None else list(keys)
+
+    def get_expiries(self, items: List[str]) -> Dict[str, float]:
+        # time.time() deadlines of those keys that have a ttl
+        return self.expiry.deadlines_of(items) if self.expiry is not None else {}
+
+    def purge_expired(self, limit: Optional[int] = None) -> int:
+        # Deletes up to limit expired keys, returns how many were deleted
+        return 0
+
     def clear(self) -> None:
         self.raise_dummy_exception()
-        
+
+    def flush(self) -> None:
+        pass
+
+    def data_version(self) -> Optional[int]:
+        # Changes whenever another connection or process writes; None if the backend can't tell
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class StorageBackendWrapper:
+    """
+    Passes every backend call on to the wrapped ``backend``.
+
+    Layers such as the cache, compression, codecs and metrics subclass this and
+    override only the calls they change. Every call goes through ``forward``,
+    so a layer that treats all calls alike can override just that.
+    """
+
+    def __init__(self, backend: BasicStorageBackend) -> None:
+        self.backend = backend
+
+    def forward(self, operation: str, *args: Any) -> Any:
+        return getattr(self.backend, operation)(*args)
+
+    def get_item(self, item: str) -> Any:
+        return self.forward("get_item", item)
+
+    def get_all(self) -> Dict[str, Any]:
+        return self.forward("get_all")
+
+    def get_many(self, items: List[str]) -> Dict[str, Any]:
+        return self.forward("get_many", items)
+
+    def iter_keys(self) -> Iterator[str]:
+        return self.forward("iter_keys")
+
+    def iter_items(self) -> Iterator[Tuple[str, Any]]:
+        return self.forward("iter_items")
+
+    def page(self, after_key: Optional[str] = None, limit: int = 100) -> List[Tuple[str, Any]]:
+        return self.forward("page", after_key, limit)
+
+    def get_range(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+        return self.forward("get_range", start, end)
+
+    def get_by_prefix(self, prefix: str) -> Dict[str, Any]:
+        return self.forward("get_by_prefix", prefix)
+
+    def get_expiries(self, items: List[str]) -> Dict[str, float]:
+        return self.forward("get_expiries", items)
+
+    def purge_expired(self, limit: Optional[int] = None) -> int:
+        return self.forward("purge_expired", limit)
+
+    def set_item(self, item: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.forward("set_item", item, value, ttl)
+
+    def remove_item(self, item: str) -> None:
+        self.forward("remove_item", item)
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        self.forward("set_many", items, ttl)
+
+    def remove_many(self, items: List[str]) -> None:
+        self.forward("remove_many", items)
+
+    def remove_all(self) -> None:
+        self.forward("remove_all")
+
+    def clear(self) -> None:
+        self.forward("clear")
+
+    def flush(self) -> None:
+        self.forward("flush")
+
+    def data_version(self) -> Optional[int]:
+        return self.forward("data_version")
+
+    def close(self) -> None:
+        self.forward("close")
+
+
+class EncodingStorageBackendWrapper(StorageBackendWrapper):
+    """Wrapper that runs values through ``encode`` on the way in and ``decode`` on the way out."""
+
+    def encode(self, value: Any) -> Any:
+        return value
+
+    def decode(self, value: Any) -> Any:
+        return value
+
+    def get_item(self, item: str) -> Any:
+        return self.decode(self.backend.get_item(item))
+
+    def get_all(self) -> Dict[str, Any]:
+        return {key: self.decode(value) for key, value in self.backend.get_all().items()}
+
+    def get_many(self, items: List[str]) -> Dict[str, Any]:
+        return {key: self.decode(value) for key, value in self.backend.get_many(items).items()}
+
+    def iter_items(self) -> Iterator[Tuple[str, Any]]:
+        for key, value in self.backend.iter_items():
+            yield key, self.decode(value)
+
+    def page(self, after_key: Optional[str] = None, limit: int = 100) -> List[Tuple[str, Any]]:
+        return [(key, self.decode(value)) for key, value in self.backend.page(after_key, limit)]
+
+    def get_range(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+        return {key: self.decode(value) for key, value in self.backend.get_range(start, end).items()}
+
+    def get_by_prefix(self, prefix: str) -> Dict[str, Any]:
+        return {key: self.decode(value) for key, value in self.backend.get_by_prefix(prefix).items()}
+
+    def set_item(self, item: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.backend.set_item(item, self.encode(value), ttl)
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        self.backend.set_many({key: self.encode(value) for key, value in items.items()}, ttl)
+
 
 class TextStorageBackend(BasicStorageBackend):
-    def __init__(self, app_namespace: str) -> None:
+    """
+    One file per key.
+
+    The default ``layout="flat"`` keeps every key file in the namespace
+    directory. ``layout="sharded"`` spreads them over two levels of
+    hex-prefix subdirectories taken from a hash of the key, and percent-encodes
+    file names so keys may contain path separators. Opening a flat store with
+    the sharded layout migrates it once, in place. Flat stores are marked by a
+    hidden ``.flat-layout`` directory, created whenever one is opened, so that
+    only their key files are migrated and not e.g. another backend's database
+    in the same namespace.
+
+    With ``binary=True`` files are read back as bytes, for use with a codec.
+
+    Range and prefix scans use a sorted index of the keys, built by one
+    directory scan on first use and then kept in step with this instance's
+    writes. Keys added by other processes after that show up once
+    ``rebuild_key_index()`` is called.
+
+    Deadlines of keys stored with a ttl live in a hidden ``.expiry``
+    directory, one file per key, and are loaded into memory on open.
+    """
+
+    LAYOUTS = ("flat", "sharded")
+    SHARD_LEVELS = 2
+    # Files of the other backends, never keys even when they share a flat namespace directory
+    FOREIGN_FILE_PREFIXES = ("localStorageSQLite.db", "localStorageJSON.", "localStorageDBM", "localStorageLog.")
+
+    def __init__(self, app_namespace: str, layout: str = "flat", binary: bool = False) -> None:
         super().__init__(app_namespace)
+        if layout not in self.LAYOUTS:
+            raise localStoragePyStorageException(f"Unknown text layout '{layout}'!")
+        self.layout = layout
+        self.binary = binary
+        self.read_mode = "rb" if binary else "r"
+        self.key_index: Optional[SortedKeyIndex] = None
+        self.lock = threading.RLock()
+        # Never a key file: flat layout only lists files, sharded layout only hex directories
+        self.expiry_path = os.path.join(self.app_storage_path, ".expiry")
+        self.expiry = ExpiryHeap()
+        self.flat_marker_path = os.path.join(self.app_storage_path, ".flat-layout")
+        if self.layout == "sharded":
+            self.migrate_flat_layout()
+        else:
+            os.makedirs(self.flat_marker_path, exist_ok=True)
+        self.load_expiry()
 
     def shutil_error_path(self, func: Any, path: str, exc_info: Any) -> None:
         if not os.access(path, os.W_OK):
             os.chmod(path, stat.S_IWUSR)
         func(path)
 
+    @staticmethod
+    def encode_key(key: str) -> str:
+        filename = urllib.parse.quote(key, safe="")
+        # quote() leaves dots alone, which would make "." and ".." special names
+        if filename.startswith("."):
+            filename = "%2E" + filename[1:]
+        return filename
+
+    @staticmethod
+    def decode_key(filename: str) -> str:
+        return urllib.parse.unquote(filename)
+
+    def get_shard_path(self, key: str) -> str:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+        shards = [digest[level * 2:level * 2 + 2] for level in range(self.SHARD_LEVELS)]
+        return os.path.join(self.app_storage_path, *shards)
+
     def get_file_path(self, key: str) -> str:
+        if self.layout == "sharded":
+            return os.path.join(self.get_shard_path(key), self.encode_key(key))
         return os.path.join(self.app_storage_path, key)
 
+    def migrate_flat_layout(self) -> None:
+        # Without the marker no flat store ever lived here, regular files belong to someone else
+        if not os.path.isdir(self.flat_marker_path):
+            return
+        with os.scandir(self.app_storage_path) as entries:
+            flat_files = [entry for entry in entries
+                          if entry.is_file() and not entry.name.startswith(self.FOREIGN_FILE_PREFIXES)]
+        for entry in flat_files:
+            shard_path = self.get_shard_path(entry.name)
+            os.makedirs(shard_path, exist_ok=True)
+            os.replace(entry.path, os.path.join(shard_path, self.encode_key(entry.name)))
+        os.rmdir(self.flat_marker_path)
+
+    def load_expiry(self) -> None:
+        if not os.path.isdir(self.expiry_path):
+            return
+        with os.scandir(self.expiry_path) as entries:
+            for entry in entries:
+                try:
+                    with open(entry.path, "r") as expiry_file:
+                        self.expiry.set(self.decode_key(entry.name), float(expiry_file.read()))
+                except (OSError, ValueError):
+                    continue
+
+    def get_expiry_file_path(self, key: str) -> str:
+        return os.path.join(self.expiry_path, self.encode_key(key))
+
+    def iter_files(self) -> Any:
+        now = time.time()
+        for key, path in self.iter_all_files():
+            if not (self.expiry and self.expiry.is_expired(key, now)):
+                yield key, path
+
+    def iter_all_files(self) -> Any:
+        # Yields (key, path); DirEntry.is_file/is_dir use the cached d_type, no stat per entry
+        if not os.path.isdir(self.app_storage_path):
+            return
+        if self.layout == "flat":
+            with os.scandir(self.app_storage_path) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        yield entry.name, entry.path
+            return
+        directories = [self.app_storage_path]
+        for _ in range(self.SHARD_LEVELS):
+            next_directories = []
+            for directory in directories:
+                with os.scandir(directory) as entries:
+                    # Shard names are hex, dot directories hold expiry and snapshot files
+                    next_directories.extend(entry.path for entry in entries
+                                            if entry.is_dir() and not entry.name.startswith("."))
+            directories = next_directories
+        for directory in directories:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        yield self.decode_key(entry.name), entry.path
+
     def get_item(self, item: str) -> Optional[str]:
+        if self.expiry and self.expiry.is_expired(item):
+            return None
         item_path = self.get_file_path(item)
-        if os.path.isfile(item_path):
-            with open(item_path, "r") as item_file:
-                return str(item_file.read())
-        else:
+        try:
+            with open(item_path, self.read_mode) as item_file:
+                return item_file.read()
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
             return None
 
     def get_all(self) -> Dict[str, str]:
         result = {}
-        if os.path.isdir(self.app_storage_path):
-            for filename in os.listdir(self.app_storage_path):
-                file_path = os.path.join(self.app_storage_path, filename)
-                if os.path.isfile(file_path):
-                    with open(file_path, "r") as item_file:
-                        result[filename] = str(item_file.read())
+        for key, file_path in self.iter_files():
+            with open(file_path, self.read_mode) as item_file:
+                result[key] = item_file.read()
         return result
 
     def get_many(self, items: List[str]) -> Dict[str, str]:
@@ -86,128 +499,160 @@ class TextStorageBackend(BasicStorageBackend):
                 result[key] = value
         return result
 
-    def set_item(self, item: str, value: Any) -> None:
-        item_path = self.get_file_path(item)
-        with open(item_path, "w") as item_file:
-            item_file.write(str(value))
+    def read_file(self, file_path: str) -> Optional[str]:
+        try:
+            with open(file_path, self.read_mode) as item_file:
+                return item_file.read()
+        except FileNotFoundError:
+            # Removed while we were iterating
+            return None
+
+    def iter_keys(self) -> Iterator[str]:
+        for key, _ in self.iter_files():
+            yield key
+
+    def iter_items(self) -> Iterator[Tuple[str, str]]:
+        for key, file_path in self.iter_files():
+            value = self.read_file(file_path)
+            if value is not None:
+                yield key, value
+
+    def page(self, after_key: Optional[str] = None, limit: int = 100) -> List[Tuple[str, str]]:
+        # File names aren't ordered on disk, so keep only the `limit` smallest keys while scanning
+        candidates = (entry for entry in self.iter_files() if after_key is None or entry[0] > after_key)
+        result = []
+        for key, file_path in heapq.nsmallest(limit, candidates):
+            value = self.read_file(file_path)
+            if value is not None:
+                result.append((key, value))
+        return result
+
+    def rebuild_key_index(self) -> None:
+        self.key_index = SortedKeyIndex(self.iter_keys())
 
+    def get_range(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, str]:
+        if self.key_index is None:
+            self.rebuild_key_index()
+        result = {}
+        for key in self.live_keys(self.key_index.range(start, end)):
+            value = self.read_file(self.get_file_path(key))
+            if value is not None:
+                result[key] = value
+        return result
+
+    def set_expiry(self, item: str, expires_at: Optional[float]) -> None:
+        if expires_at is not None:
+            os.makedirs(self.expiry_path, exist_ok=True)
+            with open(self.get_expiry_file_path(item), "w") as expiry_file:
+                expiry_file.write(repr(expires_at))
+        elif item in self.expiry.deadlines:
+            try:
+                os.remove(self.get_expiry_file_path(item))
+            except FileNotFoundError:
+                pass
+        self.expiry.set(item, expires_at)
+
+    @synchronized
+    def set_item(self, item: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = expiry_time(ttl)
+        item_path = self.get_file_path(item)
+        if self.layout == "sharded":
+            os.makedirs(os.path.dirname(item_path), exist_ok=True)
+        value = coerce_value(value)
+        with open(item_path, "wb" if isinstance(value, bytes) else "w") as item_file:
+            item_file.write(value)
+        self.set_expiry(item, expires_at)
+        if self.key_index is not None:
+            self.key_index.add(item)
+
+    @synchronized
     def remove_item(self, item: str) -> None: 
         item_path = self.get_file_path(item)
         if os.path.isfile(item_path):
             os.remove(item_path)
+        self.set_expiry(item, None)
+        if self.key_index is not None:
+            self.key_index.discard(item)
+
+    @synchronized
+    def purge_expired(self, limit: Optional[int] = None) -> int:
+        expired = self.expiry.pop_expired(time.time(), limit)
+        for key in expired:
+            for path in (self.get_file_path(key), self.get_expiry_file_path(key)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            if self.key_index is not None:
+                self.key_index.discard(key)
+        return len(expired)
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        for key, value in items.items():
+            self.set_item(key, value, ttl)
+
+    def remove_many(self, items: List[str]) -> None:
+        for key in items:
+            self.remove_item(key)
 
     def remove_all(self) -> None:
         self.clear()
 
+    @synchronized
     def clear(self) -> None:
         if os.path.isdir(self.app_storage_path):
             shutil.rmtree(self.app_storage_path, onerror=self.shutil_error_path)
-        os.makedirs(self.app_storage_path)
-
-
-class SQLiteStorageBackend(BasicStorageBackend):
-    def __init__(self, app_namespace: str) -> None:
-        super().__init__(app_namespace)
-        self.db_path = os.path.join(self.app_storage_path, "localStorageSQLite.db")
-        self.db_connection = sqlite3.connect(self.db_path)
-        self.db_cursor = self.db_connection.cursor()
-
-        empty = self.db_cursor.execute("SELECT name FROM sqlite_master").fetchall()
-        if empty == []:
-            self.create_default_tables()
-
-    def create_default_tables(self) -> None:
-        self.db_cursor.execute("CREATE TABLE localStoragePro (key TEXT PRIMARY KEY, value TEXT)")
-        self.db_connection.commit()
-        
-    def get_item(self, item: str) -> Optional[str]:
-        fetched_value = self.db_cursor.execute("SELECT value FROM localStoragePro WHERE key = ?", (item,)).fetchone()
-        if type(fetched_value) is tuple:
-            return fetched_value[0]
-        else:
-            return None
-
-    def get_all(self) -> Dict[str, str]:
-        result = {}
-        fetched_values = self.db_cursor.execute("SELECT key, value FROM localStoragePro").fetchall()
-        for key, value in fetched_values:
-            result[key] = value
-        return result
-
-    def get_many(self, items: List[str]) -> Dict[str, str]:
-        result = {}
-        placeholders = ", ".join(["?" for _ in items])
-        if not items:
-            return result
-        query = f"SELECT key, value FROM localStoragePro WHERE key IN ({placeholders})"
-        fetched_values = self.db_cursor.execute(query, items).fetchall()
-        for key, value in fetched_values:
-            result[key] = value
-        return result
-
-    def set_item(self, item: str, value: Any) -> None:
-        if len(self.db_cursor.execute("SELECT key FROM localStoragePro WHERE key = ?", (item,)).fetchall()) == 0:
-            self.db_cursor.execute("INSERT INTO localStoragePro (key, value) VALUES (?, ?)", (item, str(value)))
-        else:
-            self.db_cursor.execute("UPDATE localStoragePro SET value = ? WHERE key = ?", (str(value), item))
-        self.db_connection.commit()
-
-    def remove_item(self, item: str) -> None:
-        self.db_cursor.execute("DELETE FROM localStoragePro WHERE key = ?", (item,))
-        self.db_connection.commit()
-
-    def remove_all(self) -> None:
-        self.db_cursor.execute("DELETE FROM localStoragePro")
-        self.db_connection.commit()
-
-    def clear(self) -> None:
-        self.db_cursor.execute("DROP TABLE localStoragePro")
-        self.create_default_tables()
+        os.makedirs(self.flat_marker_path if self.layout == "flat" else self.app_storage_path)
+        self.expiry.clear()
+        if self.key_index is not None:
+            self.key_index = SortedKeyIndex()
 
 
-class JSONStorageBackend(BasicStorageBackend):
-    def __init__(self, app_namespace: str) -> None:
-        super().__init__(app_namespace)
-        self.json_path = os.path.join(self.app_storage_path, "localStorageJSON.json")
-        self.json_data: Dict[str, str] = {}
-
-        if not os.path.isfile(self.json_path):
-            self.commit_to_disk()
-
-        with open(self.json_path, "r") as json_file:
-            self.json_data = json.load(json_file)
-        
-    def commit_to_disk(self) -> None:
-        with open(self.json_path, "w") as json_file:
-            json.dump(self.json_data, json_file)
-
-    def get_item(self, item: str) -> Optional[str]:
-        if item in self.json_data:
-            return self.json_data[item]
+def running_event_loop() -> Optional[Any]:
+    """Return the asyncio loop running in this thread, without importing asyncio."""
+    asyncio = sys.modules.get("asyncio")
+    if asyncio is None:
+        return None
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
         return None
 
-    def get_all(self) -> Dict[str, str]:
-        return dict(self.json_data)
-
-    def get_many(self, items: List[str]) -> Dict[str, str]:
-        result = {}
-        for key in items:
-            if key in self.json_data:
-                result[key] = self.json_data[key]
-        return result
-
-    def set_item(self, item: str, value: Any) -> None:
-        self.json_data[item] = str(value)
-        self.commit_to_disk()
-
-    def remove_item(self, item: str) -> None: 
-        if item in self.json_data:
-            del self.json_data[item]
-            self.commit_to_disk()
-
-    def remove_all(self) -> None:
-        self.clear()
 
-    def clear(self) -> None:
-        self.json_data = {}
-        self.commit_to_disk()
+def options_key(options: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Hashable form of a store's keyword options, for keying shared instances."""
+    def freeze(value: Any) -> Any:
+        if isinstance(value, dict):
+            return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+        if isinstance(value, (list, tuple)):
+            return tuple(freeze(item) for item in value)
+        try:
+            hash(value)
+        except TypeError:
+            # Unhashable objects only match themselves
+            return ("id", id(value))
+        return value
+    return freeze(options)
+
+
+def create_storage_backend(app_namespace: str, storage_backend: str = "sqlite", **backend_options: Any) -> BasicStorageBackend:
+    """Build the backend named by storage_backend, falling back to SQLite."""
+    if storage_backend == "text":
+        return TextStorageBackend(app_namespace, **backend_options)
+    elif storage_backend == "json":
+        from .json_storage import JSONStorageBackend
+        return JSONStorageBackend(app_namespace, **backend_options)
+    elif storage_backend == "dbm":
+        from .dbm_storage import DBMStorageBackend
+        return DBMStorageBackend(app_namespace, **backend_options)
+    elif storage_backend == "log":
+        from .log_storage import LogStorageBackend
+        return LogStorageBackend(app_namespace, **backend_options)
+    elif storage_backend == "sqlite-shared":
+        from .shared_sqlite import SharedSQLiteStorageBackend
+        return SharedSQLiteStorageBackend(app_namespace, **backend_options)
+    elif storage_backend == "snapshot":
+        from .snapshot import SnapshotStorageBackend
+        return SnapshotStorageBackend(app_namespace, **backend_options)
+    from .sqlite_storage import SQLiteStorageBackend
+    return SQLiteStorageBackend(app_namespace, **backend_options)
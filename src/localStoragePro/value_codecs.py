@@ -0,0 +1,211 @@
+"""Pluggable value codecs, turning Python values into bytes for storage."""
+
+import json
+import pickle
+import struct
+from typing import Any, Dict, List, Union
+
+from .storage_backends import BasicStorageBackend, EncodingStorageBackendWrapper, localStoragePyStorageException
+
+
+class ValueCodec:
+    """Base class for codecs. Subclasses turn values into bytes and back."""
+
+    name = "base"
+
+    def encode(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class BytesCodec(ValueCodec):
+    """Stores bytes-like values unchanged."""
+
+    name = "bytes"
+
+    def encode(self, value: Any) -> bytes:
+        if not isinstance(value, (bytes, bytearray, memoryview)):
+            raise localStoragePyStorageException(f"The bytes codec can't store {type(value).__name__} values!")
+        return bytes(value)
+
+    def decode(self, data: bytes) -> Any:
+        return bytes(data)
+
+
+class JSONCodec(ValueCodec):
+    """Stores any JSON-serializable value as compact UTF-8 JSON."""
+
+    name = "json"
+
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(bytes(data))
+
+
+class PickleCodec(ValueCodec):
+    """
+    Stores any picklable value using pickle protocol 5.
+
+    Large buffers (e.g. from numpy arrays or ``pickle.PickleBuffer``) are kept
+    out of band and appended after the pickle stream, so they are copied once
+    on the way in and handed back as views of the stored bytes on the way out.
+    Only use this codec for data you trust, as unpickling can run arbitrary code.
+
+    Layout: ``u32 buffer count, u64 pickle length, u64 length per buffer,
+    pickle stream, buffers``.
+    """
+
+    name = "pickle"
+
+    def encode(self, value: Any) -> bytes:
+        buffers: List[pickle.PickleBuffer] = []
+        payload = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+        raw_buffers = [buffer.raw() for buffer in buffers]
+        header = struct.pack(f"<IQ{len(raw_buffers)}Q", len(raw_buffers), len(payload),
+                             *(raw.nbytes for raw in raw_buffers))
+        return b"".join([header, payload, *raw_buffers])
+
+    def decode(self, data: bytes) -> Any:
+        view = memoryview(data)
+        count, payload_length = struct.unpack_from("<IQ", view)
+        offset = struct.calcsize("<IQ")
+        lengths = struct.unpack_from(f"<{count}Q", view, offset)
+        offset += 8 * count
+        payload = view[offset:offset + payload_length]
+        offset += payload_length
+        buffers = []
+        for length in lengths:
+            buffers.append(view[offset:offset + length])
+            offset += length
+        return pickle.loads(payload, buffers=buffers)
+
+
+class StructCodec(ValueCodec):
+    """
+    Compact, self-describing binary format for plain data.
+
+    Supports None, bool, int (64-bit), float, str, bytes, and lists/tuples and
+    dicts of those. Every value is a one byte tag followed by a fixed size
+    payload, or by a ``u32`` length and that many bytes or items.
+    """
+
+    name = "struct"
+
+    _U32 = struct.Struct("<I")
+    _I64 = struct.Struct("<q")
+    _F64 = struct.Struct("<d")
+
+    def encode(self, value: Any) -> bytes:
+        parts: List[bytes] = []
+        self._encode_into(value, parts)
+        return b"".join(parts)
+
+    def _encode_into(self, value: Any, parts: List[bytes]) -> None:
+        if value is None:
+            parts.append(b"N")
+        elif value is True:
+            parts.append(b"T")
+        elif value is False:
+            parts.append(b"F")
+        elif isinstance(value, int):
+            try:
+                parts.append(b"i" + self._I64.pack(value))
+            except struct.error:
+                raise localStoragePyStorageException("The struct codec only stores 64-bit integers!")
+        elif isinstance(value, float):
+            parts.append(b"d" + self._F64.pack(value))
+        elif isinstance(value, str):
+            encoded = value.encode("utf-8")
+            parts.append(b"s" + self._U32.pack(len(encoded)) + encoded)
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            encoded = bytes(value)
+            parts.append(b"b" + self._U32.pack(len(encoded)) + encoded)
+        elif isinstance(value, (list, tuple)):
+            parts.append(b"l" + self._U32.pack(len(value)))
+            for item in value:
+                self._encode_into(item, parts)
+        elif isinstance(value, dict):
+            parts.append(b"m" + self._U32.pack(len(value)))
+            for key, item in value.items():
+                self._encode_into(key, parts)
+                self._encode_into(item, parts)
+        else:
+            raise localStoragePyStorageException(f"The struct codec can't store {type(value).__name__} values!")
+
+    def decode(self, data: bytes) -> Any:
+        view = memoryview(data)
+        value, offset = self._decode_from(view, 0)
+        if offset != len(view):
+            raise localStoragePyStorageException("Trailing bytes after struct encoded value!")
+        return value
+
+    def _decode_from(self, view: memoryview, offset: int) -> Any:
+        tag = view[offset:offset + 1].tobytes()
+        offset += 1
+        if tag == b"N":
+            return None, offset
+        if tag == b"T":
+            return True, offset
+        if tag == b"F":
+            return False, offset
+        if tag == b"i":
+            return self._I64.unpack_from(view, offset)[0], offset + 8
+        if tag == b"d":
+            return self._F64.unpack_from(view, offset)[0], offset + 8
+        length = self._U32.unpack_from(view, offset)[0]
+        offset += 4
+        if tag == b"s":
+            return str(view[offset:offset + length], "utf-8"), offset + length
+        if tag == b"b":
+            return view[offset:offset + length].tobytes(), offset + length
+        if tag == b"l":
+            items = []
+            for _ in range(length):
+                item, offset = self._decode_from(view, offset)
+                items.append(item)
+            return items, offset
+        if tag == b"m":
+            mapping = {}
+            for _ in range(length):
+                key, offset = self._decode_from(view, offset)
+                mapping[key], offset = self._decode_from(view, offset)
+            return mapping, offset
+        raise localStoragePyStorageException(f"Unknown struct codec tag {tag!r}!")
+
+
+CODECS: Dict[str, ValueCodec] = {
+    codec.name: codec for codec in (BytesCodec(), JSONCodec(), PickleCodec(), StructCodec())
+}
+
+
+def get_codec(codec: Union[str, ValueCodec]) -> ValueCodec:
+    """Look up a codec by name, or pass a ValueCodec instance through."""
+    if isinstance(codec, ValueCodec):
+        return codec
+    if codec not in CODECS:
+        raise localStoragePyStorageException(f"Unknown codec '{codec}'!")
+    return CODECS[codec]
+
+
+class CodecStorageBackend(EncodingStorageBackendWrapper):
+    """
+    Encodes values with a codec on the way into a backend and decodes them on
+    the way out. Values stored as text before a codec was chosen are returned
+    unchanged.
+    """
+
+    def __init__(self, backend: BasicStorageBackend, codec: Union[str, ValueCodec]) -> None:
+        super().__init__(backend)
+        self.codec = get_codec(codec)
+
+    def encode(self, value: Any) -> bytes:
+        return self.codec.encode(value)
+
+    def decode(self, value: Any) -> Any:
+        if value is None or isinstance(value, str):
+            return value
+        return self.codec.decode(value)
@@ -2,8 +2,9 @@
 
 import asyncio
 import json
+import sqlite3
 import pytest
-from localStoragePro import async_lsp, AsyncLocalStoragePro
+from localStoragePro import async_lsp, AsyncLocalStoragePro, localStoragePro
 
 
 @pytest.mark.asyncio
@@ -163,4 +164,191 @@ async def test_async_concurrent_operations():
     assert results == test_values
     
     # Clean up
-    await storage.clear() 
\ No newline at end of file
+    await storage.clear() 
+
+@pytest.mark.asyncio
+async def test_async_connection_pool():
+    """Test that SQLite connections are pooled per worker thread and closed."""
+    storage = AsyncLocalStoragePro('test.async.pool', 'sqlite', max_workers=2)
+    await storage.clear()
+    
+    await asyncio.gather(*(storage.setItem(f"key_{i}", f"value_{i}") for i in range(50)))
+    results = await asyncio.gather(*(storage.getItem(f"key_{i}") for i in range(50)))
+    assert results == [f"value_{i}" for i in range(50)]
+    
+    # Connections are reused, never more than one per worker thread
+    backend = storage.storage_backend_instance
+    pooled = list(backend._thread_backends)
+    assert 1 <= len(pooled) <= 2
+    
+    await storage.clear()
+    await storage.aclose()
+    assert backend._thread_backends == []
+    
+    # Operations after aclose fail softly like any other backend error
+    assert await storage.getItem('key_0') is None
+
+
+@pytest.mark.asyncio
+async def test_async_set_many_remove_many():
+    """Test async bulk writes on every backend."""
+    for backend in ['text', 'sqlite', 'json']:
+        storage = AsyncLocalStoragePro(f'test.async.many.{backend}', backend)
+        await storage.clear()
+        
+        await storage.setMany({'key1': 'value1', 'key2': 'value2', 'key3': 'value3'})
+        assert await storage.getAll() == {'key1': 'value1', 'key2': 'value2', 'key3': 'value3'}
+        
+        await storage.removeMany(['key1', 'key2'])
+        assert await storage.getAll() == {'key3': 'value3'}
+        
+        await storage.clear()
+        await storage.aclose()
+
+
+@pytest.mark.asyncio
+async def test_async_sqlite_profile():
+    """Test that pooled connections share the instance's SQLite profile."""
+    storage = AsyncLocalStoragePro('test.async.profile', 'sqlite', profile='throughput')
+    await storage.clear()
+    
+    await storage.setItem('key', 'value')
+    assert await storage.getItem('key') == 'value'
+    for backend in storage.storage_backend_instance._thread_backends:
+        assert backend.pragmas['journal_mode'] == 'WAL'
+    
+    await storage.clear()
+    await storage.aclose()
+
+
+@pytest.mark.asyncio
+async def test_async_group_commit():
+    """Test that concurrent writes share one group commit connection."""
+    storage = AsyncLocalStoragePro('test.async.groupcommit', 'sqlite', commit_batch_size=50, commit_interval_ms=10)
+    await storage.clear()
+    
+    await asyncio.gather(*(storage.setItem(f"key_{i}", f"value_{i}") for i in range(20)))
+    assert len(await storage.getAll()) == 20
+    assert storage.storage_backend_instance._thread_backends == []
+    
+    await storage.flush()
+    await storage.clear()
+    await storage.aclose()
+
+
+@pytest.mark.asyncio
+async def test_async_writer_coalesces_commits():
+    """Test that concurrent SQLite writes are committed together by the writer thread."""
+    storage = AsyncLocalStoragePro('test.async.writer', 'sqlite')
+    await storage.clear()
+    
+    await asyncio.gather(*(storage.setItem(f"key_{i}", f"value_{i}") for i in range(200)))
+    writer = storage.storage_backend_instance.writer
+    assert writer.writes >= 201
+    assert writer.batches < writer.writes
+    
+    # Every awaited write is committed, so another connection already sees it
+    other = localStoragePro('test.async.writer', 'sqlite')
+    assert len(other.getAll()) == 200
+    other.close()
+    
+    await storage.clear()
+    await storage.aclose()
+
+
+@pytest.mark.asyncio
+async def test_async_writer_isolates_failures():
+    """Test that a failing write only fails itself, not the rest of its batch."""
+    storage = AsyncLocalStoragePro('test.async.writer.errors', 'sqlite')
+    await storage.clear()
+    
+    writer = storage.storage_backend_instance.writer
+    good = [writer.submit("set_item", f"key_{i}", f"value_{i}") for i in range(5)]
+    bad = writer.submit("set_item", "bad", "value", -1)
+    for future in good:
+        await asyncio.wrap_future(future)
+    with pytest.raises(Exception):
+        await asyncio.wrap_future(bad)
+    assert await storage.getMany(['key_0', 'key_4', 'bad']) == {'key_0': 'value_0', 'key_4': 'value_4'}
+    
+    await storage.clear()
+    await storage.aclose()
+
+
+@pytest.mark.asyncio
+async def test_async_writer_fails_batch_when_locked():
+    """Test that writes fail instead of hanging when the batch transaction can't begin."""
+    storage = AsyncLocalStoragePro('test.async.writer.locked', 'sqlite', profile={'busy_timeout': 100})
+    await storage.clear()
+    
+    holder = sqlite3.connect(storage.storage_backend_instance.backend.db_path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        writer = storage.storage_backend_instance.writer
+        with pytest.raises(sqlite3.OperationalError):
+            await asyncio.wait_for(asyncio.wrap_future(writer.submit("set_item", "key", "value")), 5)
+        await asyncio.wait_for(storage.setItem('key', 'value'), 5)
+    finally:
+        holder.rollback()
+        holder.close()
+    
+    await storage.setItem('key', 'value')
+    assert await storage.getItem('key') == 'value'
+    await storage.clear()
+    await storage.aclose()
+
+
+@pytest.mark.asyncio
+async def test_async_read_coalescing():
+    """Test that concurrent getItem calls become one deduplicated get_many."""
+    storage = AsyncLocalStoragePro('test.async.coalesce', 'sqlite')
+    await storage.clear()
+    await storage.setMany({f"key_{i}": f"value_{i}" for i in range(100)})
+    
+    backend = storage.storage_backend_instance
+    operations = []
+    execute = backend._execute_operation
+    backend._execute_operation = lambda operation, *args: operations.append((operation, args)) or execute(operation, *args)
+    
+    keys = [f"key_{i % 120}" for i in range(200)]
+    results = await asyncio.gather(*(storage.getItem(key) for key in keys))
+    assert results == [f"value_{i % 120}" if i % 120 < 100 else None for i in range(200)]
+    assert len(operations) == 1
+    assert operations[0][0] == "get_many" and sorted(operations[0][1][0]) == sorted(set(keys))
+    assert backend.read_coalescer.loads == 200
+    # Batch tasks are referenced while they run and dropped once done
+    await asyncio.sleep(0)
+    assert not backend.read_coalescer.tasks
+
+    backend._execute_operation = execute
+    await storage.clear()
+    await storage.aclose()
+
+
+@pytest.mark.asyncio
+async def test_async_read_coalescing_cancellation():
+    """Test that cancelling one waiting getItem doesn't cancel others on the same key."""
+    storage = AsyncLocalStoragePro('test.async.coalesce.cancel', 'json', coalesce_window_ms=20)
+    await storage.clear()
+    await storage.setItem('key', 'value')
+    
+    first = asyncio.ensure_future(storage.getItem('key'))
+    second = asyncio.ensure_future(storage.getItem('key'))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == 'value'
+    assert first.cancelled()
+    
+    await storage.clear()
+    await storage.aclose()
+
+
+@pytest.mark.asyncio
+async def test_async_read_coalescing_disabled():
+    """Test that coalescing can be turned off."""
+    storage = AsyncLocalStoragePro('test.async.coalesce.off', 'sqlite', coalesce_reads=False)
+    await storage.setItem('key', 'value')
+    assert storage.storage_backend_instance.read_coalescer is None
+    assert await storage.getItem('key') == 'value'
+    await storage.clear()
+    await storage.aclose()
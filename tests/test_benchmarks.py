@@ -0,0 +1,49 @@
+"""Smoke test for the benchmark suite."""
+
+import os
+import json
+import importlib.util
+
+
+BENCH_PATH = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'bench.py')
+
+
+def load_bench():
+    spec = importlib.util.spec_from_file_location('bench', BENCH_PATH)
+    bench = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(bench)
+    return bench
+
+
+class TestBenchmarks:
+    """Test that the benchmark suite runs end to end and writes comparable JSON."""
+
+    def test_tiny_run_and_compare(self, tmp_path, capsys):
+        bench = load_bench()
+        output = tmp_path / 'results.json'
+        args = ['--backends', 'sqlite,json,async-sqlite', '--sizes', '100', '--value-sizes', '16,1e6',
+                '--samples', '20', '--max-bytes', '1000000', '--output', str(output)]
+        assert bench.main(args) == 0
+        report = json.loads(output.read_text())
+        assert report['meta']['samples'] == 20
+        measured = [result for result in report['results'] if 'operation' in result]
+        assert {result['operation'] for result in measured} == set(bench.OPERATIONS)
+        assert {result['backend'] for result in measured} == {'sqlite', 'json', 'async-sqlite'}
+        assert all(result['p50_us'] <= result['p99_us'] and result['ops_per_sec'] > 0 for result in measured)
+        assert sum('skipped' in result for result in report['results']) == 3
+
+        baseline = json.loads(output.read_text())
+        for result in baseline['results']:
+            if 'operation' in result:
+                result['ops_per_sec'] *= 1000
+        baseline_path = tmp_path / 'baseline.json'
+        baseline_path.write_text(json.dumps(baseline))
+        assert bench.main(args[:-2] + ['--compare', str(baseline_path)]) == 1
+        assert 'regressions' in capsys.readouterr().out
+
+    def test_percentile(self):
+        bench = load_bench()
+        samples = list(range(1, 101))
+        assert bench.percentile(samples, 0.5) == 50
+        assert bench.percentile(samples, 0.99) == 99
+        assert bench.percentile([7], 0.99) == 7
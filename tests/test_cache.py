@@ -0,0 +1,143 @@
+"""Tests for the read-through cache."""
+
+import time
+
+import pytest
+from localStoragePro import localStoragePro
+
+
+@pytest.fixture
+def storage():
+    """A cached SQLite store, cleared before and after the test."""
+    storage = localStoragePro('test.cache', 'sqlite', cache={'max_entries': 3})
+    storage.clear()
+    yield storage
+    storage.clear()
+    storage.close()
+
+
+class TestReadCache:
+    """Test the LRU read cache."""
+
+    def test_hits_and_misses(self, storage):
+        """Test that repeated reads are served from the cache."""
+        storage.setItem('key1', 'value1')
+
+        assert storage.getItem('key1') == 'value1'
+        assert storage.getItem('key1') == 'value1'
+        assert storage.getItem('missing') is None
+        assert storage.getItem('missing') is None
+
+        stats = storage.cacheStats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 2
+        assert stats['negative_hits'] == 1
+
+    def test_write_invalidation(self, storage):
+        """Test that writes through the instance are never served stale."""
+        assert storage.getItem('key1') is None
+        storage.setItem('key1', 'value1')
+        assert storage.getItem('key1') == 'value1'
+
+        storage.setMany({'key1': 'value2'})
+        assert storage.getItem('key1') == 'value2'
+
+        storage.removeItem('key1')
+        assert storage.getItem('key1') is None
+
+        storage.setItem('key2', 'value2')
+        assert storage.getMany(['key2', 'key3']) == {'key2': 'value2'}
+        storage.clear()
+        assert storage.getItem('key2') is None
+
+    def test_lru_eviction(self, storage):
+        """Test that the least recently used entry is evicted first."""
+        storage.setMany({f"key{i}": f"value{i}" for i in range(4)})
+        for key in ('key0', 'key1', 'key2'):
+            storage.getItem(key)
+        storage.getItem('key0')  # key1 is now least recently used
+        storage.getItem('key3')
+
+        stats = storage.cacheStats()
+        assert stats['evictions'] == 1
+        assert stats['entries'] == 3
+        storage.getItem('key0')
+        assert storage.cacheStats()['hits'] == stats['hits'] + 1
+        storage.getItem('key1')
+        assert storage.cacheStats()['misses'] == stats['misses'] + 1
+
+    def test_byte_bound_and_ttl(self):
+        """Test the byte bound and entry expiry."""
+        storage = localStoragePro('test.cache.ttl', 'json', cache={'max_bytes': 100, 'ttl': 0.05})
+        storage.clear()
+        storage.setMany({'small': 'x', 'large': 'y' * 200})
+
+        storage.getItem('large')
+        assert storage.cacheStats()['entries'] == 0  # too large to cache
+        storage.getItem('small')
+        storage.getItem('small')
+        assert storage.cacheStats()['hits'] == 1
+
+        time.sleep(0.06)
+        storage.getItem('small')
+        assert storage.cacheStats()['expirations'] == 1
+        storage.clear()
+
+    def test_no_cache_by_default(self):
+        """Test that caching is opt-in."""
+        storage = localStoragePro('test.cache.off', 'sqlite')
+        assert storage.cacheStats() == {}
+        storage.close()
+
+
+class TestCrossProcessCoherence:
+    """Test that caches notice writes made through other connections."""
+
+    @pytest.mark.parametrize("backend", ['sqlite', 'json'])
+    def test_external_write_invalidates(self, backend):
+        """Test that a write by another instance is seen by a cached one."""
+        namespace = f'test.cache.coherence.{backend}'
+        other = localStoragePro(namespace, backend)
+        other.clear()
+        other.setItem('key', 'value1')
+
+        cached = localStoragePro(namespace, backend, cache=True)
+        assert cached.getItem('key') == 'value1'
+        assert cached.getItem('key') == 'value1'
+        assert cached.cacheStats()['hits'] == 1
+
+        other.setItem('key', 'value_two')
+        assert cached.getItem('key') == 'value_two'
+        assert cached.cacheStats()['external_invalidations'] == 1
+
+        # Its own writes don't count as external changes
+        cached.setItem('key', 'value3')
+        assert cached.getItem('key') == 'value3'
+        assert cached.cacheStats()['external_invalidations'] == 1
+
+        other.close()
+        cached.clear()
+        cached.close()
+
+    def test_data_version_through_wrappers(self):
+        """Test that data_version() still works on a codec stacked over the cache."""
+        storage = localStoragePro('test.cache.data_version', 'sqlite', cache=True, codec='json')
+        version = storage.base_backend.data_version()
+        assert storage.storage_backend_instance.data_version() == version
+        assert storage.cache.data_version() == version
+        storage.close()
+
+    def test_json_auto_refresh(self):
+        """Test that the JSON backend can pick up other writers without a cache."""
+        writer = localStoragePro('test.json.refresh', 'json')
+        writer.clear()
+        reader = localStoragePro('test.json.refresh', 'json', auto_refresh=True)
+        stale = localStoragePro('test.json.refresh', 'json')
+
+        writer.setItem('key', 'value')
+        assert reader.getItem('key') == 'value'
+        assert stale.getItem('key') is None
+
+        writer.setMany({'key': 'longer value', 'other': 'x'})
+        assert reader.getAll() == {'key': 'longer value', 'other': 'x'}
+        writer.clear()
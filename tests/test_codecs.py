@@ -0,0 +1,105 @@
+"""Tests for value codecs and the SQLite BLOB schema."""
+
+import pickle
+import sqlite3
+
+import pytest
+from localStoragePro import localStoragePro
+from localStoragePro.storage_backends import localStoragePyStorageException
+from localStoragePro.value_codecs import CODECS
+
+
+SAMPLE = {
+    'none': None,
+    'flags': [True, False],
+    'number': -42,
+    'ratio': 0.5,
+    'text': 'héllo',
+    'nested': {'list': [1, 'two', 3.0], 'empty': {}},
+}
+
+
+class TestCodecs:
+    """Test codecs round-trip through every backend."""
+
+    @pytest.mark.parametrize("codec", ['json', 'pickle', 'struct'])
+    @pytest.mark.parametrize("backend", ['text', 'sqlite', 'json', 'log', 'dbm', 'sqlite-shared'])
+    def test_structured_round_trip(self, backend, codec):
+        """Test that structured values keep their types."""
+        storage = localStoragePro(f'test.codec.{backend}', backend, codec=codec)
+        storage.clear()
+
+        storage.setMany(SAMPLE)
+        storage.setItem('single', {'a': 1})
+        assert storage.getItem('single') == {'a': 1}
+        assert storage.getMany(list(SAMPLE)) == SAMPLE
+        storage.close()
+
+        # Values survive a reopen
+        reopened = localStoragePro(f'test.codec.{backend}', backend, codec=codec)
+        assert reopened.getAll() == dict(SAMPLE, single={'a': 1})
+        reopened.clear()
+        reopened.close()
+
+    @pytest.mark.parametrize("backend", ['text', 'sqlite', 'json', 'log', 'dbm', 'sqlite-shared'])
+    def test_bytes_codec(self, backend):
+        """Test that raw bytes, including invalid UTF-8, round-trip."""
+        storage = localStoragePro(f'test.codec.bytes.{backend}', backend, codec='bytes')
+        storage.clear()
+
+        storage.setItem('blob', b'\x00\xff\xfe binary')
+        assert storage.getItem('blob') == b'\x00\xff\xfe binary'
+        with pytest.raises(localStoragePyStorageException):
+            storage.setItem('text', 'not bytes')
+        storage.clear()
+        storage.close()
+
+    def test_pickle_out_of_band_buffers(self):
+        """Test that out-of-band pickle buffers are returned as views."""
+        codec = CODECS['pickle']
+        payload = bytearray(b'x' * 1024)
+        encoded = codec.encode(pickle.PickleBuffer(payload))
+        decoded = codec.decode(encoded)
+        assert bytes(decoded) == bytes(payload)
+
+    def test_struct_codec_rejects_unsupported(self):
+        """Test that the struct codec rejects values it can't describe."""
+        with pytest.raises(localStoragePyStorageException):
+            CODECS['struct'].encode({1, 2})
+        with pytest.raises(localStoragePyStorageException):
+            CODECS['struct'].encode(2 ** 70)
+
+    def test_legacy_text_values_pass_through(self):
+        """Test that values written without a codec are returned unchanged."""
+        plain = localStoragePro('test.codec.legacy', 'sqlite')
+        plain.clear()
+        plain.setItem('old', 'plain text')
+        plain.close()
+
+        storage = localStoragePro('test.codec.legacy', 'sqlite', codec='json')
+        assert storage.getItem('old') == 'plain text'
+        storage.clear()
+        storage.close()
+
+
+class TestBlobMigration:
+    """Test the migration of TEXT value columns to BLOB."""
+
+    def test_text_table_is_migrated(self):
+        """Test that an existing TEXT table keeps its rows and becomes BLOB."""
+        storage = localStoragePro('test.codec.migration', 'sqlite')
+        db_path = storage.storage_backend_instance.db_path
+        storage.close()
+
+        connection = sqlite3.connect(db_path)
+        connection.execute("DROP TABLE localStoragePro")
+        connection.execute("CREATE TABLE localStoragePro (key TEXT PRIMARY KEY, value TEXT)")
+        connection.execute("INSERT INTO localStoragePro VALUES ('key', 'value')")
+        connection.commit()
+        connection.close()
+
+        storage = localStoragePro('test.codec.migration', 'sqlite')
+        assert storage.storage_backend_instance.column_type() == 'BLOB'
+        assert storage.getItem('key') == 'value'
+        storage.clear()
+        storage.close()
@@ -0,0 +1,84 @@
+"""Tests for transparent value compression."""
+
+import json
+
+import pytest
+from localStoragePro import localStoragePro
+from localStoragePro.compression import MAGIC
+from localStoragePro.storage_backends import localStoragePyStorageException
+
+
+DOCUMENT = json.dumps({'rows': [{'id': i, 'name': f'row {i}'} for i in range(500)]})
+
+
+class TestCompression:
+    """Test threshold-based compression across backends."""
+
+    @pytest.mark.parametrize("algorithm", ['zlib', 'lzma', 'bz2'])
+    @pytest.mark.parametrize("backend", ['text', 'sqlite', 'json', 'log', 'dbm', 'sqlite-shared'])
+    def test_round_trip(self, backend, algorithm):
+        """Test that large values are compressed and small ones left alone."""
+        storage = localStoragePro(f'test.compression.{backend}', backend,
+                                  compression={'algorithm': algorithm, 'threshold': 256})
+        storage.clear()
+
+        storage.setMany({'document': DOCUMENT, 'small': 'tiny', 'number': 7})
+        assert storage.getAll() == {'document': DOCUMENT, 'small': 'tiny', 'number': '7'}
+
+        raw = storage.compression.backend.get_item('document')
+        assert raw.startswith(MAGIC) and len(raw) < len(DOCUMENT)
+
+        stats = storage.compressionStats()
+        assert stats['compressed_values'] == 1
+        assert stats['stored_uncompressed'] == 2
+        assert stats['ratio'] < 1
+        assert stats['compress_seconds'] >= 0
+        storage.clear()
+        storage.close()
+
+    def test_mixed_data_reads_back(self):
+        """Test that values written before compression was enabled still read back."""
+        plain = localStoragePro('test.compression.mixed', 'sqlite')
+        plain.clear()
+        plain.setItem('old', DOCUMENT)
+        plain.close()
+
+        storage = localStoragePro('test.compression.mixed', 'sqlite', compression='zlib')
+        storage.setItem('new', DOCUMENT)
+        assert storage.getMany(['old', 'new']) == {'old': DOCUMENT, 'new': DOCUMENT}
+        storage.close()
+
+        # Switching algorithms keeps older compressed values readable
+        storage = localStoragePro('test.compression.mixed', 'sqlite', compression='bz2')
+        assert storage.getItem('new') == DOCUMENT
+        storage.clear()
+        storage.close()
+
+    def test_with_codec(self):
+        """Test compression of codec-encoded values, including header look-alikes."""
+        storage = localStoragePro('test.compression.codec', 'sqlite', codec='bytes', compression='zlib')
+        storage.clear()
+
+        lookalike = MAGIC + b'\x01\x00 not really compressed'
+        storage.setMany({'big': b'a' * 10000, 'lookalike': lookalike})
+        assert storage.getItem('big') == b'a' * 10000
+        assert storage.getItem('lookalike') == lookalike
+        storage.clear()
+        storage.close()
+
+    @pytest.mark.parametrize("backend", ['text', 'sqlite', 'json'])
+    def test_text_header_look_alike(self, backend):
+        """Test that a str value starting like a compressed header reads back unchanged."""
+        storage = localStoragePro(f'test.compression.lookalike.{backend}', backend, compression='zlib')
+        storage.clear()
+        value = MAGIC.decode('ascii') + 'not compressed'
+        storage.setItem('key', value)
+        assert storage.getItem('key') == value
+        assert storage.getAll() == {'key': value}
+        storage.clear()
+        storage.close()
+
+    def test_unknown_algorithm(self):
+        """Test that unknown algorithms are rejected."""
+        with pytest.raises(localStoragePyStorageException):
+            localStoragePro('test.compression.invalid', 'sqlite', compression='brotli')
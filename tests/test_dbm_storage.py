@@ -0,0 +1,49 @@
+"""Tests for the dbm storage backend."""
+
+import pytest
+from localStoragePro import localStoragePro, AsyncLocalStoragePro
+from localStoragePro.dbm_storage import DBMStorageBackend
+from localStoragePro.storage_backends import localStoragePyStorageException
+
+
+class TestDBMStorage:
+    """Test the dbm backend through the sync and async APIs."""
+
+    def test_basic_operations(self):
+        """Test the usual operations and that values keep their type."""
+        storage = localStoragePro('test.dbm.basic', 'dbm')
+        storage.clear()
+        storage.setItem('text', 'héllo ✓')
+        storage.setItem('binary', b'\x00\x01\xff')
+        storage.setMany({'a': '1', 'b': '2', 'c': '3'})
+        storage.removeItem('b')
+        storage.removeMany(['c', 'missing'])
+        assert storage.getItem('text') == 'héllo ✓'
+        assert storage.getItem('binary') == b'\x00\x01\xff'
+        assert storage.getItem('b') is None
+        assert storage.getMany(['a', 'b', 'text']) == {'a': '1', 'text': 'héllo ✓'}
+        assert storage.getAll() == {'text': 'héllo ✓', 'binary': b'\x00\x01\xff', 'a': '1'}
+        storage.close()
+
+        reopened = localStoragePro('test.dbm.basic', 'dbm')
+        assert reopened.getItem('binary') == b'\x00\x01\xff'
+        reopened.clear()
+        assert reopened.getAll() == {}
+        reopened.close()
+
+    async def test_async(self):
+        """Test the dbm backend behind the async wrapper."""
+        storage = AsyncLocalStoragePro('test.dbm.async', 'dbm')
+        await storage.clear()
+        await storage.setMany({f'key_{i}': str(i) for i in range(100)})
+        assert await storage.getItem('key_42') == '42'
+        assert len(await storage.getAll()) == 100
+        await storage.aclose()
+
+    def test_explicit_implementation(self):
+        """Test choosing dbm.dumb, which every Python build has, and rejecting unknown names."""
+        backend = DBMStorageBackend('test.dbm.dumb', implementation='dumb')
+        assert backend.implementation == 'dumb'
+        backend.close()
+        with pytest.raises(localStoragePyStorageException):
+            DBMStorageBackend('test.dbm.dumb', implementation='sqlite')
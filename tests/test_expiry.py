@@ -0,0 +1,206 @@
+"""Tests for key expiration (ttl) and the expiry sweeper."""
+
+import os
+import time
+import asyncio
+import sqlite3
+import pytest
+from localStoragePro import localStoragePro, AsyncLocalStoragePro
+from localStoragePro.expiry import ExpirySweeper
+from localStoragePro.storage_backends import ExpiryHeap, localStoragePyStorageException
+
+
+SHORT_TTL = 0.05
+
+
+class TestExpiryHeap:
+    """Test the in-memory deadline heap used by the file based backends."""
+
+    def test_pop_expired_skips_stale_entries(self):
+        heap = ExpiryHeap()
+        heap.set("a", 1.0)
+        heap.set("b", 2.0)
+        heap.set("a", 5.0)
+        heap.set("c", 3.0)
+        heap.discard("c")
+        assert heap.pop_expired(4.0) == ["b"]
+        assert heap.is_expired("a", 5.0)
+        assert heap.pop_expired(10.0, limit=1) == ["a"]
+        assert not heap
+
+    def test_live_and_deadlines_of(self):
+        heap = ExpiryHeap()
+        assert heap.live(iter(["a", "b"])) == ["a", "b"]
+        heap.set("a", 1.0)
+        heap.set("b", 3.0)
+        assert heap.live(["a", "b", "c"], now=2.0) == ["b", "c"]
+        assert heap.deadlines_of(["a", "c"]) == {"a": 1.0}
+
+
+class TestExpiration:
+    """Test setItem(..., ttl=...) on every backend."""
+
+    @pytest.mark.parametrize("backend", ['text', 'sqlite', 'json', 'log', 'dbm', 'sqlite-shared'])
+    def test_expired_keys_are_skipped(self, backend):
+        """Test that reads stop returning keys once their ttl has passed."""
+        storage = localStoragePro(f'test.ttl.{backend}', backend)
+        storage.clear()
+        storage.setItem('session:short', 'gone soon', ttl=SHORT_TTL)
+        storage.setMany({'session:a': '1', 'session:b': '2'}, ttl=SHORT_TTL)
+        storage.setItem('session:long', 'stays', ttl=60)
+        storage.setItem('plain', 'forever')
+        assert storage.getItem('session:short') == 'gone soon'
+        assert len(storage.getAll()) == 5
+
+        time.sleep(SHORT_TTL * 2)
+        assert storage.getItem('session:short') is None
+        assert storage.getAll() == {'session:long': 'stays', 'plain': 'forever'}
+        assert storage.getMany(['session:a', 'plain']) == {'plain': 'forever'}
+        assert sorted(storage.iterKeys()) == ['plain', 'session:long']
+        assert storage.page() == [('plain', 'forever'), ('session:long', 'stays')]
+        assert storage.getByPrefix('session:') == {'session:long': 'stays'}
+
+        assert storage.purgeExpired() == 3
+        assert storage.purgeExpired() == 0
+        storage.clear()
+        storage.close()
+
+    @pytest.mark.parametrize("backend", ['text', 'sqlite', 'json', 'log', 'dbm', 'sqlite-shared'])
+    def test_overwrite_clears_ttl(self, backend):
+        """Test that setting a key again without ttl makes it permanent."""
+        storage = localStoragePro(f'test.ttl.overwrite.{backend}', backend)
+        storage.clear()
+        storage.setItem('key', 'temporary', ttl=SHORT_TTL)
+        storage.setItem('key', 'permanent')
+        time.sleep(SHORT_TTL * 2)
+        assert storage.getItem('key') == 'permanent'
+        assert storage.purgeExpired() == 0
+        storage.clear()
+        storage.close()
+
+    @pytest.mark.parametrize("backend,options", [
+        ('text', {}), ('text', {'layout': 'sharded'}), ('sqlite', {}), ('json', {}), ('json', {'journal': True}),
+        ('log', {}), ('dbm', {}),
+    ])
+    def test_deadlines_persist(self, backend, options):
+        """Test that deadlines survive reopening the store."""
+        storage = localStoragePro(f'test.ttl.persist.{backend}', backend, **options)
+        storage.clear()
+        storage.setItem('short', 'value', ttl=SHORT_TTL)
+        storage.setItem('long', b'bytes value', ttl=60)
+        storage.setItem('plain', 'value')
+        storage.close()
+
+        time.sleep(SHORT_TTL * 2)
+        reopened = localStoragePro(f'test.ttl.persist.{backend}', backend, **options)
+        assert reopened.getItem('short') is None
+        assert reopened.getItem('plain') == 'value'
+        assert sorted(reopened.getAll()) == ['long', 'plain']
+        deadlines = reopened.storage_backend_instance.get_expiries(['short', 'long', 'plain'])
+        assert set(deadlines) <= {'short', 'long'} and deadlines['long'] > time.time()
+        reopened.clear()
+        reopened.close()
+
+    def test_invalid_ttl(self):
+        """Test that zero and negative ttls are rejected."""
+        storage = localStoragePro('test.ttl.invalid', 'sqlite')
+        with pytest.raises(localStoragePyStorageException):
+            storage.setItem('key', 'value', ttl=0)
+        storage.close()
+
+    def test_sqlite_purge_in_batches(self):
+        """Test that purgeExpired honours its limit and uses the expiry index."""
+        storage = localStoragePro('test.ttl.batches', 'sqlite')
+        storage.clear()
+        storage.setMany({f'key_{i}': str(i) for i in range(25)}, ttl=SHORT_TTL)
+        time.sleep(SHORT_TTL * 2)
+        assert storage.purgeExpired(limit=10) == 10
+        assert storage.purgeExpired(limit=10) == 10
+        assert storage.purgeExpired(limit=10) == 5
+
+        backend = storage.storage_backend_instance
+        plan = backend.db_cursor.execute(f"EXPLAIN QUERY PLAN {backend.SQL_PURGE_EXPIRED}", (0, 10)).fetchall()
+        assert any('localStoragePro_expires_at' in row[-1] for row in plan)
+        storage.close()
+
+    def test_sqlite_migrates_old_table(self):
+        """Test that databases without an expires_at column gain one on open."""
+        storage = localStoragePro('test.ttl.migrate', 'sqlite')
+        db_path = storage.storage_backend_instance.db_path
+        storage.close()
+        os.remove(db_path)
+        connection = sqlite3.connect(db_path)
+        connection.execute("CREATE TABLE localStoragePro (key TEXT PRIMARY KEY, value BLOB)")
+        connection.execute("INSERT INTO localStoragePro VALUES ('old', 'value')")
+        connection.commit()
+        connection.close()
+
+        storage = localStoragePro('test.ttl.migrate', 'sqlite')
+        assert storage.getItem('old') == 'value'
+        storage.setItem('new', 'value', ttl=60)
+        assert storage.storage_backend_instance.column_type('expires_at') == 'REAL'
+        storage.clear()
+        storage.close()
+
+    def test_cache_respects_key_deadline(self):
+        """Test that the read cache never serves a value past its key's ttl."""
+        storage = localStoragePro('test.ttl.cache', 'sqlite', cache=True)
+        storage.clear()
+        storage.setItem('key', 'value', ttl=SHORT_TTL)
+        assert storage.getItem('key') == 'value'
+        assert storage.getItem('key') == 'value'
+        assert storage.cacheStats()['hits'] == 1
+        time.sleep(SHORT_TTL * 2)
+        assert storage.getItem('key') is None
+        storage.clear()
+        storage.close()
+
+
+class TestExpirySweeper:
+    """Test the background sweeper on a thread and on an asyncio task."""
+
+    def test_sweep_in_bounded_batches(self):
+        """Test that one sweep keeps purging full batches until one comes back short."""
+        batches = [3, 3, 1]
+        sizes = []
+
+        def purge(limit):
+            sizes.append(limit)
+            return batches.pop(0)
+
+        sweeper = ExpirySweeper(purge, interval=60, batch_size=3)
+        assert sweeper.sweep() == 7
+        assert sizes == [3, 3, 3]
+
+    @pytest.mark.parametrize("backend", ['sqlite', 'json'])
+    def test_thread_sweeper(self, backend):
+        """Test that the thread sweeper deletes expired keys in the background."""
+        storage = localStoragePro(f'test.ttl.sweeper.{backend}', backend)
+        storage.clear()
+        storage.setMany({f'key_{i}': str(i) for i in range(10)}, ttl=SHORT_TTL)
+        storage.setItem('plain', 'value')
+        storage.startExpirySweeper(interval=SHORT_TTL, batch_size=4)
+        deadline = time.time() + 5
+        while storage.expiry_sweeper.purged < 10 and time.time() < deadline:
+            time.sleep(SHORT_TTL)
+        assert storage.expiry_sweeper.purged == 10
+        assert storage.getAll() == {'plain': 'value'}
+        storage.close()
+        assert storage.expiry_sweeper is None
+
+    async def test_async_sweeper(self):
+        """Test that the async sweeper runs as a task on the running loop."""
+        storage = AsyncLocalStoragePro('test.ttl.sweeper.async', 'sqlite')
+        await storage.clear()
+        await storage.setMany({f'key_{i}': str(i) for i in range(10)}, ttl=SHORT_TTL)
+        await storage.setItem('plain', 'value')
+        await storage.startExpirySweeper(interval=SHORT_TTL, batch_size=4)
+        assert storage.expiry_sweeper.task is not None
+        for _ in range(100):
+            if storage.expiry_sweeper.purged >= 10:
+                break
+            await asyncio.sleep(SHORT_TTL)
+        assert storage.expiry_sweeper.purged == 10
+        assert await storage.getAll() == {'plain': 'value'}
+        assert await storage.purgeExpired() == 0
+        await storage.aclose()
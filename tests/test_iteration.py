@@ -0,0 +1,86 @@
+"""Tests for streaming iteration and pagination."""
+
+import pytest
+from localStoragePro import localStoragePro, AsyncLocalStoragePro
+
+
+DATA = {f"key_{i:03d}": f"value_{i}" for i in range(250)}
+
+
+class TestIteration:
+    """Test iterKeys, iterItems and page on every backend."""
+
+    @pytest.mark.parametrize("backend", ['text', 'sqlite', 'json', 'log', 'dbm', 'sqlite-shared'])
+    def test_iterate_everything(self, backend):
+        """Test that iteration visits every key exactly once."""
+        storage = localStoragePro(f'test.iter.{backend}', backend)
+        storage.clear()
+        storage.setMany(DATA)
+
+        keys = list(storage.iterKeys())
+        assert sorted(keys) == sorted(DATA)
+        assert dict(storage.iterItems()) == DATA
+        storage.clear()
+        storage.close()
+
+    @pytest.mark.parametrize("backend", ['text', 'sqlite', 'json', 'log', 'dbm', 'sqlite-shared'])
+    def test_keyset_pagination(self, backend):
+        """Test that pages come back in key order and cover the namespace."""
+        storage = localStoragePro(f'test.page.{backend}', backend)
+        storage.clear()
+        storage.setMany(DATA)
+
+        seen = []
+        after_key = None
+        while True:
+            rows = storage.page(after_key, limit=100)
+            assert len(rows) <= 100
+            seen.extend(rows)
+            if len(rows) < 100:
+                break
+            after_key = rows[-1][0]
+        assert seen == sorted(DATA.items())
+        assert storage.page('key_248', limit=10) == [('key_249', 'value_249')]
+        assert storage.page('zzz') == []
+        storage.clear()
+        storage.close()
+
+    def test_sqlite_iteration_is_batched(self):
+        """Test that SQLite iteration keeps working across batch boundaries."""
+        storage = localStoragePro('test.iter.batched', 'sqlite')
+        storage.clear()
+        storage.setMany(DATA)
+
+        backend = storage.storage_backend_instance
+        assert list(backend.iter_keys(batch_size=7)) == sorted(DATA)
+        assert list(backend.iter_items(batch_size=50)) == sorted(DATA.items())
+        storage.clear()
+        storage.close()
+
+    def test_iteration_decodes_values(self):
+        """Test that codec-encoded values are decoded while iterating."""
+        storage = localStoragePro('test.iter.codec', 'sqlite', codec='json', compression={'threshold': 16})
+        storage.clear()
+        storage.setMany({'a': [1, 2, 3], 'b': {'long': 'x' * 100}})
+
+        assert dict(storage.iterItems()) == {'a': [1, 2, 3], 'b': {'long': 'x' * 100}}
+        assert storage.page(limit=1) == [('a', [1, 2, 3])]
+        storage.clear()
+        storage.close()
+
+
+@pytest.mark.asyncio
+async def test_async_iteration():
+    """Test async iteration and pagination."""
+    storage = AsyncLocalStoragePro('test.iter.async', 'sqlite')
+    await storage.clear()
+    await storage.setMany(DATA)
+
+    keys = [key async for key in storage.iterKeys(batch_size=64)]
+    assert keys == sorted(DATA)
+    items = {key: value async for key, value in storage.iterItems()}
+    assert items == DATA
+    assert await storage.page('key_100', limit=2) == [('key_101', 'value_101'), ('key_102', 'value_102')]
+
+    await storage.clear()
+    await storage.aclose()
@@ -0,0 +1,156 @@
+"""Tests for the JSON backend's append-only journal mode."""
+
+import json
+import os
+import threading
+import time
+
+from localStoragePro import localStoragePro
+
+
+def open_storage(**options):
+    """Open the journal test namespace, forwarding backend options."""
+    return localStoragePro('test.json.journal', 'json', journal=True, **options)
+
+
+def slow_down_compaction(backend, seconds=0.2):
+    """Make the backend's compactions take a while, returning an Event set when one starts."""
+    write_atomically = backend.write_atomically
+    compaction_started = threading.Event()
+
+    def slow_write_atomically(data, durable=False):
+        # Only compaction writes durably
+        if durable:
+            compaction_started.set()
+            time.sleep(seconds)
+        write_atomically(data, durable)
+
+    backend.write_atomically = slow_write_atomically
+    return compaction_started
+
+
+class TestJSONJournal:
+    """Test journaled writes, replay and compaction."""
+
+    def setup_method(self):
+        storage = localStoragePro('test.json.journal', 'json')
+        storage.clear()
+        storage.close()
+
+    def test_writes_append_to_journal(self):
+        """Test that journaled writes leave the main file untouched until compaction."""
+        storage = open_storage()
+        backend = storage.storage_backend_instance
+        main_before = open(backend.json_path).read()
+
+        storage.setItem('key1', 'value1')
+        storage.setMany({'key2': 'value2', 'key3': 'value3'})
+        storage.removeItem('key1')
+
+        assert open(backend.json_path).read() == main_before
+        with open(backend.journal_path) as journal_file:
+            entries = [json.loads(line) for line in journal_file]
+        assert [entry['op'] for entry in entries] == ['set', 'set', 'set', 'del']
+        assert storage.getAll() == {'key2': 'value2', 'key3': 'value3'}
+        storage.close()
+
+        # A new instance replays the journal on load
+        reopened = open_storage()
+        assert reopened.getAll() == {'key2': 'value2', 'key3': 'value3'}
+        reopened.close()
+
+    def test_compaction(self):
+        """Test that a large journal is folded back into the main file."""
+        storage = open_storage(journal_compact_min_bytes=1024)
+        backend = storage.storage_backend_instance
+
+        for i in range(100):
+            storage.setItem(f"key_{i}", f"value_{i}")
+        backend.wait_for_compaction()
+
+        assert not os.path.exists(backend.compacting_journal_path)
+        with open(backend.json_path) as json_file:
+            main_data = json.load(json_file)
+        with open(backend.journal_path) as journal_file:
+            journal_entries = journal_file.readlines()
+        # Entries rotated out by compaction now live in the main file
+        assert len(main_data) > 0
+        assert len(main_data) + len(journal_entries) == 100
+        storage.close()
+
+        reopened = open_storage()
+        assert reopened.getAll() == {f"key_{i}": f"value_{i}" for i in range(100)}
+        reopened.close()
+
+    def test_torn_journal_tail(self):
+        """Test that a partially written last entry is discarded on load."""
+        storage = open_storage()
+        storage.setItem('key1', 'value1')
+        journal_path = storage.storage_backend_instance.journal_path
+        storage.close()
+
+        with open(journal_path, 'a') as journal_file:
+            journal_file.write('{"op": "set", "key": "key2", "val')
+
+        reopened = open_storage()
+        assert reopened.getAll() == {'key1': 'value1'}
+        reopened.setItem('key3', 'value3')
+        reopened.close()
+
+        reopened = open_storage()
+        assert reopened.getAll() == {'key1': 'value1', 'key3': 'value3'}
+        reopened.close()
+
+    def test_disabling_journal_folds_it_in(self):
+        """Test that opening without journal mode keeps journaled writes."""
+        storage = open_storage()
+        storage.setItem('key1', 'value1')
+        journal_path = storage.storage_backend_instance.journal_path
+        storage.close()
+
+        plain = localStoragePro('test.json.journal', 'json')
+        assert plain.getItem('key1') == 'value1'
+        assert not os.path.exists(journal_path)
+        plain.clear()
+
+    def test_close_during_compaction(self):
+        """Test that closing while a compaction is still running neither hangs nor loses data."""
+        storage = open_storage(journal_compact_min_bytes=2000)
+        compaction_started = slow_down_compaction(storage.storage_backend_instance)
+        for i in range(2000):
+            storage.setItem(f"key_{i}", f"value_{i}")
+        assert compaction_started.wait(5)
+
+        closer = threading.Thread(target=storage.close, daemon=True)
+        closer.start()
+        closer.join(10)
+        assert not closer.is_alive(), "close() deadlocked against the compaction thread"
+
+        reopened = open_storage()
+        assert reopened.getAll() == {f"key_{i}": f"value_{i}" for i in range(2000)}
+        reopened.close()
+
+    def test_writes_and_reopen_during_compaction(self):
+        """Test that writes don't wait for a running compaction and a reopen sees everything."""
+        storage = open_storage(journal_compact_min_bytes=2000)
+        compaction_started = slow_down_compaction(storage.storage_backend_instance, seconds=0.5)
+        for i in range(200):
+            storage.setItem(f"key_{i}", f"value_{i}")
+        assert compaction_started.wait(5)
+
+        start = time.monotonic()
+        storage.setItem('during', 'compaction')
+        storage.storage_backend_instance.compact()
+        assert time.monotonic() - start < 0.25
+
+        # Another instance replays the main file, the journal being compacted and the new one
+        reopened = open_storage()
+        expected = dict({f"key_{i}": f"value_{i}" for i in range(200)}, during='compaction')
+        assert reopened.getAll() == expected
+        reopened.close()
+
+        storage.storage_backend_instance.compact(wait=True)
+        storage.close()
+        reopened = open_storage()
+        assert reopened.getAll() == expected
+        reopened.close()
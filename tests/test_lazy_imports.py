@@ -0,0 +1,77 @@
+"""Tests for lazy imports and deferred backend construction."""
+
+import os
+import sys
+import subprocess
+import pytest
+from localStoragePro import localStoragePro
+from localStoragePro.storage_backends import localStoragePyStorageException
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+
+def run_python(code):
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            env=dict(os.environ, PYTHONPATH=SRC_PATH))
+    return result.stdout.split()
+
+
+class TestLazyImports:
+    """Test that importing the package stays cheap."""
+
+    def test_import_skips_heavy_modules(self):
+        """Test that a bare import loads none of the backend dependencies."""
+        loaded = run_python(
+            "import sys, localStoragePro\n"
+            "print(*[name for name in ('asyncio', 'sqlite3', 'json', 'traceback') if name in sys.modules])")
+        assert loaded == []
+
+    def test_import_trace_skips_backends(self):
+        """Test with -X importtime that importing the package loads no backend module."""
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import localStoragePro'],
+                                capture_output=True, text=True, check=True,
+                                env=dict(os.environ, PYTHONPATH=SRC_PATH))
+        # Lines look like "import time:  self [us] | cumulative | module", nested modules indented
+        traced = {line.rsplit('|', 1)[1].strip() for line in result.stderr.splitlines()
+                  if line.startswith('import time:') and '|' in line}
+        assert 'localStoragePro' in traced
+        heavy = {'asyncio', 'sqlite3', 'json', 'localStoragePro.storage_backends', 'localStoragePro.sqlite_storage',
+                 'localStoragePro.json_storage', 'localStoragePro.async_storage', 'localStoragePro.metrics'}
+        assert traced & heavy == set()
+
+    def test_attributes_resolve_on_access(self):
+        """Test that lazily exported names still import from the package."""
+        loaded = run_python(
+            "import sys\n"
+            "from localStoragePro import AsyncLocalStoragePro, SQLiteStorageBackend, CODECS\n"
+            "print(*[name for name in ('asyncio', 'sqlite3') if name in sys.modules])")
+        assert loaded == ['asyncio', 'sqlite3']
+        import localStoragePro as package
+        assert package.JSONStorageBackend.__name__ == 'JSONStorageBackend'
+        assert 'AsyncLocalStoragePro' in dir(package)
+        with pytest.raises(AttributeError):
+            package.NoSuchBackend
+
+
+class TestLazyConstruction:
+    """Test deferring the backend until first use."""
+
+    def test_backend_opens_on_first_use(self):
+        """Test that a lazy store opens its backend on the first operation."""
+        storage = localStoragePro('test.lazy.open', 'sqlite', cache=True, lazy=True)
+        assert storage._storage_backend_instance is None
+        storage.close()
+        assert storage._storage_backend_instance is None
+        storage.setItem('key', 'value')
+        assert storage.getItem('key') == 'value'
+        assert storage.cache is not None
+        storage.clear()
+        storage.close()
+
+    def test_invalid_options_raise_on_first_use(self):
+        """Test that option errors surface on the first operation of a lazy store."""
+        storage = localStoragePro('test.lazy.invalid', 'sqlite', profile='no-such-profile', lazy=True)
+        with pytest.raises(localStoragePyStorageException):
+            storage.getItem('key')
+        with pytest.raises(localStoragePyStorageException):
+            localStoragePro('test.lazy.invalid', 'sqlite', profile='no-such-profile')
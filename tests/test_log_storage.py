@@ -0,0 +1,166 @@
+"""Tests for the log-structured storage backend."""
+
+import os
+import time
+import pytest
+from localStoragePro import localStoragePro
+from localStoragePro.log_storage import LogStorageBackend
+from localStoragePro.storage_backends import localStoragePyStorageException
+
+
+def data_files(backend):
+    return sorted(name for name in os.listdir(backend.app_storage_path) if name.endswith('.data'))
+
+
+class TestLogStorage:
+    """Test reads, writes and recovery of the append-only log."""
+
+    def test_basic_operations(self):
+        """Test the usual operations against the log backend."""
+        storage = localStoragePro('test.log.basic', 'log')
+        storage.clear()
+        storage.setItem('text', 'héllo ✓')
+        storage.setItem('binary', b'\x00\x01\xff')
+        storage.setMany({'a': '1', 'b': '2', 'c': '3'})
+        storage.setItem('a', 'overwritten')
+        storage.removeItem('b')
+        storage.removeMany(['c', 'missing'])
+        assert storage.getItem('text') == 'héllo ✓'
+        assert storage.getItem('binary') == b'\x00\x01\xff'
+        assert storage.getItem('b') is None
+        assert storage.getAll() == {'text': 'héllo ✓', 'binary': b'\x00\x01\xff', 'a': 'overwritten'}
+        assert storage.getMany(['a', 'b']) == {'a': 'overwritten'}
+        assert storage.page(limit=2) == [('a', 'overwritten'), ('binary', b'\x00\x01\xff')]
+        assert storage.page('binary') == [('text', 'héllo ✓')]
+        storage.setMany({'user:1': 'x', 'user:2': 'y', 'vendor': 'z'})
+        assert storage.getByPrefix('user:') == {'user:1': 'x', 'user:2': 'y'}
+        assert sorted(storage.iterKeys()) == ['a', 'binary', 'text', 'user:1', 'user:2', 'vendor']
+        storage.clear()
+        assert storage.getAll() == {}
+        storage.close()
+
+    def test_reopen_from_hints_and_data(self):
+        """Test that reopening rebuilds the key directory from hint files and the active file."""
+        backend = LogStorageBackend('test.log.reopen', max_file_size=256, merge_ratio=None)
+        backend.clear()
+        for i in range(50):
+            backend.set_item(f'key_{i:02d}', f'value_{i}')
+        backend.remove_many([f'key_{i:02d}' for i in range(0, 50, 5)])
+        backend.set_item('short', 'value', ttl=0.05)
+        assert len(data_files(backend)) > 1
+        hints = [name for name in os.listdir(backend.app_storage_path) if name.endswith('.hint')]
+        assert len(hints) == len(data_files(backend)) - 1
+        expected = backend.get_all()
+        backend.close()
+
+        time.sleep(0.1)
+        reopened = LogStorageBackend('test.log.reopen', max_file_size=256, merge_ratio=None)
+        assert reopened.get_all() == {key: value for key, value in expected.items() if key != 'short'}
+        assert reopened.get_item('key_05') is None
+        assert reopened.purge_expired() == 1
+        reopened.clear()
+        reopened.close()
+
+    def test_torn_tail_is_truncated(self):
+        """Test that a partially written record at the end of the active file is cut off."""
+        backend = LogStorageBackend('test.log.torn')
+        backend.clear()
+        backend.set_item('kept', 'value')
+        backend.set_item('torn', 'x' * 100)
+        path = backend.data_path(backend.active_id)
+        backend.close()
+        size = os.path.getsize(path)
+        with open(path, 'r+b') as data_file:
+            data_file.truncate(size - 10)
+
+        reopened = LogStorageBackend('test.log.torn')
+        assert reopened.get_all() == {'kept': 'value'}
+        reopened.set_item('after', 'value')
+        reopened.close()
+        reopened = LogStorageBackend('test.log.torn')
+        assert reopened.get_all() == {'kept': 'value', 'after': 'value'}
+        reopened.clear()
+        reopened.close()
+
+    def test_corrupt_record_fails_crc(self):
+        """Test that a record whose bytes changed on disk is not served."""
+        backend = LogStorageBackend('test.log.crc')
+        backend.clear()
+        backend.set_item('good', 'value')
+        backend.set_item('bad', 'value')
+        path = backend.data_path(backend.active_id)
+        offset = backend.keydir['bad'].value_offset
+        backend.close()
+        with open(path, 'r+b') as data_file:
+            data_file.seek(offset)
+            data_file.write(b'V')
+
+        reopened = LogStorageBackend('test.log.crc')
+        assert reopened.get_all() == {'good': 'value'}
+        reopened.clear()
+        reopened.close()
+
+    def test_merge_reclaims_dead_records(self):
+        """Test that merging keeps live values, drops dead ones and survives reopening."""
+        backend = LogStorageBackend('test.log.merge', max_file_size=512, merge_ratio=None)
+        backend.clear()
+        for round_number in range(5):
+            backend.set_many({f'key_{i:02d}': f'value_{i}_{round_number}' for i in range(20)})
+        backend.remove_item('key_00')
+        backend.set_item('expiring', 'value', ttl=0.05)
+        time.sleep(0.1)
+        before = backend.total_bytes
+        assert backend.dead_bytes > backend.live_bytes
+
+        backend.merge(wait=True)
+        assert backend.total_bytes < before
+        assert backend.dead_bytes == 0
+        assert 'expiring' not in backend.keydir
+        expected = {f'key_{i:02d}': f'value_{i}_4' for i in range(1, 20)}
+        assert backend.get_all() == expected
+        backend.set_item('key_01', 'after merge')
+        backend.close()
+
+        reopened = LogStorageBackend('test.log.merge', max_file_size=512, merge_ratio=None)
+        assert reopened.get_all() == dict(expected, key_01='after merge')
+        reopened.clear()
+        reopened.close()
+
+    def test_writes_during_merge_win(self):
+        """Test that keys written while a merge copies data keep their newer value."""
+        backend = LogStorageBackend('test.log.concurrent', merge_ratio=None)
+        backend.clear()
+        backend.set_many({f'key_{i}': 'old' for i in range(1000)})
+        backend.merge()
+        backend.set_many({f'key_{i}': 'new' for i in range(0, 1000, 2)})
+        backend.remove_item('key_1')
+        backend.wait_for_merge()
+        values = backend.get_all()
+        assert 'key_1' not in values
+        assert all(value == ('new' if int(key[4:]) % 2 == 0 else 'old') for key, value in values.items())
+        assert len(values) == 999
+        backend.close()
+
+        reopened = LogStorageBackend('test.log.concurrent', merge_ratio=None)
+        assert reopened.get_all() == values
+        reopened.clear()
+        reopened.close()
+
+    def test_automatic_merge(self):
+        """Test that enough dead data triggers a merge by itself."""
+        backend = LogStorageBackend('test.log.auto', max_file_size=1024, merge_ratio=0.5, merge_min_bytes=4096)
+        backend.clear()
+        for i in range(200):
+            backend.set_item('counter', str(i) * 10)
+        backend.wait_for_merge()
+        assert backend.total_bytes < 200 * 40
+        assert backend.get_item('counter') == '199' * 10
+        backend.clear()
+        backend.close()
+
+    def test_invalid_options(self):
+        """Test that nonsensical options are rejected."""
+        with pytest.raises(localStoragePyStorageException):
+            LogStorageBackend('test.log.invalid', max_file_size=0)
+        with pytest.raises(localStoragePyStorageException):
+            LogStorageBackend('test.log.invalid', merge_ratio=1.5)
@@ -0,0 +1,104 @@
+"""Tests for the metrics and observer API."""
+
+import pytest
+from localStoragePro import localStoragePro, AsyncLocalStoragePro, StorageMetrics
+from localStoragePro.metrics import LATENCY_BUCKETS, LatencyHistogram, MetricsStorageBackend
+
+
+class TestLatencyHistogram:
+    """Test the fixed log-scale buckets."""
+
+    def test_buckets_and_quantiles(self):
+        histogram = LatencyHistogram()
+        for _ in range(98):
+            histogram.observe(3e-6)
+        histogram.observe(0.001)
+        histogram.observe(100.0)
+        assert histogram.count == 100
+        assert histogram.quantile(0.5) == 4e-6
+        assert histogram.quantile(0.99) == LATENCY_BUCKETS[10]
+        assert histogram.quantile(1.0) == float('inf')
+        snapshot = histogram.snapshot()
+        assert len(snapshot['buckets']) == len(LATENCY_BUCKETS) + 1
+        assert sum(count for _, count in snapshot['buckets']) == 100
+        assert LatencyHistogram().quantile(0.5) is None
+
+
+class TestStorageMetrics:
+    """Test metrics recorded through the sync and async APIs."""
+
+    def test_sync_stats_and_observer(self):
+        """Test counts, bytes and latency per operation, and the push-style observer."""
+        events = []
+        metrics = StorageMetrics(observers=[events.append])
+        storage = localStoragePro('test.metrics.sync', 'sqlite', metrics=metrics)
+        storage.clear()
+        storage.setItem('key', 'value')
+        storage.setMany({'a': '12', 'b': '345'})
+        assert storage.getItem('key') == 'value'
+        assert storage.getItem('missing') is None
+        assert storage.getMany(['a', 'b']) == {'a': '12', 'b': '345'}
+        assert sorted(storage.iterKeys()) == ['a', 'b', 'key']
+
+        stats = storage.metricsStats()['sqlite']
+        assert stats['get_item']['count'] == 2
+        assert stats['get_item']['bytes_read'] == 5
+        assert stats['set_item']['bytes_written'] == 8
+        assert stats['set_many']['bytes_written'] == 7
+        assert stats['get_many']['bytes_read'] == 7
+        assert stats['iter_keys']['count'] == 1 and stats['iter_keys']['bytes_read'] == 5
+        assert stats['get_item']['latency']['count'] == 2
+        assert stats['get_item']['latency']['p99'] > 0
+        assert [event.operation for event in events[:3]] == ['clear', 'set_item', 'set_many']
+        assert events[1].backend == 'sqlite' and events[1].bytes_written == 8 and not events[1].error
+
+        metrics.reset()
+        assert storage.metricsStats() == {}
+        storage.close()
+
+    def test_shared_metrics_split_by_backend(self):
+        """Test that one StorageMetrics aggregates several stores under their backend names."""
+        metrics = StorageMetrics()
+        sqlite_storage = localStoragePro('test.metrics.shared', 'sqlite', metrics=metrics, cache=True)
+        json_storage = localStoragePro('test.metrics.shared', 'json', metrics=metrics)
+        sqlite_storage.setItem('key', 'value')
+        json_storage.setItem('key', 'value')
+        for _ in range(3):
+            sqlite_storage.getItem('key')
+        stats = metrics.stats()
+        assert set(stats) == {'sqlite', 'json'}
+        # The cache answers repeated reads, so only the first reaches the backend
+        assert stats['sqlite']['get_item']['count'] == 1
+        sqlite_storage.clear()
+        json_storage.clear()
+        sqlite_storage.close()
+        json_storage.close()
+
+    def test_errors_are_counted(self):
+        """Test that failing calls count as errors and still raise."""
+        storage = localStoragePro('test.metrics.errors', 'sqlite', metrics=True)
+        with pytest.raises(Exception):
+            storage.setItem('key', 'value', ttl=-1)
+        assert storage.metricsStats()['sqlite']['set_item']['errors'] == 1
+        storage.close()
+
+    def test_disabled_by_default(self):
+        """Test that no wrapper is installed unless metrics are asked for."""
+        storage = localStoragePro('test.metrics.disabled', 'sqlite')
+        assert storage.metrics is None
+        assert not isinstance(storage.storage_backend_instance, MetricsStorageBackend)
+        assert storage.metricsStats() == {}
+        storage.close()
+
+    async def test_async_metrics(self):
+        """Test that the async API records reads, writes through the writer thread and errors."""
+        storage = AsyncLocalStoragePro('test.metrics.async', 'sqlite', metrics=True)
+        await storage.clear()
+        await storage.setMany({'a': '1', 'b': '2'})
+        await storage.setItem('c', '3', ttl=-1)
+        assert await storage.getAll() == {'a': '1', 'b': '2'}
+        stats = storage.metricsStats()['sqlite']
+        assert stats['set_many']['count'] == 1 and stats['set_many']['bytes_written'] == 4
+        assert stats['set_item']['errors'] == 1
+        assert stats['get_all']['bytes_read'] == 4
+        await storage.aclose()
@@ -1,8 +1,15 @@
 """Test suite for localStoragePro."""
 
+import asyncio
 import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
 import pytest
 from localStoragePro import localStoragePro
+from localStoragePro.storage_backends import localStoragePyStorageException
 
 class TestBasicOperations:
     """Test basic localStorage operations."""
@@ -132,6 +139,297 @@ class TestStorageBackends:
         storage.removeAll()
         assert len(storage.getAll()) == 0
 
+    @pytest.mark.parametrize("backend", ['text', 'sqlite', 'json'])
+    def test_set_many_and_remove_many(self, backend):
+        """Test that setMany/removeMany behave like repeated single-key calls."""
+        storage = localStoragePro(f'test.many.{backend}', backend)
+        storage.clear()
+
+        storage.setItem('key1', 'old')
+        storage.setMany({'key1': 'value1', 'key2': 2, 'key3': 'value3'})
+        assert storage.getAll() == {'key1': 'value1', 'key2': '2', 'key3': 'value3'}
+
+        storage.removeMany(['key1', 'key3', 'nonexistent'])
+        assert storage.getAll() == {'key2': '2'}
+
+        # Empty batches are no-ops
+        storage.setMany({})
+        storage.removeMany([])
+        assert storage.getAll() == {'key2': '2'}
+
+        storage.clear()
+
+
+class TestSQLiteProfiles:
+    """Test SQLite engine profiles."""
+
+    def test_throughput_profile(self):
+        """Test that the throughput preset is applied to the connection."""
+        storage = localStoragePro('test.profile.throughput', 'sqlite', profile='throughput')
+        storage.clear()
+        cursor = storage.storage_backend_instance.db_cursor
+
+        assert cursor.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert cursor.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert cursor.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+        assert cursor.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+        storage.setItem('key', 'value')
+        assert storage.getItem('key') == 'value'
+        storage.clear()
+        storage.close()
+
+    def test_custom_profile(self):
+        """Test a custom pragma dict."""
+        storage = localStoragePro('test.profile.custom', 'sqlite', profile={'synchronous': 'off', 'cache_size': -2000})
+        cursor = storage.storage_backend_instance.db_cursor
+
+        assert cursor.execute("PRAGMA synchronous").fetchone()[0] == 0
+        assert cursor.execute("PRAGMA cache_size").fetchone()[0] == -2000
+        storage.close()
+
+    @pytest.mark.parametrize("profile", ['turbo', {'foreign_keys': 'ON'}, {'synchronous': 'SOMETIMES'},
+                                         {'cache_size': '1; DROP TABLE localStoragePro'}])
+    def test_invalid_profile(self, profile):
+        """Test that unknown presets and pragmas are rejected."""
+        with pytest.raises(localStoragePyStorageException):
+            localStoragePro('test.profile.invalid', 'sqlite', profile=profile)
+
+
+class TestGroupCommit:
+    """Test SQLite group commit mode."""
+
+    @staticmethod
+    def committed_keys(storage):
+        """Read committed rows through an independent connection."""
+        connection = sqlite3.connect(storage.storage_backend_instance.db_path)
+        try:
+            return {key for (key,) in connection.execute("SELECT key FROM localStoragePro")}
+        finally:
+            connection.close()
+
+    def test_commit_on_batch_size(self):
+        """Test that pending writes are committed once the batch fills."""
+        storage = localStoragePro('test.groupcommit.batch', 'sqlite', commit_batch_size=3)
+        storage.clear()
+
+        storage.setItem('key1', 'value1')
+        storage.setItem('key2', 'value2')
+        # Pending writes are visible to this instance only
+        assert storage.getItem('key1') == 'value1'
+        assert self.committed_keys(storage) == set()
+
+        storage.setItem('key3', 'value3')
+        assert self.committed_keys(storage) == {'key1', 'key2', 'key3'}
+
+        storage.removeItem('key1')
+        assert self.committed_keys(storage) == {'key1', 'key2', 'key3'}
+        storage.flush()
+        assert self.committed_keys(storage) == {'key2', 'key3'}
+
+        storage.clear()
+        storage.close()
+
+    def test_commit_on_interval(self):
+        """Test that the timer commits a partial batch."""
+        storage = localStoragePro('test.groupcommit.interval', 'sqlite', commit_batch_size=1000, commit_interval_ms=20)
+        storage.clear()
+
+        storage.setMany({'key1': 'value1', 'key2': 'value2'})
+        assert self.committed_keys(storage) == set()
+
+        deadline = time.monotonic() + 2
+        while not self.committed_keys(storage) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert self.committed_keys(storage) == {'key1', 'key2'}
+
+        storage.clear()
+        storage.close()
+
+    def test_close_flushes(self):
+        """Test that close commits pending writes."""
+        storage = localStoragePro('test.groupcommit.close', 'sqlite', commit_batch_size=100)
+        storage.clear()
+        storage.setItem('key', 'value')
+        storage.close()
+
+        reopened = localStoragePro('test.groupcommit.close', 'sqlite')
+        assert reopened.getItem('key') == 'value'
+        reopened.clear()
+        reopened.close()
+
+
+class TestTextShardedLayout:
+    """Test the hash-sharded text backend layout."""
+
+    def test_sharded_round_trip(self):
+        """Test that keys, including ones with separators and dots, round-trip."""
+        storage = localStoragePro('test.text.sharded', 'text', layout='sharded')
+        storage.clear()
+
+        data = {'user:1/profile': 'a', '..': 'b', '.hidden': 'c', 'plain': 'd', 'sp ace%': 'e'}
+        storage.setMany(data)
+        assert storage.getAll() == data
+        assert storage.getMany(['..', 'missing']) == {'..': 'b'}
+
+        # Every key file sits two shard directories below the namespace
+        root = storage.storage_backend_instance.app_storage_path
+        for dirpath, dirnames, filenames in os.walk(root):
+            depth = os.path.relpath(dirpath, root).count(os.sep) + (dirpath != root)
+            assert not filenames or depth == 2
+
+        storage.removeItem('user:1/profile')
+        assert storage.getItem('user:1/profile') is None
+        storage.clear()
+        assert storage.getAll() == {}
+
+    def test_migration_from_flat(self):
+        """Test that a flat store is migrated when opened with the sharded layout."""
+        flat = localStoragePro('test.text.migrate', 'text')
+        flat.clear()
+        flat.setMany({'key1': 'value1', 'key2': 'value2'})
+
+        sharded = localStoragePro('test.text.migrate', 'text', layout='sharded')
+        assert sharded.getAll() == {'key1': 'value1', 'key2': 'value2'}
+        assert flat.getAll() == {}
+        sharded.clear()
+
+    def test_migration_leaves_foreign_files(self):
+        """Test that files which aren't flat-layout keys stay where they are."""
+        localStoragePro('test.text.foreign', 'text', layout='sharded').clear()
+        sqlite_storage = localStoragePro('test.text.foreign', 'sqlite')
+        sqlite_storage.clear()
+        sqlite_storage.setItem('db_key', 'db_value')
+        root = sqlite_storage.storage_backend_instance.app_storage_path
+        with open(os.path.join(root, 'stray.txt'), 'w') as stray_file:
+            stray_file.write('not a key')
+
+        # No flat store ever lived here, nothing is moved
+        sharded = localStoragePro('test.text.foreign', 'text', layout='sharded')
+        assert sharded.getAll() == {}
+        assert os.path.isfile(os.path.join(root, 'stray.txt'))
+        assert os.path.isfile(os.path.join(root, 'localStorageSQLite.db'))
+        assert sqlite_storage.getItem('db_key') == 'db_value'
+
+        # A flat store sharing the directory gets its keys moved, but not the database
+        flat = localStoragePro('test.text.foreign', 'text')
+        flat.setItem('key1', 'value1')
+        sharded = localStoragePro('test.text.foreign', 'text', layout='sharded')
+        assert sharded.getItem('key1') == 'value1'
+        assert os.path.isfile(os.path.join(root, 'localStorageSQLite.db'))
+        assert sqlite_storage.getItem('db_key') == 'db_value'
+
+        sqlite_storage.close()
+        sharded.clear()
+
+    def test_invalid_layout(self):
+        """Test that unknown layouts are rejected."""
+        with pytest.raises(localStoragePyStorageException):
+            localStoragePro('test.text.sharded', 'text', layout='nested')
+
+
+class TestJSONDebouncedFlush:
+    """Test debounced, atomic JSON flushing."""
+
+    @staticmethod
+    def on_disk(storage):
+        """Read the JSON file as it currently is on disk."""
+        with open(storage.storage_backend_instance.json_path) as json_file:
+            return json.load(json_file)
+
+    def test_writes_are_coalesced(self):
+        """Test that writes within the window are flushed together by the timer."""
+        storage = localStoragePro('test.json.debounce', 'json', flush_delay_ms=30)
+        storage.clear()
+        storage.flush()
+
+        storage.setItem('key1', 'value1')
+        storage.setItem('key2', 'value2')
+        assert storage.getItem('key1') == 'value1'
+        assert self.on_disk(storage) == {}
+
+        deadline = time.monotonic() + 2
+        while self.on_disk(storage) == {} and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert self.on_disk(storage) == {'key1': 'value1', 'key2': 'value2'}
+
+        storage.clear()
+        storage.close()
+
+    def test_flush_and_close_drain(self):
+        """Test that flush() and close() write pending changes immediately."""
+        storage = localStoragePro('test.json.debounce.drain', 'json', flush_delay_ms=60000)
+        storage.clear()
+
+        storage.setItem('key1', 'value1')
+        storage.flush()
+        assert self.on_disk(storage) == {'key1': 'value1'}
+
+        storage.removeItem('key1')
+        storage.close()
+        assert self.on_disk(storage) == {}
+
+        # Only the main file is left behind, no temp files
+        assert os.listdir(storage.storage_backend_instance.app_storage_path) == ['localStorageJSON.json']
+
+    @pytest.mark.asyncio
+    async def test_flush_on_running_loop(self):
+        """Test that the flush is scheduled on the running event loop."""
+        storage = localStoragePro('test.json.debounce.loop', 'json', flush_delay_ms=10)
+        storage.clear()
+        storage.flush()
+
+        storage.setItem('key1', 'value1')
+        assert isinstance(storage.storage_backend_instance.flush_handle, asyncio.TimerHandle)
+
+        for _ in range(200):
+            if self.on_disk(storage) != {}:
+                break
+            await asyncio.sleep(0.01)
+        assert self.on_disk(storage) == {'key1': 'value1'}
+
+        storage.clear()
+        storage.close()
+
+    def test_flush_after_loop_exits(self):
+        """Test that a flush pending on a finished event loop doesn't block later flushes."""
+        storage = localStoragePro('test.json.debounce.loop_exit', 'json', flush_delay_ms=50)
+        storage.clear()
+        storage.flush()
+
+        async def write_in_loop():
+            storage.setItem('inside', 'value')
+
+        asyncio.run(write_in_loop())
+        storage.setItem('outside', 'value')
+        deadline = time.monotonic() + 2
+        while self.on_disk(storage) == {} and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert self.on_disk(storage) == {'inside': 'value', 'outside': 'value'}
+
+        storage.clear()
+        storage.close()
+
+    def test_journal_and_debounce_are_exclusive(self):
+        """Test that flush_delay_ms is rejected in journal mode."""
+        with pytest.raises(localStoragePyStorageException):
+            localStoragePro('test.json.debounce', 'json', journal=True, flush_delay_ms=10)
+
+
+WRITE_PATH_BENCHMARK = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'write_path.py')
+
+
+class TestWritePath:
+    """Test the SQLite UPSERT write path against the one it replaced (timed in benchmarks/write_path.py)."""
+
+    def test_upsert_matches_legacy(self):
+        """Test that the legacy and UPSERT paths leave the same final state."""
+        # In a subprocess, the script puts src on sys.path and uses its own home directory
+        result = subprocess.run([sys.executable, WRITE_PATH_BENCHMARK, '--writes', '100'],
+                                capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        assert 'legacy' in result.stdout and 'upsert' in result.stdout
+
 
 class TestErrorHandling:
     """Test error handling scenarios."""
@@ -181,3 +479,30 @@ class TestJSONDataHandling:
         assert retrieved['name'] == 'Suraj Mandal'
         assert retrieved['settings']['theme'] == 'dark'
         assert len(retrieved['projects']) == 2
+
+
+class TestSQLiteTransaction:
+    """Test transaction() and nested savepoints on the SQLite backend."""
+
+    def test_transaction_commits_and_rolls_back(self):
+        storage = localStoragePro('test.sqlite.transaction', 'sqlite')
+        backend = storage.storage_backend_instance
+        storage.clear()
+
+        with backend.transaction():
+            backend.set_item('a', '1')
+            with pytest.raises(ValueError):
+                with backend.transaction():
+                    backend.set_item('b', '2')
+                    raise ValueError("undo b only")
+            backend.set_many({'c': '3'})
+        assert storage.getAll() == {'a': '1', 'c': '3'}
+
+        with pytest.raises(ValueError):
+            with backend.transaction():
+                backend.remove_item('a')
+                raise ValueError("undo everything")
+        assert storage.getAll() == {'a': '1', 'c': '3'}
+        assert not backend.db_connection.in_transaction
+        storage.clear()
+        storage.close()
@@ -0,0 +1,122 @@
+"""Tests for prefix and range scans."""
+
+import pytest
+from localStoragePro import localStoragePro, AsyncLocalStoragePro
+from localStoragePro.storage_backends import SortedKeyIndex, prefix_end
+
+
+DATA = {
+    "session:abc": "s1",
+    "session:abd": "s2",
+    "user:123:profile": "p123",
+    "user:123:settings": "c123",
+    "user:1234:profile": "p1234",
+    "user:124:profile": "p124",
+    "zeta": "z",
+}
+
+
+class TestPrefixEnd:
+    """Test the upper bound used to turn prefixes into ranges."""
+
+    def test_prefix_end(self):
+        assert prefix_end("user:123:") == "user:123;"
+        assert prefix_end("") is None
+        assert prefix_end("a\U0010ffff") == "b"
+        assert prefix_end("퟿") == ""
+
+    def test_sorted_key_index(self):
+        index = SortedKeyIndex(["b", "a", "c"])
+        index.add("bb")
+        index.add("b")
+        index.discard("c")
+        index.discard("missing")
+        assert index.keys == ["a", "b", "bb"]
+        assert index.range("b", "c") == ["b", "bb"]
+        assert index.range(None, "b") == ["a"]
+        assert index.range("bb") == ["bb"]
+
+
+class TestRangeScans:
+    """Test getByPrefix and getRange on every backend."""
+
+    @pytest.mark.parametrize("backend", ['text', 'sqlite', 'json', 'log', 'dbm', 'sqlite-shared'])
+    def test_get_by_prefix(self, backend):
+        """Test that prefix scans return exactly the matching keys, in order."""
+        storage = localStoragePro(f'test.prefix.{backend}', backend)
+        storage.clear()
+        storage.setMany(DATA)
+
+        result = storage.getByPrefix("user:123:")
+        assert list(result.items()) == [("user:123:profile", "p123"), ("user:123:settings", "c123")]
+        assert list(storage.getByPrefix("session:")) == ["session:abc", "session:abd"]
+        assert storage.getByPrefix("nothing") == {}
+        assert storage.getByPrefix("") == dict(sorted(DATA.items()))
+        storage.clear()
+        storage.close()
+
+    @pytest.mark.parametrize("backend", ['text', 'sqlite', 'json', 'log', 'dbm', 'sqlite-shared'])
+    def test_get_range(self, backend):
+        """Test that ranges include start and exclude end."""
+        storage = localStoragePro(f'test.range.{backend}', backend)
+        storage.clear()
+        storage.setMany(DATA)
+
+        # ":" sorts after digits, so "user:1234:..." comes before "user:123:..."
+        assert list(storage.getRange("session:abd", "user:124")) == [
+            "session:abd", "user:1234:profile", "user:123:profile", "user:123:settings"]
+        assert list(storage.getRange("user:124")) == ["user:124:profile", "zeta"]
+        assert list(storage.getRange(None, "session:abd")) == ["session:abc"]
+        storage.clear()
+        storage.close()
+
+    @pytest.mark.parametrize("backend", ['text', 'json'])
+    def test_key_index_follows_writes(self, backend):
+        """Test that the sorted key index stays in step with writes after it is built."""
+        storage = localStoragePro(f'test.range.index.{backend}', backend)
+        storage.clear()
+        storage.setMany(DATA)
+        assert len(storage.getByPrefix("user:")) == 4
+
+        storage.setItem("user:125:profile", "p125")
+        storage.removeItem("user:123:settings")
+        storage.removeMany(["user:124:profile"])
+        storage.setMany({"user:100:profile": "p100"})
+        assert list(storage.getByPrefix("user:")) == [
+            "user:100:profile", "user:1234:profile", "user:123:profile", "user:125:profile"]
+
+        storage.clear()
+        assert storage.getByPrefix("user:") == {}
+        storage.setItem("user:1:profile", "p1")
+        assert storage.getByPrefix("user:") == {"user:1:profile": "p1"}
+        storage.clear()
+        storage.close()
+
+    def test_sqlite_prefix_scan_uses_primary_key(self):
+        """Test that SQLite serves range scans from the primary key index."""
+        storage = localStoragePro('test.range.plan', 'sqlite')
+        backend = storage.storage_backend_instance
+        for query, params in ((backend.SQL_GET_RANGE, ("a", "b", 0)), (backend.SQL_GET_FROM, ("a", 0))):
+            plan = backend.db_cursor.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+            detail = " ".join(row[-1] for row in plan)
+            assert "SEARCH" in detail and "INDEX" in detail
+        storage.close()
+
+    def test_prefix_with_codec(self):
+        """Test that prefix scans decode values through a codec."""
+        storage = localStoragePro('test.range.codec', 'sqlite', codec='json', cache=True)
+        storage.clear()
+        storage.setMany({"user:1": {"id": 1}, "user:2": [2], "other": None})
+        assert storage.getByPrefix("user:") == {"user:1": {"id": 1}, "user:2": [2]}
+        storage.clear()
+        storage.close()
+
+    async def test_async_range_scans(self):
+        """Test getByPrefix and getRange on the async API."""
+        storage = AsyncLocalStoragePro('test.range.async', 'sqlite')
+        await storage.clear()
+        await storage.setMany(DATA)
+        assert list(await storage.getByPrefix("user:123:")) == ["user:123:profile", "user:123:settings"]
+        assert list(await storage.getRange("zeta")) == ["zeta"]
+        await storage.clear()
+        await storage.aclose()
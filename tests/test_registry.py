@@ -0,0 +1,74 @@
+"""Tests for the instance registry of the lsp and async_lsp singletons."""
+
+import sqlite3
+import pytest
+from localStoragePro import async_lsp, lsp
+
+
+class TestSyncRegistry:
+    """Test reuse, replacement and eviction of lsp stores."""
+
+    def test_reuse_and_replace(self):
+        """Test that calls reuse a store until different options replace it."""
+        first = lsp('test.registry.sync', 'sqlite')
+        assert lsp('test.registry.sync', 'sqlite') is first
+        first.setItem('key', 'value')
+
+        cached = lsp('test.registry.sync', 'sqlite', cache={'max_entries': 10})
+        assert cached is not first
+        with pytest.raises(sqlite3.ProgrammingError):
+            first.base_backend.db_connection.execute('SELECT 1')
+        assert lsp('test.registry.sync') is cached
+        assert lsp('test.registry.sync', 'sqlite', cache={'max_entries': 10}) is cached
+        assert lsp.getItem('key') == 'value'
+        lsp.clear()
+        assert lsp.evict('test.registry.sync') == 1
+
+    def test_evict_closes_and_reopens(self):
+        """Test that eviction closes stores and the singleton reopens on next use."""
+        sqlite_store = lsp('test.registry.evict', 'sqlite')
+        sqlite_store.setItem('key', 'value')
+        lsp('test.registry.evict', 'text')
+        assert len(lsp.instances()) == 2
+        assert lsp.evict('test.registry.evict', 'sqlite') == 1
+        with pytest.raises(sqlite3.ProgrammingError):
+            sqlite_store.base_backend.db_connection.execute('SELECT 1')
+        assert lsp.evict('test.registry.evict', 'sqlite') == 0
+        assert lsp.getItem('key') is None  # still on the text store
+
+        lsp('test.registry.evict', 'sqlite')
+        lsp.closeAll()
+        assert lsp.instances() == []
+        assert lsp.getItem('key') == 'value'
+        assert lsp.instances()[0] is not sqlite_store
+        lsp.clear()
+        lsp.closeAll()
+
+
+class TestAsyncRegistry:
+    """Test reuse, replacement and eviction of async_lsp stores."""
+
+    def test_failed_open_returns_none(self):
+        """Test that async_lsp returns None, not the singleton, when a store can't be opened."""
+        fresh = type(async_lsp)()
+        assert fresh() is None
+
+    async def test_reuse_replace_and_evict(self):
+        """Test that async stores are reused, replaced in the background and closed on eviction."""
+        first = async_lsp('test.registry.async', 'sqlite')
+        assert async_lsp('test.registry.async') is first
+        await first.setItem('key', 'value')
+
+        replaced = async_lsp('test.registry.async', 'sqlite', max_workers=1)
+        assert replaced is not first
+        assert await async_lsp.getItem('key') == 'value'
+        await async_lsp.closeAll()
+        assert first.storage_backend_instance._closed
+        assert replaced.storage_backend_instance._closed
+        assert async_lsp.instances() == []
+
+        reopened = async_lsp('test.registry.async', 'sqlite')
+        assert reopened is not replaced
+        await async_lsp.clear()
+        assert await async_lsp.evict('test.registry.async') == 1
+        assert reopened.storage_backend_instance._closed
@@ -0,0 +1,109 @@
+"""Tests for namespaces sharing one SQLite database."""
+
+import os
+import sqlite3
+import tempfile
+import pytest
+from localStoragePro import AsyncLocalStoragePro, localStoragePro
+from localStoragePro.shared_sqlite import SharedSQLiteStorageBackend, open_shared_database
+from localStoragePro.storage_backends import localStoragePyStorageException
+
+
+@pytest.fixture
+def database_path():
+    with tempfile.TemporaryDirectory() as directory:
+        yield os.path.join(directory, 'shared.db')
+
+
+class TestSharedSQLite:
+    """Test many namespaces stored in one database."""
+
+    def test_namespaces_are_isolated(self, database_path):
+        """Test that namespaces in one database see only their own keys."""
+        first = localStoragePro('test.shared.first', 'sqlite-shared', database=database_path)
+        second = localStoragePro('test.shared.second', 'sqlite-shared', database=database_path)
+        first.setMany({'a': '1', 'b': '2', 'user:1': 'x'})
+        second.setMany({'a': 'other', 'c': b'\x00\xff'})
+        second.setItem('short', 'value', ttl=60)
+        assert first.getAll() == {'a': '1', 'b': '2', 'user:1': 'x'}
+        assert second.getMany(['a', 'b', 'c']) == {'a': 'other', 'c': b'\x00\xff'}
+        assert first.getByPrefix('user:') == {'user:1': 'x'}
+        assert first.page('a') == [('b', '2'), ('user:1', 'x')]
+        assert list(second.iterKeys()) == ['a', 'c', 'short']
+        assert second.base_backend.get_expiries(['short', 'a']).keys() == {'short'}
+
+        second.clear()
+        assert second.getAll() == {}
+        assert first.getItem('a') == '1'
+        assert first.base_backend.database is second.base_backend.database
+        assert first.base_backend.database.namespaces() == ['test.shared.first']
+        assert not os.path.isdir(first.base_backend.app_storage_path)
+        first.close()
+        second.close()
+
+    def test_transaction_spans_namespaces(self, database_path):
+        """Test that one transaction commits or rolls back writes to several namespaces."""
+        database = open_shared_database(database_path)
+        users = localStoragePro('test.shared.users', 'sqlite-shared', database=database)
+        orders = localStoragePro('test.shared.orders', 'sqlite-shared', database=database)
+        with database.transaction():
+            users.setItem('42', 'Ada')
+            orders.setMany({'1001': '42', '1002': '42'})
+        with pytest.raises(RuntimeError):
+            with database.transaction():
+                users.setItem('43', 'Grace')
+                orders.removeItem('1001')
+                raise RuntimeError('abort')
+
+        other = sqlite3.connect(database_path)
+        rows = other.execute('SELECT namespace, key FROM localStoragePro ORDER BY namespace, key').fetchall()
+        other.close()
+        assert rows == [('test.shared.orders', '1001'), ('test.shared.orders', '1002'), ('test.shared.users', '42')]
+        users.close()
+        orders.close()
+
+    def test_connection_closes_with_last_namespace(self, database_path):
+        """Test that the shared connection lives as long as any namespace is open."""
+        first = SharedSQLiteStorageBackend('test.shared.refs.a', database_path)
+        second = SharedSQLiteStorageBackend('test.shared.refs.b', database_path)
+        database = first.database
+        first.set_item('key', 'value')
+        first.close()
+        assert second.get_item('key') is None
+        second.close()
+        assert database.db_connection is None
+        with pytest.raises(localStoragePyStorageException):
+            with database.transaction():
+                pass
+
+        reopened = SharedSQLiteStorageBackend('test.shared.refs.a', database_path)
+        assert reopened.database is database
+        assert reopened.get_item('key') == 'value'
+        with pytest.raises(localStoragePyStorageException):
+            open_shared_database(database_path, profile='durable')
+        reopened.close()
+
+    def test_cache_sees_writes_of_other_instances(self, database_path):
+        """Test that a cached store notices writes made through the shared connection."""
+        cached = localStoragePro('test.shared.cache', 'sqlite-shared', database=database_path, cache=True)
+        writer = localStoragePro('test.shared.cache', 'sqlite-shared', database=database_path)
+        cached.setItem('key', 'old')
+        assert cached.getItem('key') == 'old'
+        writer.setItem('key', 'new')
+        assert cached.getItem('key') == 'new'
+        cached.setItem('key', 'own')
+        assert cached.getItem('key') == 'own'
+        assert cached.getItem('key') == 'own'
+        # Only the other instance's write dropped the cache, not its own
+        assert cached.cacheStats()['external_invalidations'] == 1
+        assert cached.cacheStats()['hits'] >= 1
+        cached.close()
+        writer.close()
+
+    async def test_async(self, database_path):
+        """Test the shared backend through the async API."""
+        storage = AsyncLocalStoragePro('test.shared.async', 'sqlite-shared', database=database_path)
+        await storage.setMany({'a': '1', 'b': '2'})
+        assert await storage.getItem('a') == '1'
+        assert await storage.getAll() == {'a': '1', 'b': '2'}
+        await storage.aclose()
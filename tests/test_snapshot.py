@@ -0,0 +1,119 @@
+"""Tests for memory-mapped read-only snapshots."""
+
+import time
+import pytest
+from localStoragePro import localStoragePro
+from localStoragePro.snapshot import SnapshotStorageBackend
+from localStoragePro.storage_backends import localStoragePyStorageException
+
+
+DATA = {f"key_{i:04d}": f"value_{i}" for i in range(0, 1000, 3)}
+
+
+class TestSnapshot:
+    """Test exporting snapshots and reading them back."""
+
+    @pytest.mark.parametrize("backend", ['text', 'sqlite', 'json', 'log', 'dbm', 'sqlite-shared'])
+    def test_round_trip(self, backend):
+        """Test that a snapshot reads back exactly what was exported."""
+        storage = localStoragePro(f'test.snapshot.{backend}', backend)
+        storage.clear()
+        storage.setMany(DATA)
+        storage.setItem('unicode', 'héllo ✓')
+        if backend != 'text':
+            storage.setItem('binary', b'\x00\x01\xff')
+        count = len(storage.getAll())
+        assert storage.exportSnapshot() == count
+        # The text backend never lists the snapshot file as a key
+        assert len(storage.getAll()) == count
+
+        snapshot = localStoragePro(f'test.snapshot.{backend}', 'snapshot')
+        assert snapshot.getItem('key_0003') == 'value_3'
+        assert snapshot.getItem('key_0004') is None
+        assert snapshot.getItem('unicode') == 'héllo ✓'
+        if backend != 'text':
+            assert snapshot.getItem('binary') == b'\x00\x01\xff'
+        assert snapshot.getAll() == storage.getAll()
+        assert snapshot.getMany(['key_0000', 'missing']) == {'key_0000': 'value_0'}
+        snapshot.close()
+        storage.clear()
+        storage.close()
+
+    def test_binary_search_and_scans(self):
+        """Test lookups, pages and range scans against a sorted snapshot."""
+        storage = localStoragePro('test.snapshot.search', 'sqlite')
+        storage.clear()
+        storage.setMany(DATA)
+        storage.exportSnapshot()
+
+        snapshot = localStoragePro('test.snapshot.search', 'snapshot')
+        for i in range(1000):
+            assert snapshot.getItem(f"key_{i:04d}") == DATA.get(f"key_{i:04d}")
+        assert snapshot.getItem('') is None
+        assert snapshot.getItem('zzz') is None
+        assert list(snapshot.iterKeys()) == sorted(DATA)
+        assert snapshot.page('key_0004', limit=2) == [('key_0006', 'value_6'), ('key_0009', 'value_9')]
+        assert snapshot.page('key_0006', limit=1) == [('key_0009', 'value_9')]
+        assert list(snapshot.getByPrefix('key_099')) == ['key_0990', 'key_0993', 'key_0996', 'key_0999']
+        assert list(snapshot.getRange('key_0010', 'key_0016')) == ['key_0012', 'key_0015']
+        snapshot.close()
+        storage.clear()
+        storage.close()
+
+    def test_zero_copy(self):
+        """Test that zero_copy returns memoryviews into the mapping."""
+        storage = localStoragePro('test.snapshot.zerocopy', 'sqlite')
+        storage.clear()
+        storage.setItem('blob', b'x' * 4096)
+        storage.exportSnapshot()
+
+        snapshot = SnapshotStorageBackend('test.snapshot.zerocopy', zero_copy=True)
+        value = snapshot.get_item('blob')
+        assert isinstance(value, memoryview)
+        assert value.readonly and value == b'x' * 4096
+        value.release()
+        snapshot.close()
+        storage.clear()
+        storage.close()
+
+    def test_read_only(self):
+        """Test that writes to a snapshot are rejected."""
+        storage = localStoragePro('test.snapshot.readonly', 'sqlite')
+        storage.clear()
+        storage.exportSnapshot()
+        snapshot = localStoragePro('test.snapshot.readonly', 'snapshot')
+        assert snapshot.getAll() == {}
+        with pytest.raises(localStoragePyStorageException):
+            snapshot.setItem('key', 'value')
+        with pytest.raises(localStoragePyStorageException):
+            snapshot.clear()
+        snapshot.close()
+        storage.close()
+
+    def test_missing_and_invalid_files(self, tmp_path):
+        """Test that missing and foreign files are reported clearly."""
+        with pytest.raises(localStoragePyStorageException):
+            SnapshotStorageBackend('test.snapshot.missing', path=str(tmp_path / 'missing.lsps'))
+        bogus = tmp_path / 'bogus.lsps'
+        bogus.write_bytes(b'not a snapshot at all, just some bytes here')
+        with pytest.raises(localStoragePyStorageException):
+            SnapshotStorageBackend('test.snapshot.missing', path=str(bogus))
+
+    def test_codec_and_ttl(self, tmp_path):
+        """Test that snapshots keep encoded values and key deadlines."""
+        storage = localStoragePro('test.snapshot.codec', 'sqlite', codec='json', compression='zlib')
+        storage.clear()
+        storage.setItem('config', {'retries': 3, 'hosts': ['a', 'b'] * 500})
+        storage.setItem('short', [1], ttl=0.05)
+        storage.setItem('long', [2], ttl=60)
+        path = str(tmp_path / 'export.lsps')
+        assert storage.exportSnapshot(path) == 3
+
+        time.sleep(0.1)
+        snapshot = localStoragePro('test.snapshot.codec', 'snapshot', codec='json', compression='zlib', path=path)
+        assert snapshot.getItem('config')['retries'] == 3
+        assert snapshot.getItem('short') is None
+        assert snapshot.getAll() == {'config': storage.getItem('config'), 'long': [2]}
+        snapshot.close()
+        storage.clear()
+        storage.close()